@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        # The FK's own index, declared in the state so it can be dropped concurrently
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='sociallink',
+                name='user',
+                field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='social_links', to=settings.AUTH_USER_MODEL),
+            ),
+            migrations.AddIndex(
+                model_name='sociallink',
+                index=models.Index(fields=['user'], name='accounts_sociallink_user_id_d8cd9807'),
+            ),
+        ]),
+        RemoveIndexConcurrently(
+            model_name='sociallink',
+            name='accounts_sociallink_user_id_d8cd9807',
+        ),
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='useractivity',
+                name='user',
+                field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activities', to=settings.AUTH_USER_MODEL),
+            ),
+            migrations.AddIndex(
+                model_name='useractivity',
+                index=models.Index(fields=['user'], name='accounts_useractivity_user_id_4dd2bb87'),
+            ),
+        ]),
+        RemoveIndexConcurrently(
+            model_name='useractivity',
+            name='accounts_useractivity_user_id_4dd2bb87',
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import RegexValidator
 import uuid
-import pyotp
 
 
 class UserRole(models.TextChoices):
@@ -12,6 +13,10 @@ class UserRole(models.TextChoices):
     VIEWER = 'viewer', 'Viewer'
 
 
+# Reverse relations counted on user profiles
+CONTENT_COUNT_RELATIONS = ('projects', 'experiences', 'education', 'skills', 'certifications')
+
+
 class CustomUserManager(BaseUserManager):
     """Custom user manager for email-based authentication"""
     
@@ -36,6 +41,22 @@ class CustomUserManager(BaseUserManager):
             raise ValueError('Superuser must have is_superuser=True.')
         
         return self.create_user(email, password, **extra_fields)
+    
+    def with_content_counts(self):
+        """Annotate the ``<relation>_count`` figures shown by UserSerializer"""
+        annotations = {}
+        for relation in CONTENT_COUNT_RELATIONS:
+            foreign_key = self.model._meta.get_field(relation).field.name
+            counts = (
+                self.model._meta.get_field(relation).related_model._default_manager
+                .filter(**{foreign_key: OuterRef('pk')})
+                .order_by()
+                .values(foreign_key)
+                .annotate(total=Count('pk'))
+                .values('total')
+            )
+            annotations[f'{relation}_count'] = Coalesce(Subquery(counts), 0)
+        return self.get_queryset().annotate(**annotations)
 
 
 class User(AbstractUser):
@@ -155,6 +176,8 @@ class User(AbstractUser):
     
     def generate_mfa_secret(self):
         """Generate a new TOTP secret for MFA"""
+        import pyotp  # Imported on first use; only MFA flows need it
+
         if not self.mfa_secret:
             self.mfa_secret = pyotp.random_base32()
             self.save(update_fields=['mfa_secret'])
@@ -162,6 +185,8 @@ class User(AbstractUser):
     
     def get_totp_uri(self):
         """Get TOTP URI for QR code generation"""
+        import pyotp
+
         if not self.mfa_secret:
             self.generate_mfa_secret()
         return pyotp.totp.TOTP(self.mfa_secret).provisioning_uri(
@@ -173,6 +198,8 @@ class User(AbstractUser):
         """Verify TOTP token"""
         if not self.mfa_secret:
             return False
+        import pyotp
+
         totp = pyotp.TOTP(self.mfa_secret)
         return totp.verify(token, valid_window=1)
     
@@ -220,7 +247,8 @@ class UserActivity(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='activities'
+        related_name='activities',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     action = models.CharField(max_length=100, help_text="Action performed")
     ip_address = models.GenericIPAddressField(blank=True, null=True)
@@ -257,7 +285,8 @@ class SocialLink(models.Model):
     user = models.ForeignKey(
         'User',
         on_delete=models.CASCADE,
-        related_name='social_links'
+        related_name='social_links',
+        db_index=False,  # Leads the unique_together index
     )
     platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
     url = models.URLField()
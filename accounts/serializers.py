@@ -1,10 +1,7 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User, UserActivity, UserRole
-import qrcode
-import io
-import base64
+from portfolio_api.hashing import gated_authenticate, hashing_slot
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -37,14 +34,15 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=validated_data['first_name'],
-            last_name=validated_data['last_name'],
-            phone=validated_data.get('phone'),
-            role=UserRole.VIEWER  # Default role
-        )
+        with hashing_slot():
+            user = User.objects.create_user(
+                email=validated_data['email'],
+                password=validated_data['password'],
+                first_name=validated_data['first_name'],
+                last_name=validated_data['last_name'],
+                phone=validated_data.get('phone'),
+                role=UserRole.VIEWER  # Default role
+            )
         return user
 
 
@@ -68,10 +66,10 @@ class LoginSerializer(serializers.Serializer):
         mfa_token = attrs.get('mfa_token', '')
         
         if email and password:
-            user = authenticate(
-                request=self.context.get('request'),
-                username=email,
-                password=password
+            user = gated_authenticate(
+                self.context.get('request'),
+                email,
+                password
             )
             
             if not user:
@@ -150,6 +148,18 @@ class UserSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'email', 'role', 'is_verified', 'created_at', 'updated_at']
+        # What method fields and properties read (see portfolio_api.sparse_fields);
+        # the counts come from annotations or a COUNT query on the relation
+        field_sources = {
+            'full_name': ['first_name', 'last_name'],
+            'profile_picture_url': ['profile_picture'],
+            'cover_image_url': ['cover_image'],
+            'projects_count': [],
+            'experiences_count': [],
+            'education_count': [],
+            'skills_count': [],
+            'certifications_count': [],
+        }
     
     def get_profile_picture_url(self, obj):
         if obj.profile_picture:
@@ -165,20 +175,58 @@ class UserSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.cover_image.url)
         return None
     
+    def _content_count(self, obj, relation):
+        # Use the figure annotated by User.objects.with_content_counts() if present
+        annotated = getattr(obj, f'{relation}_count', None)
+        if annotated is not None:
+            return annotated
+        return getattr(obj, relation).count()
+    
     def get_projects_count(self, obj):
-        return obj.projects.count()
+        return self._content_count(obj, 'projects')
     
     def get_experiences_count(self, obj):
-        return obj.experiences.count()
+        return self._content_count(obj, 'experiences')
     
     def get_education_count(self, obj):
-        return obj.education.count()
+        return self._content_count(obj, 'education')
     
     def get_skills_count(self, obj):
-        return obj.skills.count()
+        return self._content_count(obj, 'skills')
     
     def get_certifications_count(self, obj):
-        return obj.certifications.count()
+        return self._content_count(obj, 'certifications')
+
+
+class PublicProfileSerializer(serializers.ModelSerializer):
+    """Serializer for the public portfolio profile (no contact or account data)"""
+    full_name = serializers.CharField(read_only=True)
+    profile_picture_url = serializers.SerializerMethodField()
+    cover_image_url = serializers.SerializerMethodField()
+    social_links = SocialLinkSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = User
+        fields = [
+            'id', 'first_name', 'last_name', 'full_name',
+            'headline', 'summary', 'city', 'state', 'country',
+            'profile_picture_url', 'cover_image_url', 'social_links'
+        ]
+        read_only_fields = fields
+    
+    def get_profile_picture_url(self, obj):
+        if obj.profile_picture:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.profile_picture.url)
+        return None
+    
+    def get_cover_image_url(self, obj):
+        if obj.cover_image:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.cover_image.url)
+        return None
 
 
 class UserListSerializer(serializers.ModelSerializer):
@@ -192,6 +240,7 @@ class UserListSerializer(serializers.ModelSerializer):
             'is_verified', 'is_active', 'mfa_enabled',
             'last_login', 'created_at'
         ]
+        field_sources = {'full_name': ['first_name', 'last_name']}
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
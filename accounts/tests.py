@@ -1,3 +1,23 @@
-from django.test import TestCase
+from portfolio_api.testing import PortfolioTestCase
 
-# Create your tests here.
+from .models import UserActivity
+
+
+class AccountQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over its view's query_budget"""
+
+    def test_user_list(self):
+        self.get_ok('/api/auth/users/', user=self.admin)
+        self.get_ok('/api/auth/users/', {'role': 'editor', 'search': 'bench'}, user=self.admin)
+
+    def test_user_retrieve(self):
+        self.get_ok(f'/api/auth/users/{self.owner.pk}/', user=self.admin)
+
+    def test_activity(self):
+        UserActivity.objects.bulk_create([
+            UserActivity(user=user, action='LOGIN', ip_address='127.0.0.1')
+            for user in (self.admin, self.owner)
+            for _ in range(3)
+        ])
+        self.get_ok('/api/auth/activity/', user=self.admin)
+        self.get_ok('/api/auth/activity/', user=self.owner)
@@ -8,9 +8,6 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
-import qrcode
-import io
-import base64
 
 from .models import User, UserActivity, UserRole, SocialLink
 from .serializers import (
@@ -20,6 +17,8 @@ from .serializers import (
     PasswordChangeSerializer, UserActivitySerializer, SocialLinkSerializer
 )
 from portfolio_api.permissions import IsSuperAdmin
+from portfolio_api.hashing import gated_check_password, hashing_slot
+from portfolio_api.sparse_fields import SparseFieldsMixin
 
 User = get_user_model()
 
@@ -35,9 +34,27 @@ def log_user_activity(user, action, request, details=None):
     )
 
 
+def qr_code_data_uri(data):
+    """PNG QR code for ``data`` as a data: URI"""
+    # qrcode pulls in Pillow; only MFA setup needs them, so workers don't import them at boot
+    import base64
+    import io
+
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return f'data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}'
+
+
 class AuthThrottle(AnonRateThrottle):
-    """Custom throttle for auth endpoints"""
-    rate = '10/hour'
+    """Custom throttle for auth endpoints (rate from DEFAULT_THROTTLE_RATES['auth'])"""
+    scope = 'auth'
 
 
 @method_decorator(ratelimit(key='ip', rate='10/h', method='POST'), name='dispatch')
@@ -118,10 +135,12 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return response
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for user management (admin only)"""
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated, IsSuperAdmin]
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = {'list': 4, 'retrieve': 4}
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -129,7 +148,10 @@ class UserViewSet(viewsets.ModelViewSet):
         return UserSerializer
     
     def get_queryset(self):
-        queryset = User.objects.all()
+        if self.action == 'list':
+            queryset = User.objects.all()
+        else:
+            queryset = User.objects.with_content_counts().prefetch_related('social_links')
         
         role = self.request.query_params.get('role')
         if role:
@@ -223,20 +245,13 @@ class MFASetupView(generics.GenericAPIView):
         backup_codes = user.generate_backup_codes()
         
         totp_uri = user.get_totp_uri()
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(totp_uri)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        qr_code_base64 = base64.b64encode(buffer.getvalue()).decode()
+        qr_code = qr_code_data_uri(totp_uri)
         
         log_user_activity(user, 'MFA_SETUP_INITIATED', request)
         
         return Response({
             'secret': secret,
-            'qr_code': f'data:image/png;base64,{qr_code_base64}',
+            'qr_code': qr_code,
             'backup_codes': backup_codes,
             'message': 'Scan the QR code with your authenticator app and verify with a token'
         })
@@ -281,7 +296,7 @@ class MFADisableView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        if not user.check_password(serializer.validated_data['password']):
+        if not gated_check_password(request, user, serializer.validated_data['password']):
             return Response(
                 {'error': 'Invalid password'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -307,13 +322,14 @@ class PasswordChangeView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        if not user.check_password(serializer.validated_data['old_password']):
+        if not gated_check_password(request, user, serializer.validated_data['old_password']):
             return Response(
                 {'error': 'Invalid old password'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        user.set_password(serializer.validated_data['new_password'])
+        with hashing_slot():
+            user.set_password(serializer.validated_data['new_password'])
         user.save()
         
         log_user_activity(user, 'PASSWORD_CHANGED', request)
@@ -325,6 +341,8 @@ class UserActivityListView(generics.ListAPIView):
     """List user activities"""
     serializer_class = UserActivitySerializer
     permission_classes = [IsAuthenticated]
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = 4
     
     def get_queryset(self):
         user = self.request.user
@@ -341,10 +359,10 @@ class UserActivityListView(generics.ListAPIView):
         else:
             queryset = UserActivity.objects.filter(user=user)
         
-        return queryset
+        return queryset.select_related('user')
 
 
-class SocialLinkViewSet(viewsets.ModelViewSet):
+class SocialLinkViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """Manage user social links"""
     serializer_class = SocialLinkSerializer
     permission_classes = [IsAuthenticated]
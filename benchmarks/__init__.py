@@ -0,0 +1,7 @@
+"""
+Local benchmarks for the Portfolio API
+
+Every benchmark builds its own throwaway SQLite database and seeds it with a
+deterministic dataset, so runs are reproducible and never touch the
+development or production databases.
+"""
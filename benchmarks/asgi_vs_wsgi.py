@@ -0,0 +1,68 @@
+"""
+Compare concurrent-connection throughput of the sync and ASGI deployments
+
+    python -m benchmarks.asgi_vs_wsgi --workers 2 --concurrency 1,16,64,256
+
+Boots gunicorn once with gunicorn_config.py (sync workers, DRF endpoint) and
+once with gunicorn_asgi_config.py (uvicorn workers, async endpoint) on the
+same seeded database, then drives each with increasing numbers of concurrent
+connections. ``--client-delay`` simulates slow clients that trickle their
+request headers. Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+
+from benchmarks.dataset import seed_portfolio
+from benchmarks.harness import GunicornServer, bench_environment, git_revision, setup_database
+from benchmarks.loadgen import run_load
+
+MODES = [
+    ('wsgi', 'gunicorn_config.py', 'portfolio_api.wsgi:application', '/api/projects/'),
+    ('asgi', 'gunicorn_asgi_config.py', 'portfolio_api.asgi:application', '/api/async/projects/'),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', default='1,16,64,256',
+                        help='Comma separated connection counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--client-delay', type=float, default=0.0,
+                        help='Seconds each client waits between request line and headers')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    with tempfile.TemporaryDirectory(prefix='portfolio-bench-') as workdir:
+        env = bench_environment(workdir)
+        setup_database(env, seed_portfolio)
+
+        results = {'commit': git_revision(), 'workers': args.workers, 'client_delay': args.client_delay, 'modes': {}}
+        for name, config, app, path in MODES:
+            with GunicornServer(env, workdir, config=config, app=app, workers=args.workers) as server:
+                results['modes'][name] = {
+                    'path': path,
+                    'levels': {
+                        str(level): asyncio.run(run_load(
+                            server.base_url + path, level, args.duration, args.client_delay
+                        ))
+                        for level in levels
+                    },
+                }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Measure worker cold start: boot time, imported modules and memory per worker
+
+    python -m benchmarks.cold_start --repeat 5 --workers 4
+
+Two measurements on a seeded throwaway database:
+
+* ``boot``: ``--repeat`` fresh interpreters each set Django up, load the
+  WSGI application and the URLconf, as a gunicorn worker does before its
+  first request. Reports the median wall time, the modules imported and
+  the resident memory of the process.
+* ``gunicorn``: the sync deployment started with ``GUNICORN_PRELOAD`` off
+  and on. Reports the time until the first response, then drives a few
+  public endpoints on every worker and reads each worker's RSS, PSS and
+  private (unshared) memory from ``/proc/<pid>/smaps_rollup``. PSS and
+  private memory show what forking from a warmed, frozen master shares.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from benchmarks.dataset import seed_portfolio
+from benchmarks.harness import REPO_ROOT, GunicornServer, bench_environment, git_revision, setup_database
+
+BOOT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+with open('/proc/self/status') as fh:
+    rss = next(int(line.split()[1]) for line in fh if line.startswith('VmRSS:'))
+print(json.dumps({'seconds': elapsed, 'modules': len(sys.modules), 'rss_kb': rss,
+                  'loaded': sorted(name for name in ('qrcode', 'PIL', 'pyotp', 'yaml', 'drf_spectacular.openapi')
+                                   if name in sys.modules)}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Interpreters to boot for the boot timing')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200, help='Warm-up requests before reading memory')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    return parser.parse_args()
+
+
+def measure_boot(env, repeat):
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, '-c', BOOT_SCRIPT], env=env, cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(completed.stdout))
+    return {
+        'median_ms': round(statistics.median(run['seconds'] for run in runs) * 1000, 1),
+        'min_ms': round(min(run['seconds'] for run in runs) * 1000, 1),
+        'modules': runs[-1]['modules'],
+        'rss_mb': round(statistics.median(run['rss_kb'] for run in runs) / 1024, 1),
+        'heavy_modules_loaded': runs[-1]['loaded'],
+    }
+
+
+def worker_pids(master_pid):
+    children = Path(f'/proc/{master_pid}/task/{master_pid}/children').read_text().split()
+    return [int(pid) for pid in children]
+
+
+def memory_kb(pid):
+    """RSS, PSS and private memory of ``pid`` in kB"""
+    fields = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()[1:]:
+        name, value = line.split(':', 1)
+        fields[name] = int(value.split()[0])
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def measure_gunicorn(env, workdir, workers, requests, paths):
+    server = GunicornServer(env, workdir, workers=workers)
+    started = time.perf_counter()
+    with server:
+        first_response = time.perf_counter() - started
+        for number in range(requests):
+            path = paths[number % len(paths)]
+            urllib.request.urlopen(server.base_url + path, timeout=10).read()
+        pids = worker_pids(server.process.pid)
+        per_worker = [memory_kb(pid) for pid in pids]
+        master = memory_kb(server.process.pid)
+
+    def mean_mb(key):
+        return round(statistics.mean(item[key] for item in per_worker) / 1024, 1)
+
+    return {
+        'first_response_ms': round(first_response * 1000, 1),
+        'workers': len(per_worker),
+        'worker_rss_mb': mean_mb('rss'),
+        'worker_pss_mb': mean_mb('pss'),
+        'worker_private_mb': mean_mb('private'),
+        'master_rss_mb': round(master['rss'] / 1024, 1),
+        'total_pss_mb': round((sum(item['pss'] for item in per_worker) + master['pss']) / 1024, 1),
+    }
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='portfolio-bench-') as workdir:
+        env = bench_environment(workdir)
+        ids = setup_database(env, seed_portfolio)
+        user_id = ids['user_ids'][0]
+        paths = [
+            '/api/projects/',
+            f'/api/projects/{ids["project_ids"][0]}/',
+            f'/api/experiences/?user={user_id}',
+            '/api/skills/',
+            '/api/certifications/',
+        ]
+
+        results = {
+            'commit': git_revision(),
+            'boot': measure_boot(env, args.repeat),
+            'gunicorn': {},
+        }
+        for mode, preload in (('fork', 'false'), ('preload', 'true')):
+            mode_env = {**env, 'GUNICORN_PRELOAD': preload}
+            results['gunicorn'][mode] = measure_gunicorn(
+                mode_env, workdir, args.workers, args.requests, paths
+            )
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Deterministic benchmark dataset
+
+The same seed always produces the same users, portfolio sections and inbox,
+so numbers from different commits are comparable.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+
+BENCH_PASSWORD = 'bench-Passw0rd!'
+ADMIN_EMAIL = 'bench-admin@example.com'
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _date(rng, start_year=2012):
+    return date(start_year, 1, 1) + timedelta(days=rng.randrange(365 * 12))
+
+
+def seed_portfolio(users=5, projects=20, experiences=6, education=3, skills=15,
+                   certifications=5, messages=200, seed=42):
+    """
+    Create ``users`` public portfolios plus one super admin with an inbox
+
+    Counts other than ``users`` and ``messages`` are per user. Returns the ids
+    the benchmarks need to build request paths.
+    """
+    from accounts.models import User, UserRole
+    from certifications.models import Certification
+    from contacts.models import ContactMessage, MessageReply, MessageType, MessageStatus
+    from education.models import Education
+    from experiences.models import Experience
+    from projects.models import Project
+    from skills.models import Skill
+
+    rng = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+
+    admin = User(
+        id=_uuid(rng), email=ADMIN_EMAIL, password=password,
+        first_name='Bench', last_name='Admin', role=UserRole.SUPER_ADMIN,
+        is_verified=True, is_staff=True
+    )
+    owners = [
+        User(
+            id=_uuid(rng), email=f'bench-user-{i}@example.com', password=password,
+            first_name='Bench', last_name=f'User {i}', role=UserRole.EDITOR,
+            is_verified=True, headline=f'Engineer #{i}', summary='Benchmark portfolio'
+        )
+        for i in range(users)
+    ]
+    User.objects.bulk_create([admin] + owners)
+
+    technologies = ['Python', 'Django', 'PostgreSQL', 'React', 'Docker', 'Redis', 'AWS', 'TypeScript']
+    project_rows, experience_rows, education_rows, skill_rows, cert_rows = [], [], [], [], []
+    for owner in owners:
+        for i in range(projects):
+            start = _date(rng)
+            current = rng.random() < 0.2
+            project_rows.append(Project(
+                id=_uuid(rng), user=owner, title=f'Project {i}',
+                description='Short description ' * 4,
+                long_description='Long description ' * 40,
+                technologies=rng.sample(technologies, 4), role='Lead developer',
+                team_size=rng.randint(1, 8), start_date=start,
+                end_date=None if current else start + timedelta(days=rng.randint(30, 900)),
+                current=current, highlights=['Fast', 'Tested', 'Documented'],
+                challenges='Challenges ' * 20, outcomes='Outcomes ' * 20,
+                featured=i < 3, order=i
+            ))
+        for i in range(experiences):
+            start = _date(rng)
+            experience_rows.append(Experience(
+                id=_uuid(rng), user=owner, title='Software Engineer', company=f'Company {i}',
+                location='Accra', location_type=rng.choice(['on_site', 'remote', 'hybrid']),
+                start_date=start, end_date=start + timedelta(days=rng.randint(90, 1500)),
+                description='Built things ' * 20, responsibilities=['Design', 'Build'],
+                achievements=['Shipped'], technologies=rng.sample(technologies, 3), order=i
+            ))
+        for i in range(education):
+            start = _date(rng, 2005)
+            education_rows.append(Education(
+                id=_uuid(rng), user=owner, institution=f'University {i}', degree='BSc',
+                field_of_study='Computer Science', start_date=start,
+                end_date=start + timedelta(days=365 * 4), order=i
+            ))
+        for i in range(skills):
+            skill_rows.append(Skill(
+                id=_uuid(rng), user=owner, name=f'Skill {i}',
+                category=rng.choice(Skill.CATEGORY_CHOICES)[0],
+                proficiency_level=rng.choice(Skill.PROFICIENCY_CHOICES)[0],
+                years_of_experience=rng.randint(0, 15), order=i
+            ))
+        for i in range(certifications):
+            issued = _date(rng)
+            cert_rows.append(Certification(
+                id=_uuid(rng), user=owner, name=f'Certification {i}', issuer='Issuer',
+                issue_date=issued, expiration_date=issued + timedelta(days=365 * 3),
+                credential_id=f'CRED-{i}', skills=rng.sample(technologies, 2), order=i
+            ))
+
+    Project.objects.bulk_create(project_rows)
+    Experience.objects.bulk_create(experience_rows)
+    Education.objects.bulk_create(education_rows)
+    Skill.objects.bulk_create(skill_rows)
+    Certification.objects.bulk_create(cert_rows)
+
+    message_rows = [
+        ContactMessage(
+            id=_uuid(rng), sender_name=f'Visitor {i}', sender_email=f'visitor-{i}@example.com',
+            message_type=rng.choice(MessageType.values), subject=f'Hello #{i}',
+            message='I would like to talk about a project. ' * 5,
+            status=rng.choice(MessageStatus.values), priority=rng.random() < 0.1,
+            project_budget=1000, ip_address='127.0.0.1'
+        )
+        for i in range(messages)
+    ]
+    ContactMessage.objects.bulk_create(message_rows)
+    MessageReply.objects.bulk_create([
+        MessageReply(id=_uuid(rng), message=message, author=admin, content='Thanks, replying soon.',
+                     is_internal=rng.random() < 0.3)
+        for message in message_rows[::2]
+    ])
+
+    return {
+        'admin_email': ADMIN_EMAIL,
+        'password': BENCH_PASSWORD,
+        'user_ids': [str(owner.id) for owner in owners],
+        'user_emails': [owner.email for owner in owners],
+        'project_ids': [str(project.id) for project in project_rows],
+        'message_ids': [str(message.id) for message in message_rows],
+    }
@@ -0,0 +1,139 @@
+"""
+Shared plumbing for the benchmarks: a throwaway database and gunicorn processes
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def bench_environment(workdir, **overrides):
+    """Environment for the benchmark process and the servers it starts"""
+    env = dict(os.environ)
+    env.update({
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.settings',
+        'PYTHONPATH': str(REPO_ROOT),
+        'SECRET_KEY': 'benchmark-secret-key-not-for-production',
+        'DEBUG': 'False',
+        'ALLOWED_HOSTS': '127.0.0.1,localhost',
+        'DB_ENGINE': 'django.db.backends.sqlite3',
+        'DB_NAME': str(Path(workdir) / 'bench.sqlite3'),
+        'MEDIA_ROOT': str(Path(workdir) / 'media'),
+        'RATELIMIT_ENABLE': 'False',
+    })
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def setup_database(env, seed_func=None, **seed_kwargs):
+    """Configure Django in this process, migrate the throwaway DB and seed it"""
+    os.environ.update(env)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0, interactive=False)
+    if seed_func is None:
+        return None
+    return seed_func(**seed_kwargs)
+
+
+def git_revision():
+    """Commit of the working tree, suffixed with ``-dirty`` if it has local changes"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        changes = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if changes else commit
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class GunicornServer:
+    """
+    Run the project under gunicorn for the duration of a ``with`` block
+
+    Logging and pid paths from the deployment config are redirected into the
+    working directory so the benchmark runs without /var/www.
+    """
+
+    def __init__(self, env, workdir, config='gunicorn_config.py',
+                 app='portfolio_api.wsgi:application', workers=2, extra_args=()):
+        self.env = env
+        self.workdir = Path(workdir)
+        self.config = config
+        self.app = app
+        self.workers = workers
+        self.extra_args = list(extra_args)
+        self.port = free_port()
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def command(self):
+        return [
+            sys.executable, '-m', 'gunicorn',
+            '--config', str(REPO_ROOT / self.config),
+            '--chdir', str(REPO_ROOT),
+            '--bind', f'127.0.0.1:{self.port}',
+            '--workers', str(self.workers),
+            '--access-logfile', os.devnull,
+            '--error-logfile', str(self.workdir / 'gunicorn_error.log'),
+            '--pid', str(self.workdir / f'gunicorn-{self.port}.pid'),
+            *self.extra_args,
+            self.app,
+        ]
+
+    def start(self, timeout=30):
+        self.process = subprocess.Popen(self.command(), env=self.env, cwd=REPO_ROOT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f'gunicorn exited with {self.process.returncode}; '
+                    f'see {self.workdir / "gunicorn_error.log"}'
+                )
+            try:
+                urllib.request.urlopen(f'{self.base_url}/', timeout=1).read()
+                return self
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f'gunicorn did not become ready within {timeout}s')
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,131 @@
+"""
+Minimal asyncio HTTP/1.1 load generator
+
+Dependency-free on purpose: one connection per request (sync gunicorn
+workers do not keep connections alive), optional slow-client delay between
+the request line and the rest of the headers.
+"""
+import asyncio
+import math
+import random
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles (ms) and throughput for one endpoint or run"""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'rps': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': _ms(percentile(ordered, 50)),
+        'p95_ms': _ms(percentile(ordered, 95)),
+        'p99_ms': _ms(percentile(ordered, 99)),
+        'max_ms': _ms(ordered[-1] if ordered else None),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+async def fetch(url, method='GET', body=b'', headers=None, client_delay=0.0, timeout=30):
+    """Send one request and return (status, response body)"""
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port), timeout
+    )
+    try:
+        lines = [f'Host: {parts.netloc}', 'Connection: close', f'Content-Length: {len(body)}']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        writer.write(f'{method} {path} HTTP/1.1\r\n'.encode())
+        if client_delay:
+            await writer.drain()
+            await asyncio.sleep(client_delay)
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, payload = raw.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1]) if head else 0
+    return status, payload
+
+
+async def run_load(url, concurrency, duration, client_delay=0.0):
+    """Hammer one URL from ``concurrency`` connections for ``duration`` seconds"""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status, _ = await fetch(url, client_delay=client_delay)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                errors += 1
+                continue
+            if status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.monotonic() - started)
+
+
+async def run_mix(base_url, scenarios, concurrency, duration, seed=0):
+    """
+    Drive a weighted mix of requests from ``concurrency`` connections
+
+    ``scenarios`` maps a name to ``(weight, build)``, where ``build(rng)``
+    returns ``(method, path, body, headers)``. Each connection draws from its
+    own seeded generator, so the sequence of requests is reproducible.
+    Returns a summary per scenario plus a ``total``.
+    """
+    names = [name for name, (weight, _) in scenarios.items() if weight > 0]
+    weights = [scenarios[name][0] for name in names]
+    latencies = {name: [] for name in names}
+    errors = dict.fromkeys(names, 0)
+    deadline = time.monotonic() + duration
+
+    async def worker(index):
+        rng = random.Random(f'{seed}:{index}')
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body, headers = scenarios[name][1](rng)
+            started = time.perf_counter()
+            try:
+                status, _ = await fetch(base_url + path, method, body, headers)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                errors[name] += 1
+                continue
+            if status >= 400:
+                errors[name] += 1
+            else:
+                latencies[name].append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    results = {name: summarize(latencies[name], errors[name], elapsed) for name in names}
+    results['total'] = summarize(
+        [latency for values in latencies.values() for latency in values],
+        sum(errors.values()),
+        elapsed,
+    )
+    return results
@@ -0,0 +1,174 @@
+"""
+Load test the API with a realistic mix of traffic
+
+    python -m benchmarks.loadtest --workers 4 --concurrency 32 --duration 30
+
+Seeds a throwaway database, boots the project under gunicorn (sync workers
+from gunicorn_config.py unless ``--config`` says otherwise) and drives a
+weighted mix of public portfolio reads, logins, contact form submissions and
+admin inbox usage. Prints p50/p95/p99 latency and requests/second per
+endpoint as JSON, tagged with the git commit so runs can be compared across
+commits.
+
+``--mix`` picks one of the presets in ``MIXES``: ``realistic`` (mostly
+visitors, some admin work), ``public`` (anonymous reads only) or ``inbox``
+(an admin working through messages while the contact form receives traffic).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import tempfile
+import time
+
+from benchmarks.dataset import seed_portfolio
+from benchmarks.harness import GunicornServer, bench_environment, git_revision, setup_database
+from benchmarks.loadgen import run_mix
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+MIXES = {
+    'realistic': {
+        'GET /api/projects/': 20,
+        'GET /api/projects/{id}/': 15,
+        'GET /api/projects/featured/': 10,
+        'GET /api/projects/by_user/{user_id}/': 10,
+        'GET /api/experiences/by_user/{user_id}/': 5,
+        'GET /api/education/by_user/{user_id}/': 3,
+        'GET /api/skills/by_category/?user={user_id}': 5,
+        'GET /api/certifications/by_user/{user_id}/': 3,
+        'POST /api/auth/login/': 2,
+        'POST /api/contacts/submit/': 5,
+        'GET /api/contacts/messages/': 5,
+        'GET /api/contacts/messages/{id}/': 4,
+        'GET /api/contacts/messages/statistics/': 2,
+    },
+    'public': {
+        'GET /api/projects/': 30,
+        'GET /api/projects/{id}/': 25,
+        'GET /api/projects/featured/': 15,
+        'GET /api/projects/by_user/{user_id}/': 15,
+        'GET /api/experiences/by_user/{user_id}/': 5,
+        'GET /api/education/by_user/{user_id}/': 3,
+        'GET /api/skills/by_category/?user={user_id}': 4,
+        'GET /api/certifications/by_user/{user_id}/': 3,
+    },
+    'inbox': {
+        'POST /api/contacts/submit/': 20,
+        'GET /api/contacts/messages/': 35,
+        'GET /api/contacts/messages/{id}/': 35,
+        'GET /api/contacts/messages/statistics/': 10,
+    },
+}
+
+
+def build_scenarios(data, admin_token):
+    """Request builders for every endpoint named in ``MIXES``"""
+    admin_headers = {'Authorization': f'Bearer {admin_token}'}
+
+    def get(path_template, ids=None, headers=None):
+        def build(rng):
+            values = {key: rng.choice(options) for key, options in (ids or {}).items()}
+            return 'GET', path_template.format(**values), b'', headers
+        return build
+
+    def login(rng):
+        body = {'email': rng.choice(data['user_emails']), 'password': data['password']}
+        return 'POST', '/api/auth/login/', json.dumps(body).encode(), JSON_HEADERS
+
+    def submit_contact(rng):
+        number = rng.randrange(10 ** 9)
+        body = {
+            'sender_name': f'Load test {number}',
+            'sender_email': f'load-{number}@example.com',
+            'message_type': 'general',
+            'subject': f'Load test message {number}',
+            'message': 'Hello, I found your portfolio and would like to talk. ' * 3,
+        }
+        return 'POST', '/api/contacts/submit/', json.dumps(body).encode(), JSON_HEADERS
+
+    users = {'user_id': data['user_ids']}
+    return {
+        'GET /api/projects/': get('/api/projects/'),
+        'GET /api/projects/{id}/': get('/api/projects/{id}/', {'id': data['project_ids']}),
+        'GET /api/projects/featured/': get('/api/projects/featured/'),
+        'GET /api/projects/by_user/{user_id}/': get('/api/projects/by_user/{user_id}/', users),
+        'GET /api/experiences/by_user/{user_id}/': get('/api/experiences/by_user/{user_id}/', users),
+        'GET /api/education/by_user/{user_id}/': get('/api/education/by_user/{user_id}/', users),
+        'GET /api/skills/by_category/?user={user_id}': get('/api/skills/by_category/?user={user_id}', users),
+        'GET /api/certifications/by_user/{user_id}/': get('/api/certifications/by_user/{user_id}/', users),
+        'POST /api/auth/login/': login,
+        'POST /api/contacts/submit/': submit_contact,
+        'GET /api/contacts/messages/': get('/api/contacts/messages/', headers=admin_headers),
+        'GET /api/contacts/messages/{id}/': get(
+            '/api/contacts/messages/{id}/', {'id': data['message_ids']}, admin_headers
+        ),
+        'GET /api/contacts/messages/statistics/': get(
+            '/api/contacts/messages/statistics/', headers=admin_headers
+        ),
+    }
+
+
+def admin_access_token(email):
+    """Mint a JWT for the seeded admin in-process instead of spending a login on it"""
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from accounts.models import User
+
+    return str(RefreshToken.for_user(User.objects.get(email=email)).access_token)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mix', choices=sorted(MIXES), default='realistic')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--config', default='gunicorn_config.py', help='gunicorn config file to boot with')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds before the run')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the dataset and request sequence')
+    parser.add_argument('--users', type=int, default=5, help='Seeded portfolio owners')
+    parser.add_argument('--messages', type=int, default=200, help='Seeded inbox messages')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='portfolio-bench-') as workdir:
+        env = bench_environment(workdir)
+        data = setup_database(env, seed_portfolio, users=args.users, messages=args.messages, seed=args.seed)
+        catalogue = build_scenarios(data, admin_access_token(data['admin_email']))
+        scenarios = {name: (weight, catalogue[name]) for name, weight in MIXES[args.mix].items()}
+
+        with GunicornServer(env, workdir, config=args.config, workers=args.workers) as server:
+            if args.warmup:
+                asyncio.run(run_mix(server.base_url, scenarios, args.concurrency, args.warmup, args.seed))
+            started = time.time()
+            endpoints = asyncio.run(
+                run_mix(server.base_url, scenarios, args.concurrency, args.duration, args.seed)
+            )
+
+    results = {
+        'commit': git_revision(),
+        'started_at': round(started),
+        'python': platform.python_version(),
+        'mix': args.mix,
+        'config': args.config,
+        'workers': args.workers,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'dataset': {'users': args.users, 'messages': args.messages, 'seed': args.seed},
+        'weights': MIXES[args.mix],
+        'endpoints': endpoints,
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
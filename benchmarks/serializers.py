@@ -0,0 +1,134 @@
+"""
+Compare DRF list serializers with the compiled fast path
+
+    python -m benchmarks.serializers --rows 1000 --repeat 20
+
+Seeds ``--rows`` projects, experiences, education entries, skills and
+certifications into a throwaway database, then times building each list
+response both ways: model instances through the DRF serializer, and
+``.values()`` rows through ``portfolio_api.fast_serializers``. The query
+is included in both timings. Rendered JSON is compared first, so a run
+fails if the two paths ever disagree.
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+
+from benchmarks.dataset import seed_portfolio
+from benchmarks.harness import bench_environment, git_revision, setup_database
+
+
+def list_serializers():
+    from certifications.serializers import CertificationListSerializer
+    from education.serializers import EducationListSerializer
+    from experiences.serializers import ExperienceListSerializer
+    from projects.serializers import ProjectListSerializer
+    from skills.serializers import SkillListSerializer
+
+    return [
+        (ProjectListSerializer, 'images'),
+        (ExperienceListSerializer, None),
+        (EducationListSerializer, None),
+        (SkillListSerializer, None),
+        (CertificationListSerializer, None),
+    ]
+
+
+def add_project_images():
+    """One image per project, so thumbnails are built on both paths"""
+    from projects.models import Project, ProjectImage
+
+    ProjectImage.objects.bulk_create(
+        ProjectImage(project_id=project_id, image=f'projects/{project_id}.png', order=0)
+        for project_id in Project.objects.values_list('id', flat=True)
+    )
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def compare(serializer_class, prefetch, request, repeat):
+    from rest_framework.renderers import JSONRenderer
+
+    from portfolio_api.fast_serializers import compile_serializer
+
+    model = serializer_class.Meta.model
+    queryset = model.objects.order_by('pk')
+    if prefetch:
+        queryset = queryset.prefetch_related(prefetch)
+    context = {'request': request}
+    compiled = compile_serializer(serializer_class)
+
+    def drf():
+        return serializer_class(queryset.all(), many=True, context=context).data
+
+    def fast():
+        return compiled.serialize(compiled.values(queryset.all()), context)
+
+    renderer = JSONRenderer()
+    drf_json, fast_json = renderer.render(drf()), renderer.render(fast())
+    if drf_json != fast_json:
+        raise SystemExit(f'{serializer_class.__name__}: fast path output differs from DRF')
+
+    drf_seconds = best_of(repeat, drf)
+    fast_seconds = best_of(repeat, fast)
+    return {
+        'rows': queryset.count(),
+        'bytes': len(drf_json),
+        'drf_ms': round(drf_seconds * 1000, 2),
+        'fast_ms': round(fast_seconds * 1000, 2),
+        'speedup': round(drf_seconds / fast_seconds, 2),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='Rows per model')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per path (best is reported)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='portfolio-bench-') as workdir:
+        setup_database(
+            bench_environment(workdir), seed_portfolio, users=1, projects=args.rows, experiences=args.rows,
+            education=args.rows, skills=args.rows, certifications=args.rows, messages=0, seed=args.seed,
+        )
+        add_project_images()
+
+        from rest_framework.test import APIRequestFactory
+
+        request = APIRequestFactory().get('/api/projects/', HTTP_HOST='127.0.0.1')
+        serializers = {
+            serializer_class.__name__: compare(serializer_class, prefetch, request, args.repeat)
+            for serializer_class, prefetch in list_serializers()
+        }
+
+    results = {
+        'commit': git_revision(),
+        'python': platform.python_version(),
+        'rows': args.rows,
+        'repeat': args.repeat,
+        'serializers': serializers,
+    }
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
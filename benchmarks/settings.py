@@ -0,0 +1,19 @@
+"""
+Settings for benchmark runs
+
+Production-like settings with request throttling switched off, otherwise the
+anonymous and auth rate limits would cap every run after a few requests.
+"""
+from portfolio_api.settings import *  # noqa: F401,F403
+from portfolio_api.settings import REST_FRAMEWORK
+
+DEBUG = False
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_RATES": {
+        scope: None for scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+    },
+}
+
+RATELIMIT_ENABLE = False
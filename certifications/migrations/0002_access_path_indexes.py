@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('certifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='certification',
+            index=models.Index(fields=['user', '-issue_date', 'order'], name='certificati_user_id_d60f1e_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='certification',
+            index=models.Index(fields=['-issue_date', 'order'], name='certificati_issue_d_d35990_idx'),
+        ),
+    ]
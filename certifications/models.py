@@ -12,7 +12,8 @@ class Certification(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='certifications'
+        related_name='certifications',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     name = models.CharField(max_length=200, help_text="Certification name")
     issuer = models.CharField(max_length=200, help_text="Issuing organization")
@@ -48,6 +49,10 @@ class Certification(models.Model):
         ordering = ['-issue_date', 'order']
         verbose_name = 'Certification'
         verbose_name_plural = 'Certifications'
+        indexes = [
+            models.Index(fields=['user', '-issue_date', 'order']),
+            models.Index(fields=['-issue_date', 'order']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.issuer}"
@@ -15,6 +15,11 @@ class CertificationListSerializer(serializers.ModelSerializer):
             'skills', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        # What method fields and properties read (see portfolio_api.sparse_fields)
+        field_sources = {
+            'issuer_display': ['issuer', 'credential_id'],
+            'is_active': ['expiration_date'],
+        }
     
     def get_issuer_display(self, obj):
         """Format issuer display"""
@@ -38,6 +43,11 @@ class CertificationDetailSerializer(serializers.ModelSerializer):
             'skills', 'order', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'owner_name', 'owner_email']
+        field_sources = {
+            'owner_name': ['user'],
+            'owner_email': ['user'],
+            'is_active': ['expiration_date'],
+        }
     
     def get_owner_name(self, obj):
         """Get certification owner name"""
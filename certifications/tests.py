@@ -1,3 +1,38 @@
-from django.test import TestCase
+from portfolio_api.testing import FastListParityMixin, PortfolioTestCase
 
-# Create your tests here.
+from .models import Certification
+
+
+class CertificationQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over CertificationViewSet.query_budget"""
+
+    def test_list(self):
+        self.get_ok('/api/certifications/')
+        self.get_ok('/api/certifications/', {'page': 2, 'ordering': 'name'})
+        self.get_ok('/api/certifications/', {'user': self.owner.pk})
+
+    def test_retrieve(self):
+        self.get_ok(f'/api/certifications/{Certification.objects.values_list("pk", flat=True).first()}/')
+
+    def test_by_user(self):
+        self.get_ok(f'/api/certifications/by_user/{self.owner.pk}/')
+
+    def test_active(self):
+        self.get_ok('/api/certifications/active/')
+
+
+class CertificationFastListTests(FastListParityMixin, PortfolioTestCase):
+    paths = [
+        '/api/certifications/',
+        '/api/certifications/active/',
+        '/api/certifications/by_user/{user}/',
+    ]
+    variants = [
+        {},
+        {'page': 2},
+        {'fields': 'id,name,is_active,issuer_display'},
+        {'omit': 'skills,is_active'},
+        {'search': 'Certification 1'},
+        {'ordering': '-issue_date'},
+        {'user': '{user}', 'fields': 'id,name,is_active,issuer_display', 'ordering': '-issue_date'},
+    ]
@@ -1,6 +1,5 @@
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
@@ -13,9 +12,11 @@ from .serializers import (
     CertificationCreateUpdateSerializer
 )
 from portfolio_api.permissions import IsSuperAdminOrEditor
+from portfolio_api.fast_serializers import FastListMixin
+from portfolio_api.surrogate_keys import SurrogateKeyMixin
 
 
-class CertificationViewSet(viewsets.ModelViewSet):
+class CertificationViewSet(SurrogateKeyMixin, FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing certifications
     
@@ -29,6 +30,8 @@ class CertificationViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'issuer', 'description', 'skills']
     ordering_fields = ['issue_date', 'created_at', 'order', 'name']
     ordering = ['-issue_date', 'order']
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = {'list': 4, 'retrieve': 3, 'by_user': 4, 'active': 3}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -52,14 +55,7 @@ class CertificationViewSet(viewsets.ModelViewSet):
     def by_user(self, request, user_id=None):
         """Get all certifications for a specific user"""
         queryset = self.get_queryset().filter(user__id=user_id)
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = CertificationListSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = CertificationListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, CertificationListSerializer)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
@@ -68,5 +64,4 @@ class CertificationViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset().filter(
             models.Q(expiration_date__isnull=True) | models.Q(expiration_date__gt=now)
         )
-        serializer = CertificationListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, CertificationListSerializer, paginate=False)
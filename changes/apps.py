@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class ChangesConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "changes"
+    verbose_name = "Change Feed"
+
+    def ready(self):
+        from .feed import connect_signals
+
+        connect_signals()
@@ -0,0 +1,241 @@
+"""
+Per-owner change feed of the public portfolio data
+
+Every save or delete of a model in ``FEED_MODELS`` appends a
+``ChangeLogEntry`` to its owner's feed in the same transaction, numbered
+``seq`` 1, 2, 3... per owner. Numbers are taken by incrementing the
+owner's ``ChangeSequence`` row, which stays locked until the transaction
+commits, so a later number never becomes visible before an earlier one and
+a client can resume from the last number it saw.
+
+``changes_since`` serves ``/api/changes/``: the entries after a cursor,
+with repeated changes of one row collapsed into the last, and each
+upserted row rendered by its viewset's detail serializer as it is now. A
+client keeps a replica by applying the changes in order and storing the
+returned cursor.
+
+``prune`` compacts old entries instead of cutting the log by age: an entry
+is removed once a later entry for the same row exists, and deletes are
+removed after the retention period. The log therefore always holds one
+upsert per live row, and reading from cursor 0 is a full snapshot. A
+cursor older than the newest pruned delete is refused, since deletes it
+has not seen are gone.
+
+``QuerySet.update()`` and ``bulk_create()`` send no signals; code using
+them on these models calls ``record_change`` itself, or ``backfill`` for
+the owners whose rows it inserted (as ``seed_scale`` does).
+"""
+import functools
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, Max, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+from .models import ChangeLogEntry, ChangeOperation, ChangeSequence
+
+
+class FeedSpec:
+    """How one model appears in the feed"""
+
+    def __init__(self, kind, viewset=None, serializer=None, parent=None):
+        self.kind = kind
+        # Rows are rendered by the viewset's retrieve serializer over its queryset,
+        # or by ``serializer`` over the default manager
+        self.viewset = viewset
+        self.serializer = serializer
+        # Child rows belong to the owner of their ``parent``
+        self.parent = parent
+
+
+FEED_MODELS = {
+    'projects.Project': FeedSpec('project', viewset='projects.views.ProjectViewSet'),
+    'projects.ProjectImage': FeedSpec(
+        'project_image', serializer='projects.serializers.ProjectImageSerializer', parent='project'
+    ),
+    'experiences.Experience': FeedSpec('experience', viewset='experiences.views.ExperienceViewSet'),
+    'education.Education': FeedSpec('education', viewset='education.views.EducationViewSet'),
+    'skills.Skill': FeedSpec('skill', viewset='skills.views.SkillViewSet'),
+    'certifications.Certification': FeedSpec('certification', viewset='certifications.views.CertificationViewSet'),
+    'accounts.SocialLink': FeedSpec('social_link', serializer='accounts.serializers.SocialLinkSerializer'),
+}
+
+
+def feed_spec(model):
+    return FEED_MODELS.get(model._meta.concrete_model._meta.label)
+
+
+@functools.cache
+def kinds():
+    """``{kind: (model, spec)}``"""
+    return {spec.kind: (apps.get_model(label), spec) for label, spec in FEED_MODELS.items()}
+
+
+def owner_id(instance):
+    spec = feed_spec(type(instance))
+    if spec.parent is None:
+        return instance.user_id
+    parent_model = type(instance)._meta.get_field(spec.parent).related_model
+    return parent_model._default_manager.filter(
+        pk=getattr(instance, f'{spec.parent}_id')
+    ).values_list('user_id', flat=True).first()
+
+
+def next_seq(owner):
+    """Take the owner's next change number, locking their sequence until commit"""
+    if not ChangeSequence.objects.filter(owner_id=owner).update(last_seq=F('last_seq') + 1):
+        try:
+            with transaction.atomic():
+                ChangeSequence.objects.create(owner_id=owner, last_seq=1)
+            return 1
+        except IntegrityError:
+            # Created by a concurrent first change
+            ChangeSequence.objects.filter(owner_id=owner).update(last_seq=F('last_seq') + 1)
+    return ChangeSequence.objects.values_list('last_seq', flat=True).get(owner_id=owner)
+
+
+def record_change(owner, kind, object_id, operation):
+    with transaction.atomic():
+        ChangeLogEntry.objects.create(
+            owner_id=owner, seq=next_seq(owner), kind=kind, object_id=object_id, operation=operation
+        )
+
+
+def _record(instance, operation):
+    owner = owner_id(instance)
+    if owner is not None:
+        record_change(owner, feed_spec(type(instance)).kind, instance.pk, operation)
+
+
+def record_save(sender, instance, raw=False, **kwargs):
+    """``post_save`` receiver for the models in ``FEED_MODELS``"""
+    if not raw:  # loaddata
+        _record(instance, ChangeOperation.UPSERT)
+
+
+def record_delete(sender, instance, **kwargs):
+    """``post_delete`` receiver for the models in ``FEED_MODELS``"""
+    _record(instance, ChangeOperation.DELETE)
+
+
+def connect_signals():
+    for label in FEED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(record_save, sender=model, dispatch_uid=f'changes.feed.save.{label}')
+        post_delete.connect(record_delete, sender=model, dispatch_uid=f'changes.feed.delete.{label}')
+
+
+def backfill(owners, batch_size=1000):
+    """
+    Log an upsert for every row of ``owners`` (user ids), after their
+    sequences; returns the number of entries written. Like migration
+    ``0002_backfill``, for rows inserted without signals.
+    """
+    owners = list(owners)
+    written = 0
+    for start in range(0, len(owners), batch_size):
+        chunk = owners[start:start + batch_size]
+        with transaction.atomic():
+            last_seq = defaultdict(int, ChangeSequence.objects.select_for_update().filter(
+                owner_id__in=chunk
+            ).values_list('owner_id', 'last_seq'))
+            entries = []
+            for kind, (model, spec) in kinds().items():
+                path = f'{spec.parent}__user_id' if spec.parent else 'user_id'
+                rows = model._default_manager.filter(**{f'{path}__in': chunk}).order_by('pk')
+                for object_id, owner in rows.values_list('pk', path).iterator():
+                    last_seq[owner] += 1
+                    entries.append(ChangeLogEntry(
+                        owner_id=owner, seq=last_seq[owner], kind=kind, object_id=object_id,
+                        operation=ChangeOperation.UPSERT,
+                    ))
+            ChangeLogEntry.objects.bulk_create(entries, batch_size=batch_size)
+            ChangeSequence.objects.bulk_create(
+                [ChangeSequence(owner_id=owner, last_seq=seq) for owner, seq in last_seq.items()],
+                batch_size=batch_size, update_conflicts=True, unique_fields=['owner_id'], update_fields=['last_seq'],
+            )
+        written += len(entries)
+    return written
+
+
+def render_rows(kind, ids, request):
+    """``{id: data}`` for the rows of ``kind`` that still exist, in one query (plus prefetches)"""
+    model, spec = kinds()[kind]
+    if spec.viewset:
+        viewset = import_string(spec.viewset)(request=request, format_kwarg=None, action='retrieve', kwargs={})
+        queryset, serializer_class = viewset.queryset.all(), viewset.get_serializer_class()
+    else:
+        queryset, serializer_class = model._default_manager.all(), import_string(spec.serializer)
+    rows = list(queryset.filter(pk__in=ids))
+    data = serializer_class(rows, many=True, context={'request': request}).data
+    rendered = {}
+    for row, item in zip(rows, data):
+        if spec.parent:
+            item[spec.parent] = str(getattr(row, f'{spec.parent}_id'))
+        rendered[row.pk] = item
+    return rendered
+
+
+def changes_since(owner, since, limit, request):
+    """
+    ``(cursor, has_more, changes)`` for ``owner`` after change ``since``;
+    None when ``since`` is older than the pruned deletes
+    """
+    sequence = ChangeSequence.objects.filter(owner_id=owner).first()
+    if sequence is None:
+        return since, False, []
+    if 0 < since < sequence.pruned_seq:
+        return None
+    entries = list(
+        ChangeLogEntry.objects.filter(owner_id=owner, seq__gt=since).order_by('seq')
+        .values_list('seq', 'kind', 'object_id', 'operation')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    cursor = entries[-1][0] if entries else since
+
+    # Only the last change of each row in the page matters
+    latest = {}
+    for seq, kind, object_id, operation in entries:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = (seq, operation)
+    upserts = defaultdict(list)
+    for (kind, object_id), (_, operation) in latest.items():
+        if operation == ChangeOperation.UPSERT and kind in kinds():
+            upserts[kind].append(object_id)
+    rendered = {kind: render_rows(kind, ids, request) for kind, ids in upserts.items()}
+
+    changes = []
+    for (kind, object_id), (seq, operation) in latest.items():
+        data = rendered.get(kind, {}).get(object_id)
+        if operation == ChangeOperation.UPSERT and data is None:
+            # Deleted since; its delete entry follows in a later page
+            operation = ChangeOperation.DELETE
+        if operation == ChangeOperation.DELETE and since == 0:
+            continue  # A client starting from nothing has nothing to delete
+        change = {'seq': seq, 'type': kind, 'id': str(object_id), 'op': operation}
+        if data is not None:
+            change['data'] = data
+        changes.append(change)
+    return cursor, has_more, changes
+
+
+def prune(before):
+    """
+    Remove entries changed before ``before`` that a later entry for the same
+    row supersedes, then deletes changed before it. Returns the number removed.
+    """
+    with transaction.atomic():
+        old = ChangeLogEntry.objects.filter(changed_at__lt=before)
+        later = ChangeLogEntry.objects.filter(
+            owner_id=OuterRef('owner_id'), kind=OuterRef('kind'), object_id=OuterRef('object_id'),
+            seq__gt=OuterRef('seq'),
+        )
+        superseded, _ = old.filter(Exists(later)).delete()
+        deletes = old.filter(operation=ChangeOperation.DELETE)
+        for owner, newest in deletes.order_by().values('owner_id').annotate(newest=Max('seq')).values_list('owner_id', 'newest'):
+            ChangeSequence.objects.filter(owner_id=owner, pruned_seq__lt=newest).update(pruned_seq=newest)
+        tombstones, _ = deletes.delete()
+    return superseded + tombstones
@@ -0,0 +1,32 @@
+"""
+Compact the portfolio change feed
+
+    python manage.py prune_changes               # CHANGE_FEED_RETENTION_DAYS
+    python manage.py prune_changes --days 7
+
+Removes entries older than the retention period that a later entry for the
+same row supersedes, and deletes older than it. Clients whose cursor
+predates a removed delete are told to sync from since=0 again. See
+``changes.feed``. Run it daily, e.g. from cron.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from changes.feed import prune
+from changes.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = 'Remove superseded and old delete entries from the change feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Keep this many days of history (defaults to CHANGE_FEED_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.CHANGE_FEED_RETENTION_DAYS
+        removed = prune(timezone.now() - timedelta(days=days))
+        self.stdout.write(f'Removed {removed} change entries older than {days} days; {ChangeLogEntry.objects.count()} kept')
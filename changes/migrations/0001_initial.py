@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('owner_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('last_seq', models.PositiveBigIntegerField(default=0)),
+                ('pruned_seq', models.PositiveBigIntegerField(default=0, help_text='Newest delete removed by pruning; cursors before it must sync from scratch')),
+            ],
+            options={
+                'verbose_name': 'Change Sequence',
+                'verbose_name_plural': 'Change Sequences',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.UUIDField()),
+                ('seq', models.PositiveBigIntegerField()),
+                ('kind', models.CharField(help_text='Feed name of the model, e.g. project', max_length=30)),
+                ('object_id', models.UUIDField()),
+                ('operation', models.CharField(choices=[('upsert', 'Created or Updated'), ('delete', 'Deleted')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Change Log Entry',
+                'verbose_name_plural': 'Change Log Entries',
+                'ordering': ['owner_id', 'seq'],
+                'indexes': [models.Index(fields=['owner_id', 'kind', 'object_id', 'seq'], name='changes_cha_owner_i_76072e_idx'), models.Index(fields=['changed_at'], name='changes_cha_changed_08fe65_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner_id', 'seq'), name='unique_change_seq')],
+            },
+        ),
+    ]
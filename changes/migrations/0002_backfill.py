@@ -0,0 +1,62 @@
+"""
+Log an upsert for every existing row, so that since=0 is a full snapshot
+"""
+from collections import defaultdict
+
+from django.db import migrations
+
+# (model label, feed kind, owner path); mirrors changes.feed.FEED_MODELS
+FEED_ROWS = [
+    ('projects.Project', 'project', 'user_id'),
+    ('projects.ProjectImage', 'project_image', 'project__user_id'),
+    ('experiences.Experience', 'experience', 'user_id'),
+    ('education.Education', 'education', 'user_id'),
+    ('skills.Skill', 'skill', 'user_id'),
+    ('certifications.Certification', 'certification', 'user_id'),
+    ('accounts.SocialLink', 'social_link', 'user_id'),
+]
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    ChangeLogEntry = apps.get_model('changes', 'ChangeLogEntry')
+    ChangeSequence = apps.get_model('changes', 'ChangeSequence')
+    last_seq = defaultdict(int)
+    entries = []
+    for label, kind, owner_path in FEED_ROWS:
+        model = apps.get_model(label)
+        for object_id, owner in model.objects.order_by('pk').values_list('pk', owner_path).iterator():
+            last_seq[owner] += 1
+            entries.append(ChangeLogEntry(
+                owner_id=owner, seq=last_seq[owner], kind=kind, object_id=object_id, operation='upsert'
+            ))
+            if len(entries) >= BATCH_SIZE:
+                ChangeLogEntry.objects.bulk_create(entries)
+                entries = []
+    ChangeLogEntry.objects.bulk_create(entries)
+    ChangeSequence.objects.bulk_create(
+        [ChangeSequence(owner_id=owner, last_seq=seq) for owner, seq in last_seq.items()],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def clear(apps, schema_editor):
+    apps.get_model('changes', 'ChangeLogEntry').objects.all().delete()
+    apps.get_model('changes', 'ChangeSequence').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0001_initial'),
+        ('accounts', '0001_initial'),
+        ('projects', '0002_access_path_indexes'),
+        ('experiences', '0002_access_path_indexes'),
+        ('education', '0002_access_path_indexes'),
+        ('skills', '0002_access_path_indexes'),
+        ('certifications', '0002_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
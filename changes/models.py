@@ -0,0 +1,57 @@
+from django.db import models
+
+
+class ChangeOperation(models.TextChoices):
+    """What happened to a row"""
+    UPSERT = 'upsert', 'Created or Updated'
+    DELETE = 'delete', 'Deleted'
+
+
+class ChangeSequence(models.Model):
+    """
+    Last change number handed out in one owner's feed
+    Taking the next number locks this row until the transaction commits, so
+    an owner's changes are numbered in commit order
+    """
+    # Not foreign keys: deleting a user still logs the deletes of their rows
+    owner_id = models.UUIDField(primary_key=True)
+    last_seq = models.PositiveBigIntegerField(default=0)
+    pruned_seq = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Newest delete removed by pruning; cursors before it must sync from scratch"
+    )
+    
+    class Meta:
+        verbose_name = 'Change Sequence'
+        verbose_name_plural = 'Change Sequences'
+    
+    def __str__(self):
+        return f"{self.owner_id} at {self.last_seq}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One upsert or delete of a portfolio row, numbered within its owner's feed
+    """
+    owner_id = models.UUIDField()
+    seq = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=30, help_text="Feed name of the model, e.g. project")
+    object_id = models.UUIDField()
+    operation = models.CharField(max_length=10, choices=ChangeOperation.choices)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['owner_id', 'seq']
+        verbose_name = 'Change Log Entry'
+        verbose_name_plural = 'Change Log Entries'
+        constraints = [
+            models.UniqueConstraint(fields=['owner_id', 'seq'], name='unique_change_seq'),
+        ]
+        indexes = [
+            # Pruning looks for later changes of the same row
+            models.Index(fields=['owner_id', 'kind', 'object_id', 'seq']),
+            models.Index(fields=['changed_at']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.seq} {self.operation} {self.kind} {self.object_id}"
@@ -0,0 +1,141 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from portfolio_api.query_metrics import QueryBudgetExceeded
+from portfolio_api.testing import PortfolioTestCase
+from projects.models import Project, ProjectImage
+
+from .feed import backfill, prune
+from .models import ChangeLogEntry, ChangeSequence
+from .views import ChangeFeedView
+
+
+def live_rows(owner):
+    """``{(type, id)}`` of every feed row ``owner`` has"""
+    rows = {('project', str(pk)) for pk in Project.objects.filter(user=owner).values_list('pk', flat=True)}
+    for kind, related in [
+        ('experience', owner.experiences), ('education', owner.education), ('skill', owner.skills),
+        ('certification', owner.certifications), ('social_link', owner.social_links),
+    ]:
+        rows |= {(kind, str(pk)) for pk in related.values_list('pk', flat=True)}
+    rows |= {
+        ('project_image', str(pk))
+        for pk in ProjectImage.objects.filter(project__user=owner).values_list('pk', flat=True)
+    }
+    return rows
+
+
+class ChangeFeedTests(PortfolioTestCase):
+    """Every request also stays within ChangeFeedView.query_budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Seeded with bulk_create, so the feed starts empty
+        backfill(User.objects.values_list('pk', flat=True))
+
+    def changes(self, since=0, **params):
+        return self.get_ok('/api/changes/', {'user': self.owner.pk, 'since': since, **params}).json()
+
+    def test_snapshot_lists_every_row(self):
+        body = self.changes()
+        self.assertFalse(body['has_more'])
+        self.assertEqual(body['cursor'], ChangeSequence.objects.get(owner_id=self.owner.pk).last_seq)
+        self.assertEqual({(change['type'], change['id']) for change in body['changes']}, live_rows(self.owner))
+        project = next(change for change in body['changes'] if change['type'] == 'project')
+        self.assertEqual(project['op'], 'upsert')
+        self.assertEqual(project['data']['id'], project['id'])
+
+    def test_cursor_pages_through_the_feed(self):
+        seen, since, pages = set(), 0, 0
+        while True:
+            body = self.changes(since, limit=25)
+            self.assertLessEqual(len(body['changes']), 25)
+            self.assertEqual([change['seq'] for change in body['changes']], sorted(change['seq'] for change in body['changes']))
+            self.assertTrue(all(change['seq'] > since for change in body['changes']))
+            seen |= {(change['type'], change['id']) for change in body['changes']}
+            since, pages = body['cursor'], pages + 1
+            if not body['has_more']:
+                break
+        self.assertGreater(pages, 1)
+        self.assertEqual(seen, live_rows(self.owner))
+        self.assertEqual(self.changes(since)['changes'], [])
+
+    def test_repeated_changes_collapse_into_the_last(self):
+        cursor = self.changes()['cursor']
+        edited, deleted = Project.objects.filter(user=self.owner)[:2]
+        for title in ('Renamed', 'Renamed again'):
+            edited.title = title
+            edited.save()
+        deleted_id = deleted.pk
+        deleted.delete()
+
+        body = self.changes(cursor)
+        changes = {(change['type'], change['id']): change for change in body['changes']}
+        self.assertEqual(changes[('project', str(edited.pk))]['data']['title'], 'Renamed again')
+        self.assertEqual(changes[('project', str(deleted_id))]['op'], 'delete')
+        self.assertNotIn('data', changes[('project', str(deleted_id))])
+        self.assertEqual(len(body['changes']), 2 + 2)  # The deleted project's images too
+        self.assertEqual(body['cursor'], cursor + 5)
+
+    def test_snapshot_skips_deleted_rows(self):
+        deleted = Project.objects.filter(user=self.owner).first()
+        deleted_id = deleted.pk
+        deleted.delete()
+        ids = {change['id'] for change in self.changes()['changes']}
+        self.assertNotIn(str(deleted_id), ids)
+        self.assertEqual(len(ids), len(live_rows(self.owner)))
+
+    def test_prune_keeps_a_snapshot_and_expires_old_cursors(self):
+        cursor = self.changes()['cursor']
+        edited, deleted = Project.objects.filter(user=self.owner)[:2]
+        edited.save()
+        deleted.delete()
+        last_delete = ChangeLogEntry.objects.filter(owner_id=self.owner.pk, operation='delete').latest('seq').seq
+
+        # Superseded upserts of both projects and the images, then the three deletes
+        self.assertEqual(prune(timezone.now() + timedelta(seconds=1)), 1 + 3 + 3)
+        self.assertEqual(ChangeSequence.objects.get(owner_id=self.owner.pk).pruned_seq, last_delete)
+        self.assertEqual({(change['type'], change['id']) for change in self.changes()['changes']}, live_rows(self.owner))
+        self.assertEqual(self.client.get('/api/changes/', {'user': self.owner.pk, 'since': cursor}).status_code, 410)
+        self.assertEqual([change['id'] for change in self.changes(last_delete)['changes']], [])
+
+    def test_prune_keeps_recent_history(self):
+        Project.objects.filter(user=self.owner).first().save()
+        self.assertEqual(prune(timezone.now() - timedelta(days=1)), 0)
+
+    def test_query_budget_is_enforced(self):
+        with mock.patch.object(ChangeFeedView, 'query_budget', 2):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/changes/', {'user': self.owner.pk, 'since': 0})
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/changes/', {'user': 'nobody', 'since': -1, 'limit': 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'user', 'since', 'limit'})
+
+
+class SeedScaleFeedTests(APITestCase):
+    def test_seeded_portfolios_are_in_the_feed(self):
+        media = tempfile.mkdtemp(prefix='seed-scale-media-')
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media):
+            call_command(
+                'seed_scale', users=3, activities_per_user=0, messages_per_user=1, placeholder_images=1,
+                stdout=StringIO(),
+            )
+        for owner in User.objects.all():
+            with self.subTest(owner=owner.email):
+                rows = live_rows(owner)
+                self.assertTrue(rows)
+                self.assertEqual(ChangeSequence.objects.get(owner_id=owner.pk).last_seq, len(rows))
+                body = self.client.get('/api/changes/', {'user': owner.pk, 'since': 0}).json()
+                self.assertEqual({(change['type'], change['id']) for change in body['changes']}, rows)
@@ -0,0 +1,61 @@
+import uuid
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .feed import changes_since
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'This cursor is older than the retained changes. Sync again from since=0.'
+    default_code = 'cursor_expired'
+
+
+class ChangeFeedView(APIView):
+    """
+    Changes to one user's portfolio after a cursor (see changes/feed.py)
+    
+    GET /api/changes/?user=<id>&since=<cursor>&limit=<n>
+    Start from since=0 (a snapshot of every row), apply the changes in order,
+    then ask again with the returned cursor; repeat at once while has_more.
+    """
+    permission_classes = [AllowAny]
+    # Sequence, entries and one query per changed type (plus prefetches)
+    query_budget = 12
+    
+    def get(self, request):
+        errors = {}
+        try:
+            owner = uuid.UUID(request.query_params.get('user', ''))
+        except ValueError:
+            errors['user'] = ['A valid user id is required.']
+        try:
+            since = int(request.query_params.get('since', 0))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            errors['since'] = ['A cursor from a previous response, or 0, is required.']
+        try:
+            limit = min(int(request.query_params.get('limit', settings.CHANGE_FEED_PAGE_SIZE)), settings.CHANGE_FEED_PAGE_SIZE)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            errors['limit'] = [f'A number from 1 to {settings.CHANGE_FEED_PAGE_SIZE} is expected.']
+        if errors:
+            raise ValidationError(errors)
+        
+        result = changes_since(owner, since, limit, request)
+        if result is None:
+            raise CursorExpired()
+        cursor, has_more, changes = result
+        return Response({
+            'user': str(owner),
+            'cursor': cursor,
+            'has_more': has_more,
+            'changes': changes,
+        })
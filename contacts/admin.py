@@ -1,20 +1,25 @@
 from django.contrib import admin
-from .models import ContactMessage, MessageReply, MessageStatus
+from django.utils import timezone
+from .models import ContactMessage, MessageReply, MessageStatus, Notification, NotificationStatus
 
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ['sender', 'subject', 'message_type', 'status', 'priority', 'created_at']
+    list_display = ['sender', 'subject', 'message_type', 'status', 'priority', 'duplicate_count', 'created_at']
     list_filter = ['status', 'message_type', 'priority', 'created_at']
     search_fields = ['sender__email', 'subject', 'message']
     ordering = ['-created_at']
-    readonly_fields = ['sender', 'ip_address', 'user_agent', 'created_at', 'updated_at', 'responded_at']
+    readonly_fields = [
+        'sender', 'ip_address', 'user_agent', 'duplicate_count', 'last_duplicate_at',
+        'created_at', 'updated_at', 'responded_at'
+    ]
     
     fieldsets = (
         ('Message Info', {'fields': ('sender', 'message_type', 'subject', 'message')}),
         ('Project Details', {'fields': ('project_budget', 'project_timeline', 'attachments'), 'classes': ('collapse',)}),
         ('Status', {'fields': ('status', 'priority', 'admin_notes')}),
         ('Response', {'fields': ('responded_by', 'responded_at'), 'classes': ('collapse',)}),
+        ('Duplicates', {'fields': ('duplicate_count', 'last_duplicate_at'), 'classes': ('collapse',)}),
         ('Metadata', {'fields': ('ip_address', 'user_agent', 'created_at', 'updated_at'), 'classes': ('collapse',)}),
     )
 
@@ -26,3 +31,19 @@ class MessageReplyAdmin(admin.ModelAdmin):
     search_fields = ['message__subject', 'author__email', 'content']
     ordering = ['-created_at']
     readonly_fields = ['message', 'author', 'created_at', 'updated_at']
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'event', 'status', 'digest', 'attempts', 'send_after', 'sent_at']
+    list_filter = ['status', 'event', 'digest']
+    search_fields = ['recipient', 'message__subject']
+    ordering = ['-created_at']
+    readonly_fields = ['message', 'reply', 'claim', 'sent_at', 'created_at']
+    actions = ['retry_now']
+    
+    @admin.action(description='Retry selected notifications now')
+    def retry_now(self, request, queryset):
+        queryset.exclude(status=NotificationStatus.SENT).update(
+            status=NotificationStatus.PENDING, send_after=timezone.now(), attempts=0, claim=None
+        )
@@ -0,0 +1,244 @@
+"""
+Duplicate detection for contact form submissions
+
+Senders resubmit the form: double clicks, retries after a slow response,
+or the same text sent again with a few words changed. Each submission is
+fingerprinted before it is stored:
+
+* ``content_hash``: SHA-256 of the subject and body after normalisation
+  (case, Unicode forms, punctuation and whitespace), for exact repeats
+* ``minhash``: a 64-value MinHash signature of the text's two-word
+  shingles, for near duplicates. The share of equal values estimates the
+  Jaccard similarity of two texts' shingle sets; they match at
+  ``CONTACT_DEDUP_SIMILARITY`` or above. Texts shorter than
+  ``CONTACT_DEDUP_MIN_WORDS`` words only match exactly, and only the first
+  ``CONTACT_DEDUP_MAX_WORDS`` words are shingled, which bounds the work
+  per anonymous request
+
+A submission matching a message from the last ``CONTACT_DEDUP_TTL``
+seconds is folded into it: the original's ``duplicate_count`` goes up and
+no row is inserted. Only the same sender's messages match: the same
+account, or for anonymous submissions the same email address. Folding
+different senders together would drop the contact details of all but the
+first, and hand each of them the first one's message id.
+
+Fingerprints live in a per-process index (``DedupIndex``) holding the
+messages of the TTL window. Near-duplicate lookups are banded (locality
+sensitive hashing): signatures are cut into 16 bands of 4 values, and only
+messages sharing a whole band with the submission are compared, which
+finds texts 70% similar with 99% probability. Each process loads the
+window from the database on first use and picks up messages stored by
+other workers every ``CONTACT_DEDUP_REFRESH`` seconds.
+"""
+import hashlib
+import random
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ContactMessage
+
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+SHINGLE_WORDS = 2
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are stored, so every process must use the same permutations
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(SIGNATURE_SIZE)]
+_SIGNATURE = struct.Struct(f'>{SIGNATURE_SIZE}I')
+# How far back a refresh looks, so messages inserted late by the spool
+# flusher (their created_at is the submission time) are still picked up
+REFRESH_OVERLAP = timedelta(minutes=2)
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalise(text):
+    return ' '.join(_WORD_RE.findall(unicodedata.normalize('NFKC', text or '').casefold()))
+
+
+def content_hash(subject, message):
+    return hashlib.sha256(f'{normalise(subject)}\n{normalise(message)}'.encode()).hexdigest()
+
+
+def minhash(subject, message):
+    """MinHash signature of the submission's word shingles as bytes, or None when too short"""
+    words = normalise(f'{subject} {message}').split()[:settings.CONTACT_DEDUP_MAX_WORDS]
+    if len(words) < settings.CONTACT_DEDUP_MIN_WORDS:
+        return None
+    shingles = {' '.join(words[start:start + SHINGLE_WORDS]) for start in range(len(words) - SHINGLE_WORDS + 1)}
+    values = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big') for shingle in shingles]
+    return _SIGNATURE.pack(*(
+        min([(a * value + b) % _PRIME for value in values]) & 0xFFFFFFFF for a, b in _PERMUTATIONS
+    ))
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(x == y for x, y in zip(_SIGNATURE.unpack(a), _SIGNATURE.unpack(b))) / SIGNATURE_SIZE
+
+
+def _bands(signature):
+    width = ROWS * 4
+    return [(band, signature[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+
+class DedupIndex:
+    """Fingerprints of recent messages, expiring after ``ttl`` seconds"""
+
+    def __init__(self, ttl, threshold, max_entries):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.exact = {}
+        self.bands = defaultdict(list)
+        self.entries = deque()  # Oldest first
+        self.ids = set()
+        self.lock = threading.Lock()
+
+    def add(self, message_id, sender, digest, near, added_at=None):
+        with self.lock:
+            if message_id in self.ids:
+                return
+            entry = (message_id, sender, digest, near, added_at or time.time())
+            self.ids.add(message_id)
+            self.entries.append(entry)
+            self.exact.setdefault((sender, digest), entry)
+            if near is not None:
+                for band in _bands(near):
+                    self.bands[band].append(entry)
+            self._expire()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        while self.entries and (self.entries[0][4] < cutoff or len(self.entries) > self.max_entries):
+            entry = self.entries.popleft()
+            message_id, sender, digest, near, _ = entry
+            self.ids.discard(message_id)
+            if self.exact.get((sender, digest)) is entry:
+                del self.exact[(sender, digest)]
+            if near is not None:
+                for band in _bands(near):
+                    bucket = self.bands[band]
+                    bucket.remove(entry)
+                    if not bucket:
+                        del self.bands[band]
+
+    def match(self, sender, digest, near):
+        """Id of a live message from ``sender`` with the same or a near fingerprint, or None"""
+        with self.lock:
+            self._expire()
+            # Entries loaded late can sit behind newer ones, so check each one's age too
+            cutoff = time.time() - self.ttl
+            entry = self.exact.get((sender, digest))
+            if entry is not None and entry[4] >= cutoff:
+                return entry[0]
+            if near is None:
+                return None
+            for band in _bands(near):
+                for entry in self.bands.get(band, ()):
+                    if entry[1] == sender and entry[4] >= cutoff and similarity(entry[3], near) >= self.threshold:
+                        return entry[0]
+        return None
+
+
+_index = None
+_index_lock = threading.Lock()
+_refreshed_at = None
+
+
+def get_index():
+    """This process's index, loaded from the database and refreshed every ``CONTACT_DEDUP_REFRESH`` seconds"""
+    global _index, _refreshed_at
+    with _index_lock:
+        now = timezone.now()
+        if _index is None:
+            _index = DedupIndex(
+                settings.CONTACT_DEDUP_TTL, settings.CONTACT_DEDUP_SIMILARITY, settings.CONTACT_DEDUP_MAX_ENTRIES
+            )
+            since = now - timedelta(seconds=settings.CONTACT_DEDUP_TTL)
+        elif (now - _refreshed_at).total_seconds() >= settings.CONTACT_DEDUP_REFRESH:
+            since = _refreshed_at - REFRESH_OVERLAP
+        else:
+            return _index
+        _refreshed_at = now
+        rows = (
+            ContactMessage.objects.filter(created_at__gte=since).exclude(content_hash='')
+            .order_by('-created_at')
+            .values_list('id', 'sender_id', 'sender_email', 'content_hash', 'minhash', 'created_at')
+            [:settings.CONTACT_DEDUP_MAX_ENTRIES]
+        )
+        for message_id, sender_id, sender_email, digest, near, created_at in list(rows)[::-1]:
+            # PostgreSQL returns binary columns as memoryview
+            _index.add(
+                message_id, sender_key(sender_id, sender_email), digest,
+                bytes(near) if near is not None else None, created_at.timestamp()
+            )
+        return _index
+
+
+def sender_key(sender_id, sender_email=None):
+    """Whose messages a submission may fold into: the account, or the email address of an anonymous sender"""
+    if sender_id:
+        return str(sender_id)
+    return f'email:{(sender_email or "").strip().casefold()}'
+
+
+def fingerprint(fields, sender_id=None):
+    """
+    ``(duplicate_of, sender, content_hash, minhash)`` for a validated
+    submission; ``duplicate_of`` is the id of the sender's message it
+    repeats, if any, and ``sender`` its ``sender_key``
+    """
+    sender = sender_key(sender_id, fields.get('sender_email'))
+    subject, message = fields.get('subject', ''), fields.get('message', '')
+    digest = content_hash(subject, message)
+    index = get_index() if settings.CONTACT_DEDUP_ENABLED else None
+    # An exact repeat needs no signature: it is folded, never stored
+    if index is not None:
+        duplicate_of = index.match(sender, digest, None)
+        if duplicate_of is not None:
+            return duplicate_of, sender, digest, None
+    near = minhash(subject, message)
+    if index is not None and near is not None:
+        return index.match(sender, digest, near), sender, digest, near
+    return None, sender, digest, near
+
+
+def remember(message_id, sender, digest, near):
+    """Make a newly accepted message available for matching in this process"""
+    if settings.CONTACT_DEDUP_ENABLED:
+        get_index().add(message_id, sender, digest, near)
+
+
+def fold_duplicates(counts, last_seen=None):
+    """Add ``{message id: repeats}`` to the messages' ``duplicate_count``, one UPDATE per message"""
+    last_seen = last_seen or {}
+    for message_id, count in counts.items():
+        ContactMessage.objects.filter(pk=message_id).update(
+            duplicate_count=F('duplicate_count') + count,
+            last_duplicate_at=last_seen.get(message_id) or timezone.now(),
+        )
+
+
+def save_or_fold(serializer, sender=None, **extra):
+    """
+    Save a valid create serializer's submission, or fold it into the message
+    it duplicates. Returns ``(message id, folded)``.
+    """
+    duplicate_of, key, digest, near = fingerprint(serializer.validated_data, sender.pk if sender else None)
+    if duplicate_of is not None:
+        fold_duplicates({duplicate_of: 1})
+        return duplicate_of, True
+    message = serializer.save(sender=sender, content_hash=digest, minhash=near, **extra)
+    remember(message.pk, key, digest, near)
+    return message.pk, False
@@ -0,0 +1,227 @@
+"""
+Live inbox events for the admin dashboard
+
+Saving a ``ContactMessage`` or ``MessageReply`` (see ``contacts.signals``),
+or a spool flush inserting messages, publishes a small event once the
+transaction commits:
+
+    {"type": "message.created", "id": ..., "subject": ..., "status": ..., ...}
+    {"type": "message.updated", "id": ..., "status": ..., "priority": ...}
+    {"type": "reply.created", "id": ..., "message_id": ..., "is_internal": ...}
+
+``Broker`` fans each event out to the streams open in this process
+(``contacts.stream``), each reading its own bounded ``asyncio.Queue``. A
+stream that falls ``CONTACT_EVENTS_QUEUE_SIZE`` events behind is told to
+resync instead of holding events forever.
+
+Events from other worker processes arrive through the backend named by
+``CONTACT_EVENTS_BACKEND``:
+
+* ``LocalBackend``: this process only (one worker, or tests)
+* ``SocketBackend``: every process with open streams binds a Unix datagram
+  socket in ``CONTACT_EVENTS_DIR``; publishing sends the event to each
+  socket there. Sockets left by dead workers are removed when a send is
+  refused. It reaches the workers of one host, which is what gunicorn runs;
+  a backend for several hosts only needs ``start(deliver)`` and
+  ``send(event)``.
+
+Delivery is best effort: an event that finds a full socket buffer or queue
+is dropped, and clients resync from the REST endpoints when told to or
+after reconnecting.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Largest datagram read; events are a few hundred bytes
+MAX_EVENT_BYTES = 64 * 1024
+RESYNC = {'type': 'resync'}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class LocalBackend:
+    """Events stay in the publishing process"""
+
+    def start(self, deliver):
+        pass
+
+    def send(self, event):
+        pass
+
+
+class SocketBackend:
+    """Events reach every process of this host with a socket in ``CONTACT_EVENTS_DIR``"""
+
+    def __init__(self, directory=None):
+        self.directory = str(directory or settings.CONTACT_EVENTS_DIR)
+        self.path = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def start(self, deliver):
+        """Bind this process's socket and read events from it in a thread, once"""
+        with self.lock:
+            if self.path is not None and self.pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self.pid = os.getpid()
+            self.path = os.path.join(self.directory, f'{self.pid}-{uuid.uuid4().hex[:8]}.sock')
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(self.path)
+            threading.Thread(
+                target=self._read, args=(sock, deliver), name='contact-events-reader', daemon=True
+            ).start()
+
+    def _read(self, sock, deliver):
+        while True:
+            data = sock.recv(MAX_EVENT_BYTES)
+            try:
+                deliver(json.loads(data))
+            except ValueError:
+                logger.warning('Dropped a malformed inbox event')
+
+    def send(self, event):
+        data = json.dumps(event, cls=DjangoJSONEncoder).encode()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            for name in names:
+                path = os.path.join(self.directory, name)
+                if not name.endswith('.sock') or path == self.path:
+                    continue
+                try:
+                    sock.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Its worker is gone
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                except (BlockingIOError, OSError) as exc:
+                    logger.debug('Inbox event not sent to %s: %s', name, exc)
+
+
+class Subscription:
+    """One open stream's queue; read with ``await subscription.get()``"""
+
+    def __init__(self, broker, loop, size):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def put(self, event):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client refetches everything when it reads RESYNC, so what is queued is moot
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.overflowed = True
+
+    async def get(self):
+        event = await self.queue.get()
+        if event is RESYNC:
+            self.overflowed = False
+        return event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Fans events out to this process's subscriptions and, through the backend, to other processes"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, size=None):
+        """New subscription for the running event loop"""
+        self.backend.start(self.deliver)
+        subscription = Subscription(self, asyncio.get_running_loop(), size or settings.CONTACT_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def deliver(self, event):
+        """Hand an event to every subscription in this process; safe from any thread"""
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Its event loop has closed
+                self.unsubscribe(subscription)
+
+    def publish(self, event):
+        self.deliver(event)
+        try:
+            self.backend.send(event)
+        except Exception:
+            logger.exception('Could not forward inbox event %s', event.get('type'))
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker(import_string(settings.CONTACT_EVENTS_BACKEND)())
+        return _broker
+
+
+def publish(event):
+    """Publish ``event`` once the current transaction commits (at once outside one)"""
+    if settings.CONTACT_EVENTS_ENABLED:
+        transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def message_event(message, event_type):
+    return {
+        'type': event_type,
+        'id': str(message.pk),
+        'subject': message.subject,
+        'message_type': message.message_type,
+        'status': message.status,
+        'priority': message.priority,
+        'sender_id': str(message.sender_id) if message.sender_id else None,
+        'created_at': message.created_at,
+        'updated_at': message.updated_at,
+    }
+
+
+def reply_event(reply):
+    return {
+        'type': 'reply.created',
+        'id': str(reply.pk),
+        'message_id': str(reply.message_id),
+        'author_id': str(reply.author_id),
+        'is_internal': reply.is_internal,
+        'created_at': reply.created_at,
+    }
@@ -0,0 +1,60 @@
+"""
+Insert spooled contact form submissions into the database
+
+    python manage.py flush_contact_spool             # drain the spool once
+    python manage.py flush_contact_spool --loop      # keep flushing, e.g. as a systemd service
+    python manage.py flush_contact_spool --status
+
+Workers flush in a background thread already (``CONTACT_SPOOL_FLUSH_INTERVAL``);
+run this to drain the spool before a deploy, or as the only flusher with
+``CONTACT_SPOOL_FLUSH_INTERVAL=0``. See ``contacts.spool``.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from contacts.spool import flush, spool_path
+
+
+def count(directory):
+    try:
+        return sum(1 for name in os.listdir(spool_path(directory)) if name.endswith('.json'))
+    except FileNotFoundError:
+        return 0
+
+
+class Command(BaseCommand):
+    help = 'Insert waiting contact form submissions in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing every --interval seconds')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between flushes with --loop')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows per INSERT (defaults to CONTACT_SPOOL_BATCH_SIZE)')
+        parser.add_argument('--status', action='store_true', help='Show what is waiting without flushing')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.stdout.write(
+                f'{settings.CONTACT_SPOOL_DIR}: {count("new")} waiting, {count("failed")} failed '
+                f'(high-water mark {settings.CONTACT_SPOOL_HIGH_WATER})'
+            )
+            return
+        while True:
+            started = time.perf_counter()
+            inserted = flush(batch_size=options['batch_size'])
+            if inserted is None:
+                if not options['loop']:
+                    self.stderr.write('Another process is flushing the spool')
+            elif inserted or not options['loop']:
+                self.stdout.write(
+                    f'Inserted {inserted} messages in {(time.perf_counter() - started) * 1000:.0f} ms; '
+                    f'{count("new")} waiting, {count("failed")} failed'
+                )
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,60 @@
+"""
+Send queued contact notification emails
+
+    python manage.py send_notifications              # send what is due once
+    python manage.py send_notifications --loop       # keep sending, e.g. as a systemd service
+    python manage.py send_notifications --status
+    python manage.py send_notifications --prune 30   # delete sent notifications older than 30 days
+
+Workers send in a background thread already (``CONTACT_NOTIFY_INTERVAL``);
+run this as the only sender with ``CONTACT_NOTIFY_INTERVAL=0``. See
+``contacts.notifications``.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+
+from contacts.models import Notification, NotificationStatus
+from contacts.notifications import drain
+
+
+class Command(BaseCommand):
+    help = 'Send due contact notification emails, one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sending every --interval seconds')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between runs with --loop')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Notifications per connection (defaults to CONTACT_NOTIFY_BATCH_SIZE)')
+        parser.add_argument('--status', action='store_true', help='Count notifications by status without sending')
+        parser.add_argument('--prune', type=int, default=None, metavar='DAYS',
+                            help='Delete notifications sent more than DAYS days ago')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            counts = dict(Notification.objects.values_list('status').annotate(count=Count('id')).order_by())
+            due = Notification.objects.filter(
+                status=NotificationStatus.PENDING, send_after__lte=timezone.now()
+            ).count()
+            self.stdout.write(', '.join(
+                f'{counts.get(value, 0)} {label.lower()}' for value, label in NotificationStatus.choices
+            ) + f' ({due} due now)')
+            return
+        if options['prune'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune'])
+            deleted, _ = Notification.objects.filter(status=NotificationStatus.SENT, sent_at__lt=cutoff).delete()
+            self.stdout.write(f'Deleted {deleted} sent notifications')
+            return
+        while True:
+            started = time.perf_counter()
+            sent = drain(batch_size=options['batch_size'])
+            if sent or not options['loop']:
+                self.stdout.write(f'Sent {sent} emails in {(time.perf_counter() - started) * 1000:.0f} ms')
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
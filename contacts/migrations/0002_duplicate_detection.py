@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the normalised subject and message', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='duplicate_count',
+            field=models.PositiveIntegerField(default=0, help_text='Identical or near-identical submissions folded into this message'),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='last_duplicate_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='minhash',
+            field=models.BinaryField(blank=True, help_text='MinHash signature of the text, for near-duplicate matching', null=True),
+        ),
+    ]
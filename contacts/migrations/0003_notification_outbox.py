@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0002_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254)),
+                ('event', models.CharField(choices=[('message', 'New Message'), ('reply', 'Reply')], max_length=20)),
+                ('digest', models.BooleanField(default=False, help_text="Sent with the recipient's other notifications at the end of the digest window")),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('send_after', models.DateTimeField(help_text='Not sent before this time (digest window end or retry backoff)')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('claim', models.UUIDField(blank=True, help_text='Batch currently sending this row', null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='contacts.contactmessage')),
+                ('reply', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='contacts.messagereply')),
+            ],
+            options={
+                'verbose_name': 'Notification',
+                'verbose_name_plural': 'Notifications',
+                'ordering': ['send_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'send_after'], name='contacts_no_status_4ab392_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('reply__isnull', True)), fields=('event', 'message', 'recipient'), name='unique_message_notification'), models.UniqueConstraint(fields=('reply', 'recipient'), name='unique_reply_notification')],
+            },
+        ),
+    ]
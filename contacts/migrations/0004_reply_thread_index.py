@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0003_notification_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='messagereply',
+            index=models.Index(fields=['message', 'created_at', 'id'], name='contacts_me_message_fafb8e_idx'),
+        ),
+    ]
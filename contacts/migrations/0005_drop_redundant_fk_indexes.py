@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from portfolio_api.db_operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('contacts', '0004_reply_thread_index'),
+    ]
+
+    operations = [
+        # The FK's own index, declared in the state so it can be dropped concurrently
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='messagereply',
+                name='message',
+                field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='contacts.contactmessage'),
+            ),
+            migrations.AddIndex(
+                model_name='messagereply',
+                index=models.Index(fields=['message'], name='contacts_messagereply_message_id_f1a4fed4'),
+            ),
+        ]),
+        RemoveIndexConcurrently(
+            model_name='messagereply',
+            name='contacts_messagereply_message_id_f1a4fed4',
+        ),
+    ]
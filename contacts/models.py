@@ -101,6 +101,26 @@ class ContactMessage(models.Model):
     )
     user_agent = models.TextField(blank=True, null=True)
     
+    # Duplicate detection (see contacts/dedup.py)
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="SHA-256 of the normalised subject and message"
+    )
+    minhash = models.BinaryField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="MinHash signature of the text, for near-duplicate matching"
+    )
+    duplicate_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Identical or near-identical submissions folded into this message"
+    )
+    last_duplicate_at = models.DateTimeField(blank=True, null=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -144,7 +164,8 @@ class MessageReply(models.Model):
     message = models.ForeignKey(
         ContactMessage,
         on_delete=models.CASCADE,
-        related_name='replies'
+        related_name='replies',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -164,6 +185,82 @@ class MessageReply(models.Model):
         ordering = ['created_at']
         verbose_name = 'Message Reply'
         verbose_name_plural = 'Message Replies'
+        indexes = [
+            # Thread pages walk one message's replies in (created_at, id) order
+            models.Index(fields=['message', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Reply to {self.message.subject} by {self.author.email}"
+
+
+class NotificationEvent(models.TextChoices):
+    """What a notification email is about"""
+    NEW_MESSAGE = 'message', 'New Message'
+    REPLY = 'reply', 'Reply'
+
+
+class NotificationStatus(models.TextChoices):
+    """Delivery state of an outbox notification"""
+    PENDING = 'pending', 'Pending'
+    SENT = 'sent', 'Sent'
+    FAILED = 'failed', 'Failed'
+
+
+class Notification(models.Model):
+    """
+    Outbox of notification emails about contact messages and replies
+    Rows are written with the message or reply and sent by contacts/notifications.py
+    """
+    recipient = models.EmailField()
+    event = models.CharField(max_length=20, choices=NotificationEvent.choices)
+    message = models.ForeignKey(
+        ContactMessage,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    reply = models.ForeignKey(
+        MessageReply,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        blank=True,
+        null=True
+    )
+    digest = models.BooleanField(
+        default=False,
+        help_text="Sent with the recipient's other notifications at the end of the digest window"
+    )
+    
+    # Delivery
+    status = models.CharField(
+        max_length=20,
+        choices=NotificationStatus.choices,
+        default=NotificationStatus.PENDING
+    )
+    send_after = models.DateTimeField(help_text="Not sent before this time (digest window end or retry backoff)")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    claim = models.UUIDField(blank=True, null=True, help_text="Batch currently sending this row")
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['send_after', 'id']
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notifications'
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+        ]
+        constraints = [
+            # Re-running a spool flush or a reply hook must not queue the same email twice
+            models.UniqueConstraint(
+                fields=['event', 'message', 'recipient'],
+                condition=models.Q(reply__isnull=True),
+                name='unique_message_notification'
+            ),
+            models.UniqueConstraint(fields=['reply', 'recipient'], name='unique_reply_notification'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_event_display()} to {self.recipient} ({self.status})"
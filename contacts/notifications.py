@@ -0,0 +1,256 @@
+"""
+Email notifications for contact messages and replies
+
+Nothing is sent during the request. Creating a message or a reply writes
+``Notification`` rows (the outbox) in the same transaction, and a worker
+sends them later:
+
+* a new message notifies the editors and super admins
+* a reply from staff notifies the message's sender; a reply from the
+  sender, or an internal note, notifies the other staff
+
+Staff notifications are digests when ``CONTACT_NOTIFY_DIGEST_MINUTES`` is
+set: they are due at the end of the current window (windows start on the
+clock, every N minutes), and everything due for one address goes out as a
+single email, so an admin gets at most one email per window. Senders are
+always notified at once.
+
+``drain`` claims due rows in batches of ``CONTACT_NOTIFY_BATCH_SIZE`` by
+stamping them with a token (an UPDATE any worker may race for; the rows it
+stamped are the ones it won), then sends the batch over one connection
+from ``EMAIL_BACKEND``. A failed email is retried after
+``CONTACT_NOTIFY_RETRY_BASE`` seconds, doubling each time, and given up
+after ``CONTACT_NOTIFY_MAX_ATTEMPTS``. A claim left by a worker that died
+expires after ``CLAIM_LEASE``, so delivery is at least once.
+
+Each gunicorn worker drains every ``CONTACT_NOTIFY_INTERVAL`` seconds in a
+background thread, or run ``manage.py send_notifications``. With the
+console or locmem backend, call ``drain()`` and read ``mail.outbox``.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import UserRole
+from .models import Notification, NotificationEvent, NotificationStatus
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold claimed rows before another may send them
+CLAIM_LEASE = timedelta(minutes=5)
+RETRY_CAP = timedelta(hours=1)
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def staff_emails(exclude=None):
+    """Addresses of the active editors and super admins"""
+    staff = get_user_model().objects.filter(
+        Q(role__in=[UserRole.EDITOR, UserRole.SUPER_ADMIN]) | Q(is_superuser=True),
+        is_active=True,
+    ).exclude(email='')
+    if exclude is not None:
+        staff = staff.exclude(pk=exclude.pk)
+    return list(staff.values_list('email', flat=True).distinct())
+
+
+def digest_due(now=None):
+    """When a staff notification queued ``now`` is due: the end of its digest window"""
+    now = now or timezone.now()
+    window = settings.CONTACT_NOTIFY_DIGEST_MINUTES * 60
+    if window <= 0:
+        return now
+    ends = (int(now.timestamp()) // window + 1) * window
+    return datetime.fromtimestamp(ends, tz=dt_timezone.utc)
+
+
+def _queue(rows):
+    if not settings.CONTACT_NOTIFY_ENABLED or not rows:
+        return
+    Notification.objects.bulk_create(rows, ignore_conflicts=True)
+    start_worker()
+
+
+def queue_new_messages(message_ids):
+    """Queue the staff notifications for newly stored messages"""
+    if not settings.CONTACT_NOTIFY_ENABLED or not message_ids:
+        return
+    recipients = staff_emails()
+    digest = settings.CONTACT_NOTIFY_DIGEST_MINUTES > 0
+    due = digest_due()
+    _queue([
+        Notification(
+            recipient=email, event=NotificationEvent.NEW_MESSAGE, message_id=message_id,
+            digest=digest, send_after=due,
+        )
+        for message_id in message_ids
+        for email in recipients
+    ])
+
+
+def queue_reply(reply):
+    """Queue the notifications for a new reply (see the module docstring for who gets one)"""
+    if not settings.CONTACT_NOTIFY_ENABLED:
+        return
+    message = reply.message
+    now = timezone.now()
+    sender_email = message.sender.email if message.sender_id else message.sender_email
+    if reply.is_internal or reply.author_id == message.sender_id:
+        digest = settings.CONTACT_NOTIFY_DIGEST_MINUTES > 0
+        recipients, due = staff_emails(exclude=reply.author), digest_due(now)
+    else:
+        digest = False
+        recipients, due = [sender_email] if sender_email else [], now
+    _queue([
+        Notification(
+            recipient=email, event=NotificationEvent.REPLY, message=message, reply=reply,
+            digest=digest, send_after=due,
+        )
+        for email in recipients
+    ])
+
+
+def claim(batch_size, now=None):
+    """Claim up to ``batch_size`` due notifications for this worker and return them"""
+    now = now or timezone.now()
+    due = Notification.objects.filter(status=NotificationStatus.PENDING, send_after__lte=now).filter(
+        Q(claim__isnull=True) | Q(send_after__lte=now - CLAIM_LEASE)
+    )
+    ids = list(due.order_by('send_after', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4()
+    # Only rows still unclaimed take our token; rows a faster worker took keep theirs
+    due.filter(pk__in=ids).update(claim=token, send_after=now)
+    return list(
+        Notification.objects.filter(claim=token)
+        .select_related('message', 'message__sender', 'reply', 'reply__author')
+        .order_by('id')
+    )
+
+
+def _line(notification):
+    message = notification.message
+    if notification.event == NotificationEvent.REPLY:
+        reply = notification.reply
+        kind = 'Internal note' if reply.is_internal else 'Reply'
+        return f'{kind} from {reply.author.email} on "{message.subject}":\n{reply.content}'
+    sender = message.sender.email if message.sender_id else (message.sender_email or 'anonymous')
+    return f'New {message.get_message_type_display().lower()} from {sender}: "{message.subject}"\n{message.message}'
+
+
+def build_emails(notifications):
+    """``[(EmailMessage, [notification, ...])]``: one email per immediate row, one per digest recipient"""
+    groups = defaultdict(list)
+    for notification in notifications:
+        key = (notification.recipient,) if notification.digest else (notification.recipient, notification.pk)
+        groups[key].append(notification)
+    emails = []
+    for rows in groups.values():
+        if len(rows) == 1 and not rows[0].digest:
+            prefix = 'Re: ' if rows[0].event == NotificationEvent.REPLY else ''
+            subject = f'[Portfolio] {prefix}{rows[0].message.subject}'
+        else:
+            subject = f'[Portfolio] {len(rows)} new contact notification{"s" if len(rows) != 1 else ""}'
+        body = '\n\n---\n\n'.join(_line(row) for row in rows)
+        emails.append((EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [rows[0].recipient]), rows))
+    return emails
+
+
+def _retry(rows, error, now):
+    for row in rows:
+        attempts = row.attempts + 1
+        failed = attempts >= settings.CONTACT_NOTIFY_MAX_ATTEMPTS
+        delay = min(timedelta(seconds=settings.CONTACT_NOTIFY_RETRY_BASE * 2 ** (attempts - 1)), RETRY_CAP)
+        Notification.objects.filter(pk=row.pk).update(
+            status=NotificationStatus.FAILED if failed else NotificationStatus.PENDING,
+            attempts=attempts,
+            send_after=now + delay,
+            last_error=str(error)[:1000],
+            claim=None,
+        )
+        if failed:
+            logger.error('Giving up on notification %s to %s: %s', row.pk, row.recipient, error)
+
+
+def send_batch(notifications):
+    """Send claimed notifications over one connection; returns the number of emails sent"""
+    emails = build_emails(notifications)
+    if not emails:
+        return 0
+    now = timezone.now()
+    sent_ids, sent = [], 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning('Could not connect to send %d notification emails: %s', len(emails), exc)
+        _retry(notifications, exc, now)
+        return 0
+    try:
+        for email, rows in emails:
+            email.connection = connection
+            try:
+                email.send()
+            except Exception as exc:
+                logger.warning('Notification email to %s failed: %s', rows[0].recipient, exc)
+                _retry(rows, exc, now)
+            else:
+                sent_ids.extend(row.pk for row in rows)
+                sent += 1
+    finally:
+        connection.close()
+    Notification.objects.filter(pk__in=sent_ids).update(
+        status=NotificationStatus.SENT, sent_at=timezone.now(), claim=None
+    )
+    return sent
+
+
+def drain(batch_size=None, limit=None):
+    """Send due notifications batch by batch until none are due; returns the number of emails sent"""
+    batch_size = batch_size or settings.CONTACT_NOTIFY_BATCH_SIZE
+    sent = 0
+    while limit is None or sent < limit:
+        notifications = claim(batch_size)
+        if not notifications:
+            break
+        sent += send_batch(notifications)
+    return sent
+
+
+def _drain_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            drain()
+        except Exception:
+            logger.exception('Notification drain failed')
+        finally:
+            close_old_connections()
+
+
+def start_worker():
+    """Start this process's background sender, once, unless notifications or in-process sending are off"""
+    global _worker
+    interval = settings.CONTACT_NOTIFY_INTERVAL
+    if not settings.CONTACT_NOTIFY_ENABLED or interval <= 0:
+        return
+    with _worker_lock:
+        # Threads do not survive a fork, so a forked worker starts its own
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(
+            target=_drain_forever, args=(interval,), name='contact-notifier', daemon=True
+        )
+        _worker.start()
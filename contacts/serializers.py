@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import ContactMessage, MessageReply, MessageType, MessageStatus
+from accounts.models import User
 from accounts.serializers import UserSerializer
 
 
@@ -21,13 +23,17 @@ class ContactMessageSerializer(serializers.ModelSerializer):
             'message', 'project_budget', 'project_timeline', 'attachments',
             'status', 'priority', 'admin_notes', 'responded_by',
             'replied_by_name', 'responded_at', 'reply_count',
+            'duplicate_count', 'last_duplicate_at',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'sender', 'sender_name', 'status', 'admin_notes',
             'responded_by', 'replied_by_name', 'responded_at',
+            'duplicate_count', 'last_duplicate_at',
             'created_at', 'updated_at'
         ]
+        # What method fields read (see portfolio_api.sparse_fields)
+        field_sources = {'reply_count': []}
     
     def get_reply_count(self, obj):
         return obj.replies.count()
@@ -51,6 +57,8 @@ class ContactMessageCreateSerializer(serializers.ModelSerializer):
             'sender_name', 'sender_email', 'message_type', 'subject', 'message',
             'project_budget', 'project_timeline', 'attachments'
         ]
+        # Bounds the work per anonymous request, e.g. fingerprinting in contacts.dedup
+        extra_kwargs = {'message': {'max_length': settings.CONTACT_MESSAGE_MAX_LENGTH}}
     
     def validate(self, attrs):
         # For anonymous submissions, require name and email
@@ -84,9 +92,15 @@ class ContactMessageListSerializer(serializers.ModelSerializer):
         model = ContactMessage
         fields = [
             'id', 'sender_display_name', 'sender_display_email', 'message_type',
-            'subject', 'status', 'priority', 'reply_count',
+            'subject', 'status', 'priority', 'reply_count', 'duplicate_count',
             'created_at', 'updated_at'
         ]
+        # What method fields read (see portfolio_api.sparse_fields)
+        field_sources = {
+            'sender_display_name': ['sender', 'sender_name'],
+            'sender_display_email': ['sender', 'sender_email'],
+            'reply_count': [],
+        }
     
     def get_sender_display_name(self, obj):
         """Get sender name from authenticated user or anonymous submission"""
@@ -101,6 +115,9 @@ class ContactMessageListSerializer(serializers.ModelSerializer):
         return obj.sender_email
     
     def get_reply_count(self, obj):
+        # Annotated by ContactMessageViewSet for lists
+        if hasattr(obj, 'reply_count'):
+            return obj.reply_count
         return obj.replies.count()
 
 
@@ -126,6 +143,46 @@ class MessageReplySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'author', 'author_name', 'created_at', 'updated_at']
 
 
+class ThreadAuthorSerializer(serializers.ModelSerializer):
+    """Reply author in a thread: the user row only, no nested profile"""
+    full_name = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'full_name', 'role']
+
+
+class ThreadReplySerializer(serializers.ModelSerializer):
+    """Reply in a conversation thread"""
+    author = ThreadAuthorSerializer(read_only=True)
+    
+    class Meta:
+        model = MessageReply
+        fields = ['id', 'author', 'content', 'is_internal', 'created_at', 'updated_at']
+
+
+class ThreadMessageSerializer(ContactMessageListSerializer):
+    """Message heading a conversation thread; reads only the message and its joined users"""
+    reply_count = None
+    responded_by_name = serializers.CharField(
+        source='responded_by.full_name',
+        read_only=True,
+        allow_null=True
+    )
+    
+    class Meta(ContactMessageListSerializer.Meta):
+        fields = [
+            'id', 'sender_display_name', 'sender_display_email', 'message_type',
+            'subject', 'message', 'project_budget', 'project_timeline', 'attachments',
+            'status', 'priority', 'responded_by_name', 'responded_at',
+            'duplicate_count', 'created_at', 'updated_at'
+        ]
+        field_sources = {
+            'sender_display_name': ['sender', 'sender_name'],
+            'sender_display_email': ['sender', 'sender_email'],
+        }
+
+
 class MessageReplyCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating message replies"""
     
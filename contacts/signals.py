@@ -0,0 +1,19 @@
+"""
+Publish inbox events (see contacts.events) when messages and replies are saved
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .events import message_event, publish, reply_event
+from .models import ContactMessage, MessageReply
+
+
+@receiver(post_save, sender=ContactMessage, dispatch_uid='contacts.message_event')
+def message_saved(sender, instance, created, **kwargs):
+    publish(message_event(instance, 'message.created' if created else 'message.updated'))
+
+
+@receiver(post_save, sender=MessageReply, dispatch_uid='contacts.reply_event')
+def reply_saved(sender, instance, created, **kwargs):
+    if created:
+        publish(reply_event(instance))
@@ -0,0 +1,331 @@
+"""
+Write-behind spool for contact form submissions
+
+With ``CONTACT_SPOOL_ENABLED``, a submission is validated as before, then
+written to a file in ``CONTACT_SPOOL_DIR`` and acknowledged with 202
+Accepted. The database insert happens later, in batches, so a burst of
+submissions costs one INSERT per batch rather than one per request.
+
+The spool is a directory of JSON files, one per submission, written to
+``tmp/`` and renamed into ``new/`` once on disk, so a flusher never sees a
+half-written file and a crash loses nothing that was acknowledged. Names
+start with the submission time, so files are inserted oldest first.
+
+Submissions that repeat a recent message (see ``contacts.dedup``) are
+spooled as a reference to it instead, and the flush adds them to its
+``duplicate_count``.
+
+``flush`` inserts the waiting files with ``bulk_create`` and deletes them.
+One process flushes at a time (a flock on ``flush.lock``). The message ids
+are chosen at submission, so a flush that dies between the insert and the
+deletes is harmless: the next one skips rows that already exist (repeats
+it counted are counted again). The staff notification emails (see
+``contacts.notifications``) are queued in the same transaction. Files that
+cannot be read, built into a message or inserted are moved to ``failed/``
+and logged, so one bad file never holds up the rest.
+
+Flushing runs in a background thread of each worker every
+``CONTACT_SPOOL_FLUSH_INTERVAL`` seconds (started by gunicorn's
+``post_worker_init`` hook, or by the first submission), or from
+``manage.py flush_contact_spool``. Once ``CONTACT_SPOOL_HIGH_WATER``
+submissions are waiting, new ones get 503 with a Retry-After header until
+the flushers catch up.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from portfolio_api.metrics import record_rejection
+
+from .dedup import fingerprint, fold_duplicates, remember
+from .events import message_event, publish
+from .notifications import queue_new_messages
+from .models import ContactMessage
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# How long a worker trusts its last count of waiting files
+DEPTH_CACHE_SECONDS = 1.0
+# A record the database refuses, or whose fields no longer convert
+REJECTED = (DatabaseError, ValidationError, ValueError, KeyError)
+
+_depth = (0.0, 0)
+_flusher = None
+_flusher_lock = threading.Lock()
+_local_flush_lock = threading.Lock()
+
+
+class SpoolFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'We are receiving a lot of messages right now. Please retry shortly.'
+    default_code = 'spool_full'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = settings.CONTACT_SPOOL_RETRY_AFTER
+
+
+def spool_path(*parts):
+    return os.path.join(settings.CONTACT_SPOOL_DIR, *parts)
+
+
+def spool_depth():
+    """Submissions waiting to be inserted, counted at most once per ``DEPTH_CACHE_SECONDS``"""
+    global _depth
+    checked, depth = _depth
+    if time.monotonic() - checked > DEPTH_CACHE_SECONDS:
+        try:
+            with os.scandir(spool_path('new')) as entries:
+                depth = sum(1 for entry in entries if entry.name.endswith('.json'))
+        except FileNotFoundError:
+            depth = 0
+        _depth = (time.monotonic(), depth)
+    return depth
+
+
+def enqueue(fields, sender_id=None, ip_address=None, user_agent='', content_hash='', minhash=None,
+            duplicate_of=None):
+    """
+    Write a validated submission (the create serializer's ``validated_data``)
+    to the spool and return the id its message will have, or only a repeat
+    of message ``duplicate_of``. Raises ``SpoolFull`` past the high-water
+    mark.
+    """
+    global _depth
+    if spool_depth() >= settings.CONTACT_SPOOL_HIGH_WATER:
+        raise SpoolFull()
+
+    if duplicate_of is not None:
+        message_id = duplicate_of
+        record = {'duplicate_of': str(duplicate_of), 'submitted_at': timezone.now().isoformat()}
+    else:
+        message_id = uuid.uuid4()
+        record = {
+            'id': str(message_id),
+            'submitted_at': timezone.now().isoformat(),
+            'sender_id': sender_id,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'content_hash': content_hash,
+            'minhash': minhash.hex() if minhash else None,
+            'fields': fields,
+        }
+    name = f'{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex}.json'
+    os.makedirs(spool_path('tmp'), exist_ok=True)
+    os.makedirs(spool_path('new'), exist_ok=True)
+    with open(spool_path('tmp', name), 'w') as fh:
+        json.dump(record, fh, cls=DjangoJSONEncoder)
+        fh.flush()
+        if settings.CONTACT_SPOOL_FSYNC:
+            os.fsync(fh.fileno())
+    os.replace(spool_path('tmp', name), spool_path('new', name))
+    _depth = (_depth[0], _depth[1] + 1)
+
+    start_flusher()
+    return message_id
+
+
+def spool_submission(request, serializer, sender=None):
+    """
+    Spool a valid create serializer's submission from ``request``, or a
+    repeat of the message it duplicates; returns the message id
+    """
+    sender_id = sender.pk if sender else None
+    duplicate_of, key, digest, near = fingerprint(serializer.validated_data, sender_id)
+    try:
+        message_id = enqueue(
+            serializer.validated_data,
+            sender_id=sender_id,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            content_hash=digest,
+            minhash=near,
+            duplicate_of=duplicate_of,
+        )
+    except SpoolFull:
+        record_rejection(request, 'backpressure')
+        raise
+    if duplicate_of is None:
+        remember(message_id, key, digest, near)
+    return message_id
+
+
+@contextmanager
+def flush_lock():
+    """True when this process may flush; one flusher per spool directory at a time"""
+    if not _local_flush_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(settings.CONTACT_SPOOL_DIR, exist_ok=True)
+        fd = os.open(spool_path('flush.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            os.close(fd)  # Releases the lock
+    finally:
+        _local_flush_lock.release()
+
+
+def build_message(record):
+    """Unsaved ``ContactMessage`` for a spooled record"""
+    message = ContactMessage(
+        id=uuid.UUID(record['id']),
+        sender_id=record['sender_id'],
+        ip_address=record['ip_address'],
+        user_agent=record['user_agent'],
+        content_hash=record.get('content_hash', ''),
+        minhash=bytes.fromhex(record['minhash']) if record.get('minhash') else None,
+    )
+    for name, value in record['fields'].items():
+        setattr(message, name, ContactMessage._meta.get_field(name).to_python(value))
+    return message
+
+
+def _read(names):
+    """``[(name, record)]`` for spooled files; unreadable ones are moved to failed/"""
+    records = []
+    for name in names:
+        try:
+            with open(spool_path('new', name)) as fh:
+                records.append((name, json.load(fh)))
+        except FileNotFoundError:
+            continue
+        except ValueError:
+            logger.error('Unreadable contact spool file %s', name)
+            _fail(name)
+    return records
+
+
+def _fail(name):
+    os.makedirs(spool_path('failed'), exist_ok=True)
+    os.replace(spool_path('new', name), spool_path('failed', name))
+
+
+def _insert(records):
+    """Insert one batch, then count its repeats; ids already in the table are skipped"""
+    repeats, last_seen = Counter(), {}
+    for _, record in records:
+        if 'duplicate_of' in record:
+            repeats[record['duplicate_of']] += 1
+            last_seen[record['duplicate_of']] = parse_datetime(record['submitted_at'])
+    records = [item for item in records if 'duplicate_of' not in item[1]]
+    messages = [build_message(record) for _, record in records]
+    sender_ids = {message.sender_id for message in messages if message.sender_id}
+    if sender_ids:
+        # Senders deleted since they submitted make the message anonymous
+        existing = set(get_user_model().objects.filter(pk__in=sender_ids).values_list('pk', flat=True))
+        for message in messages:
+            if message.sender_id not in existing:
+                message.sender_id = None
+    with transaction.atomic():
+        ContactMessage.objects.bulk_create(messages, ignore_conflicts=True)
+        # auto_now_add stamped the flush time; keep the submission time
+        for message, (_, record) in zip(messages, records):
+            message.created_at = parse_datetime(record['submitted_at'])
+        ContactMessage.objects.bulk_update(messages, ['created_at'])
+        fold_duplicates(repeats, last_seen)
+        # bulk_create sends no signals; queue the emails here (re-queueing after a crash is a no-op)
+        # and publish the inbox events contacts.signals would have
+        queue_new_messages([message.pk for message in messages])
+        for message in messages:
+            publish(message_event(message, 'message.created'))
+
+
+def flush(batch_size=None, limit=None):
+    """
+    Insert waiting submissions in batches, oldest first, until the spool is
+    empty or ``limit`` were inserted. Returns the number inserted, or None
+    when another process is flushing.
+    """
+    batch_size = batch_size or settings.CONTACT_SPOOL_BATCH_SIZE
+    with flush_lock() as locked:
+        if not locked:
+            return None
+        inserted = 0
+        while limit is None or inserted < limit:
+            try:
+                names = sorted(name for name in os.listdir(spool_path('new')) if name.endswith('.json'))
+            except FileNotFoundError:
+                break
+            records = _read(names[:batch_size])
+            if not records:
+                if len(names) <= batch_size:
+                    break
+                continue
+            try:
+                _insert(records)
+                done = records
+            except REJECTED:
+                # Find the records the database rejects and set them aside
+                logger.exception('Contact spool batch failed; inserting one at a time')
+                done = []
+                for item in records:
+                    try:
+                        _insert([item])
+                        done.append(item)
+                    except REJECTED:
+                        logger.exception('Contact spool file %s rejected', item[0])
+                        _fail(item[0])
+            for name, _ in done:
+                try:
+                    os.remove(spool_path('new', name))
+                except FileNotFoundError:
+                    pass
+            inserted += len(done)
+        return inserted
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Contact spool flush failed')
+        finally:
+            close_old_connections()
+
+
+def start_flusher():
+    """Start this process's background flusher, once, unless the spool or in-process flushing is off"""
+    global _flusher
+    interval = settings.CONTACT_SPOOL_FLUSH_INTERVAL
+    if not settings.CONTACT_SPOOL_ENABLED or interval <= 0:
+        return
+    with _flusher_lock:
+        # Threads do not survive a fork, so a forked worker starts its own
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(
+            target=_flush_forever, args=(interval,), name='contact-spool-flusher', daemon=True
+        )
+        _flusher.start()
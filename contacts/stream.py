@@ -0,0 +1,113 @@
+"""
+Server-Sent Events stream of inbox events for editors
+
+    GET /api/contacts/events/
+    Accept: text/event-stream
+
+The stream opens with a ``stats`` event (the body of
+``/api/contacts/messages/statistics/``), then carries the events of
+``contacts.events`` as they happen, each as ``event: <type>`` with the
+event as JSON data, and a comment every ``CONTACT_EVENTS_HEARTBEAT``
+seconds so proxies keep the connection open. On ``resync`` the client
+should refetch what it shows.
+
+Authenticate with the session cookie (``EventSource`` sends it) or an
+``Authorization: Bearer`` header (with an EventSource polyfill or
+``fetch``). Tokens are not accepted in the query string, where they would
+end up in access logs.
+
+A stream holds a coroutine rather than a worker, so it is only served by
+the ASGI app (gunicorn_asgi_config.py); under WSGI it answers 503.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from portfolio_api.async_views import error_response
+
+from .events import get_broker
+from .models import ContactMessage, MessageStatus
+
+
+@sync_to_async
+def authenticate(request):
+    """The request's user from a bearer token or the session, or None"""
+    drf_request = Request(request, authenticators=[JWTAuthentication(), SessionAuthentication()])
+    try:
+        user = drf_request.user
+    except APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+async def inbox_stats():
+    """Counts matching ``ContactMessageViewSet.statistics``"""
+    counts = await ContactMessage.objects.aaggregate(
+        total_messages=Count('id'),
+        new_messages=Count('id', filter=Q(status=MessageStatus.NEW)),
+        in_progress=Count('id', filter=Q(status=MessageStatus.IN_PROGRESS)),
+        responded=Count('id', filter=Q(status=MessageStatus.RESPONDED)),
+        priority_count=Count('id', filter=Q(priority=True)),
+    )
+    by_type = ContactMessage.objects.order_by().values('message_type').annotate(count=Count('id'))
+    counts['by_type'] = {row['message_type']: row['count'] async for row in by_type}
+    return counts
+
+
+def format_event(event):
+    data = json.dumps(event, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'event: {event["type"]}\ndata: {data}\n\n'
+
+
+async def event_stream(subscription, stats):
+    try:
+        yield f'retry: 5000\n{format_event({"type": "stats", **stats})}'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.CONTACT_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        subscription.close()
+
+
+async def inbox_events(request):
+    if request.method != 'GET':
+        return error_response('Method not allowed.', status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not settings.CONTACT_EVENTS_ENABLED:
+        return error_response('Live inbox events are disabled.', status.HTTP_404_NOT_FOUND)
+    if not isinstance(request, ASGIRequest):
+        return error_response('Live inbox events need the ASGI server.', status.HTTP_503_SERVICE_UNAVAILABLE)
+    user = await authenticate(request)
+    if user is None:
+        return error_response('Authentication credentials were not provided.', status.HTTP_401_UNAUTHORIZED)
+    if not user.can_edit():
+        return error_response(
+            'You do not have permission to perform this action.', status.HTTP_403_FORBIDDEN
+        )
+
+    # Subscribe before counting, so nothing between the two is missed
+    subscription = get_broker().subscribe()
+    try:
+        stats = await inbox_stats()
+    except BaseException:
+        subscription.close()
+        raise
+    response = StreamingHttpResponse(event_stream(subscription, stats), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
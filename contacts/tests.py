@@ -1,3 +1,549 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import UserRole
+from portfolio_api.testing import PortfolioTestCase
+
+from . import dedup, events, notifications, spool, stream
+from .models import ContactMessage, MessageReply, Notification, NotificationStatus
+
+
+class ContactQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over its viewset's query_budget"""
+
+    def test_message_list(self):
+        self.get_ok('/api/contacts/messages/', user=self.admin)
+        self.get_ok('/api/contacts/messages/', {'page': 2}, user=self.admin)
+        self.get_ok('/api/contacts/messages/', {'status': 'new', 'search': 'Hello'}, user=self.admin)
+
+    def test_message_retrieve(self):
+        message = MessageReply.objects.values_list('message_id', flat=True).first()
+        self.get_ok(f'/api/contacts/messages/{message}/', user=self.admin)
+
+    def test_statistics(self):
+        self.get_ok('/api/contacts/messages/statistics/', user=self.admin)
+
+    def test_thread(self):
+        message = MessageReply.objects.values_list('message_id', flat=True).first()
+        self.get_ok(f'/api/contacts/messages/{message}/thread/', user=self.admin)
+
+    def test_reply_list(self):
+        self.get_ok('/api/contacts/replies/', user=self.admin)
+        message = ContactMessage.objects.filter(replies__isnull=False).values_list('pk', flat=True).first()
+        self.get_ok('/api/contacts/replies/', {'message_id': message}, user=self.admin)
+
+    def test_reply_retrieve(self):
+        self.get_ok(f'/api/contacts/replies/{MessageReply.objects.values_list("pk", flat=True).first()}/', user=self.admin)
+
+
+class ContactTestCase(APITestCase):
+    """Spool in a temporary directory, no background threads, fresh in-process state"""
+
+    def setUp(self):
+        cache.clear()
+        spool_dir = tempfile.mkdtemp(prefix='contact-spool-')
+        self.addCleanup(shutil.rmtree, spool_dir, ignore_errors=True)
+        overrides = self.settings(
+            CONTACT_SPOOL_DIR=spool_dir,
+            CONTACT_SPOOL_FLUSH_INTERVAL=0,
+            CONTACT_NOTIFY_INTERVAL=0,
+            CONTACT_EVENTS_BACKEND='contacts.events.LocalBackend',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        spool._depth = (0.0, 0)
+        dedup._index = None
+        self.addCleanup(setattr, dedup, '_index', None)
+
+    def submit(self, subject='Project enquiry', message='I would like to talk about a new project.', **fields):
+        data = {
+            'sender_name': 'Ada', 'sender_email': 'ada@example.com', 'message_type': 'general',
+            'subject': subject, 'message': message, **fields,
+        }
+        return self.client.post('/api/contacts/submit/', data, format='json')
+
+    def spooled(self, folder='new'):
+        try:
+            return sorted(os.listdir(spool.spool_path(folder)))
+        except FileNotFoundError:
+            return []
+
+
+@override_settings(CONTACT_SPOOL_ENABLED=True, CONTACT_DEDUP_ENABLED=False)
+class SpoolTests(ContactTestCase):
+    def test_submission_is_spooled_then_flushed(self):
+        get_user_model().objects.create_user('editor@example.com', role=UserRole.EDITOR)
+        response = self.submit()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(self.spooled()), 1)
+        self.assertFalse(ContactMessage.objects.exists())
+
+        self.assertEqual(spool.flush(), 1)
+        message = ContactMessage.objects.get()
+        self.assertEqual(str(message.pk), response.json()['id'])
+        self.assertEqual(message.subject, 'Project enquiry')
+        self.assertEqual(self.spooled(), [])
+        self.assertEqual(list(Notification.objects.values_list('recipient', 'message')), [('editor@example.com', message.pk)])
+
+    def test_flush_inserts_in_batches_oldest_first(self):
+        for i in range(5):
+            self.submit(subject=f'Message {i}')
+        self.assertEqual(spool.flush(batch_size=2), 5)
+        messages = ContactMessage.objects.order_by('created_at')
+        self.assertEqual([message.subject for message in messages], [f'Message {i}' for i in range(5)])
+
+    def test_replay_after_crash_skips_inserted_rows(self):
+        self.submit()
+        name = self.spooled()[0]
+        with open(spool.spool_path('new', name)) as fh:
+            record = fh.read()
+        spool.flush()
+        # A flush that died after its INSERT but before deleting the file
+        with open(spool.spool_path('new', name), 'w') as fh:
+            fh.write(record)
+
+        self.assertEqual(spool.flush(), 1)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(self.spooled(), [])
+
+    @override_settings(CONTACT_SPOOL_HIGH_WATER=2, CONTACT_SPOOL_RETRY_AFTER=7)
+    def test_backpressure_past_high_water(self):
+        self.assertEqual(self.submit(subject='One').status_code, 202)
+        self.assertEqual(self.submit(subject='Two').status_code, 202)
+        response = self.submit(subject='Three')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertEqual(len(self.spooled()), 2)
+
+    def test_unreadable_file_moves_to_failed(self):
+        self.submit()
+        os.makedirs(spool.spool_path('new'), exist_ok=True)
+        with open(spool.spool_path('new', '00000000000000000000-0-broken.json'), 'w') as fh:
+            fh.write('{not json')
+
+        self.assertEqual(spool.flush(), 1)
+        self.assertEqual(self.spooled('failed'), ['00000000000000000000-0-broken.json'])
+        self.assertEqual(self.spooled(), [])
+
+    def edit_record(self, name, **fields):
+        with open(spool.spool_path('new', name)) as fh:
+            record = json.load(fh)
+        record['fields'].update(fields)
+        with open(spool.spool_path('new', name), 'w') as fh:
+            json.dump(record, fh)
+
+    def test_unconvertible_record_moves_to_failed_and_the_rest_are_inserted(self):
+        self.submit(subject='Good')
+        self.submit(subject='Bad')
+        bad = self.spooled()[1]
+        self.edit_record(bad, project_budget='a lot')
+
+        with self.assertLogs('contacts.spool', 'ERROR'):
+            self.assertEqual(spool.flush(), 1)
+        self.assertEqual(list(ContactMessage.objects.values_list('subject', flat=True)), ['Good'])
+        self.assertEqual(self.spooled('failed'), [bad])
+        self.assertEqual(self.spooled(), [])
+
+    def test_record_the_database_rejects_moves_to_failed(self):
+        self.submit(subject='Good')
+        self.submit(subject='Bad')
+        bad = self.spooled()[1]
+        bulk_create = ContactMessage.objects.bulk_create
+
+        def reject_bad(messages, **kwargs):
+            if any(message.subject == 'Bad' for message in messages):
+                raise IntegrityError('rejected')
+            return bulk_create(messages, **kwargs)
+
+        with mock.patch.object(ContactMessage.objects, 'bulk_create', side_effect=reject_bad):
+            with self.assertLogs('contacts.spool', 'ERROR'):
+                self.assertEqual(spool.flush(), 1)
+        self.assertEqual(list(ContactMessage.objects.values_list('subject', flat=True)), ['Good'])
+        self.assertEqual(self.spooled('failed'), [bad])
+
+
+LONG_TEXT = 'We are planning a new online shop for handmade furniture and need help with the backend and payments.'
+
+
+@override_settings(CONTACT_SPOOL_ENABLED=False, CONTACT_DEDUP_ENABLED=True)
+class DedupTests(ContactTestCase):
+    def test_exact_repeat_is_folded(self):
+        first = self.submit()
+        again = self.submit(subject='PROJECT enquiry!', message='I would like to talk about a new project')
+        self.assertEqual((first.status_code, again.status_code), (201, 201))
+        self.assertEqual(again.json()['id'], first.json()['id'])
+        message = ContactMessage.objects.get()
+        self.assertEqual(message.duplicate_count, 1)
+        self.assertIsNotNone(message.last_duplicate_at)
+
+    def test_near_duplicate_is_folded(self):
+        first = self.submit(message=LONG_TEXT)
+        again = self.submit(message=LONG_TEXT.replace('handmade', 'vintage'))
+        self.assertEqual(again.json()['id'], first.json()['id'])
+        self.assertEqual(ContactMessage.objects.get().duplicate_count, 1)
+
+    def test_different_text_is_kept(self):
+        self.submit(message=LONG_TEXT)
+        self.submit(message='Could you speak at our meetup about Django performance next spring in Accra?')
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_other_senders_are_not_folded(self):
+        ids = {
+            self.submit(sender_name=name, sender_email=f'{name}@example.com').json()['id']
+            for name in ('bob', 'eve', 'carol')
+        }
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(
+            sorted(ContactMessage.objects.values_list('sender_email', flat=True)),
+            ['bob@example.com', 'carol@example.com', 'eve@example.com'],
+        )
+        self.assertEqual(self.submit(sender_email='BOB@example.com').status_code, 201)
+        self.assertEqual(ContactMessage.objects.get(sender_email='bob@example.com').duplicate_count, 1)
+
+    def test_messages_from_other_workers_are_loaded(self):
+        first = self.submit()
+        dedup._index = None  # A fresh process
+        self.assertEqual(self.submit().json()['id'], first.json()['id'])
+
+    @override_settings(CONTACT_DEDUP_TTL=60)
+    def test_fingerprints_expire_after_the_ttl(self):
+        self.submit()
+        later = time.time() + 61
+        with mock.patch('contacts.dedup.time.time', return_value=later):
+            self.submit()
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertEqual(ContactMessage.objects.filter(duplicate_count__gt=0).count(), 0)
+
+    def test_index_expires_entries(self):
+        index = dedup.DedupIndex(ttl=60, threshold=0.7, max_entries=2)
+        near = dedup.minhash('', LONG_TEXT)
+        index.add('old', 'email:a', 'digest-old', near, added_at=time.time() - 61)
+        index.add('new', 'email:a', 'digest-new', None)
+        self.assertIsNone(index.match('email:a', 'digest-old', near))
+        self.assertEqual(index.match('email:a', 'digest-new', None), 'new')
+        for i in range(2):
+            index.add(f'more-{i}', 'email:a', f'digest-{i}', None)
+        self.assertIsNone(index.match('email:a', 'digest-new', None))  # Over max_entries
+
+    def test_overlong_message_is_rejected(self):
+        response = self.submit(message='x' * (settings.CONTACT_MESSAGE_MAX_LENGTH + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('message', response.json()['errors'])
+        self.assertFalse(ContactMessage.objects.exists())
+
+    @override_settings(CONTACT_DEDUP_MAX_WORDS=50)
+    def test_only_the_start_of_long_texts_is_shingled(self):
+        words = [f'word{i}' for i in range(5000)]
+        start = ' '.join(words[:48])
+        self.assertEqual(dedup.minhash('', ' '.join(words)), dedup.minhash('', start + ' word48 word49'))
+        self.assertNotEqual(dedup.minhash('', ' '.join(words)), dedup.minhash('', start + ' other words'))
+
+    @override_settings(CONTACT_SPOOL_ENABLED=True)
+    def test_spooled_repeats_are_counted_at_flush(self):
+        first = self.submit().json()['id']
+        self.assertEqual(self.submit().json()['id'], first)
+        self.assertNotEqual(self.submit(sender_email='eve@example.com').json()['id'], first)
+        spool.flush()
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertEqual(ContactMessage.objects.get(pk=first).duplicate_count, 1)
+
+
+@override_settings(CONTACT_SPOOL_ENABLED=False, CONTACT_DEDUP_ENABLED=False, CONTACT_NOTIFY_RETRY_BASE=60)
+class NotificationTests(ContactTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ('editor', 'owner'):
+            get_user_model().objects.create_user(f'{name}@example.com', role=UserRole.EDITOR)
+
+    def make_due(self):
+        Notification.objects.update(send_after=timezone.now())
+
+    def test_new_message_notifies_staff_at_once(self):
+        self.submit()
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(notifications.drain(), 2)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ['editor@example.com', 'owner@example.com'])
+        self.assertEqual(mail.outbox[0].subject, '[Portfolio] Project enquiry')
+        self.assertFalse(Notification.objects.exclude(status=NotificationStatus.SENT).exists())
+        self.assertEqual(notifications.drain(), 0)
+
+    @override_settings(CONTACT_NOTIFY_DIGEST_MINUTES=15)
+    def test_digest_sends_one_email_per_recipient(self):
+        for i in range(3):
+            self.submit(subject=f'Enquiry {i}')
+        self.assertEqual(notifications.drain(), 0)  # Not before the window ends
+        self.make_due()
+        self.assertEqual(notifications.drain(), 2)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ['editor@example.com', 'owner@example.com'])
+        for email in mail.outbox:
+            self.assertEqual(email.subject, '[Portfolio] 3 new contact notifications')
+            for i in range(3):
+                self.assertIn(f'"Enquiry {i}"', email.body)
+
+    def test_digest_window_ends_on_the_clock(self):
+        with self.settings(CONTACT_NOTIFY_DIGEST_MINUTES=15):
+            due = notifications.digest_due(datetime(2024, 5, 1, 10, 7, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual(due, datetime(2024, 5, 1, 10, 15, tzinfo=dt_timezone.utc))
+
+    def test_claims_are_disjoint(self):
+        self.submit()
+        self.submit(subject='Another enquiry', message='Could you speak at our meetup next spring?')
+        self.make_due()
+        first, second = notifications.claim(3), notifications.claim(3)
+        self.assertEqual((len(first), len(second)), (3, 1))
+        self.assertFalse({row.pk for row in first} & {row.pk for row in second})
+        self.assertEqual(notifications.claim(3), [])
+
+    def test_claim_lost_to_a_faster_worker(self):
+        self.submit()
+        update = QuerySet.update
+
+        def raced(queryset, **values):
+            # Another worker stamps the same rows between our SELECT and UPDATE
+            if 'claim' in values and not getattr(raced, 'done', False):
+                raced.done = True
+                notifications.claim(10)
+            return update(queryset, **values)
+
+        with mock.patch.object(QuerySet, 'update', raced):
+            self.assertEqual(notifications.claim(10), [])
+        self.assertTrue(raced.done)
+        self.assertEqual(Notification.objects.filter(claim__isnull=False).values('claim').distinct().count(), 1)
+
+    def test_stale_claim_is_reclaimed(self):
+        self.submit()
+        claimed = notifications.claim(10)
+        self.assertEqual(notifications.claim(10), [])
+        later = timezone.now() + notifications.CLAIM_LEASE + timedelta(seconds=1)
+        reclaimed = notifications.claim(10, now=later)
+        self.assertEqual({row.pk for row in reclaimed}, {row.pk for row in claimed})
+        self.assertNotEqual(reclaimed[0].claim, claimed[0].claim)
+
+    @override_settings(CONTACT_NOTIFY_MAX_ATTEMPTS=2)
+    def test_failed_send_backs_off_then_gives_up(self):
+        self.submit()
+        failing = mock.patch('contacts.notifications.get_connection')
+        with failing as get_connection, self.assertLogs('contacts.notifications', 'WARNING') as logs:
+            get_connection.return_value.send_messages.side_effect = SMTPException('Mailbox unavailable')
+            started = timezone.now()
+            self.assertEqual(notifications.drain(), 0)
+            row = Notification.objects.first()
+            self.assertEqual((row.status, row.attempts, row.claim), (NotificationStatus.PENDING, 1, None))
+            self.assertEqual(row.last_error, 'Mailbox unavailable')
+            self.assertGreaterEqual(row.send_after, started + timedelta(seconds=60))
+            self.assertEqual(notifications.drain(), 0)  # Not due again yet
+
+            self.make_due()
+            self.assertEqual(notifications.drain(), 0)
+            row = Notification.objects.get(pk=row.pk)
+            self.assertEqual((row.status, row.attempts), (NotificationStatus.FAILED, 2))
+            self.assertGreaterEqual(row.send_after, started + timedelta(seconds=120))
+
+            self.make_due()
+            self.assertEqual(notifications.drain(), 0)  # Failed rows are not retried
+            self.assertEqual(Notification.objects.filter(attempts=2).count(), 2)
+        self.assertIn('Giving up on notification', logs.output[-1])
+
+    def test_connection_failure_retries_the_whole_batch(self):
+        self.submit()
+        with mock.patch('contacts.notifications.get_connection') as get_connection:
+            get_connection.return_value.open.side_effect = OSError('Connection refused')
+            with self.assertLogs('contacts.notifications', 'WARNING'):
+                self.assertEqual(notifications.drain(), 0)
+        self.assertEqual(list(Notification.objects.values_list('attempts', flat=True)), [1, 1])
+        self.make_due()
+        self.assertEqual(notifications.drain(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class ThreadTests(ContactTestCase):
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.sender = User.objects.create_user('sender@example.com', role=UserRole.VIEWER)
+        self.editor = User.objects.create_user('editor@example.com', role=UserRole.EDITOR)
+        self.message = ContactMessage.objects.create(
+            sender=self.sender, subject='Project enquiry', message='I would like to talk about a new project.',
+        )
+        MessageReply.objects.bulk_create([
+            MessageReply(message=self.message, author=self.editor, content=f'Reply {i}', is_internal=i % 3 == 0)
+            for i in range(45)
+        ])
+        # Pairs of replies share a timestamp, so the id breaks ties
+        start = timezone.now() - timedelta(hours=1)
+        for i, reply in enumerate(MessageReply.objects.order_by('content')):
+            MessageReply.objects.filter(pk=reply.pk).update(created_at=start + timedelta(seconds=i // 2))
+
+    def expected(self, internal=True):
+        replies = MessageReply.objects.filter(message=self.message)
+        if not internal:
+            replies = replies.filter(is_internal=False)
+        return [str(pk) for _, pk in sorted((reply.created_at, str(reply.pk)) for reply in replies)]
+
+    def pages(self, user, page_size=10):
+        self.client.force_authenticate(user)
+        url, pages = f'/api/contacts/messages/{self.message.pk}/thread/?page_size={page_size}', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            replies = response.json()['replies']
+            pages.append(replies['results'])
+            url = replies['next']
+        return pages
+
+    def test_sender_never_sees_internal_notes(self):
+        pages = self.pages(self.sender)
+        replies = [reply for page in pages for reply in page]
+        self.assertFalse(any(reply['is_internal'] for reply in replies))
+        self.assertEqual([reply['id'] for reply in replies], self.expected(internal=False))
+
+    def test_editor_sees_internal_notes(self):
+        replies = [reply for page in self.pages(self.editor) for reply in page]
+        self.assertEqual(sum(reply['is_internal'] for reply in replies), 15)
+        self.assertEqual(len(replies), 45)
+
+    def test_pages_are_in_created_order(self):
+        pages = self.pages(self.editor)
+        self.assertEqual([len(page) for page in pages], [10, 10, 10, 10, 5])
+        self.assertEqual([reply['id'] for page in pages for reply in page], self.expected())
+
+    def test_next_cursor_is_stable_while_replies_arrive(self):
+        self.client.force_authenticate(self.editor)
+        first = self.client.get(f'/api/contacts/messages/{self.message.pk}/thread/', {'page_size': 10}).json()
+        next_url = first['replies']['next']
+        expected = self.expected()
+        MessageReply.objects.create(message=self.message, author=self.editor, content='A new reply')
+
+        second = self.client.get(next_url).json()['replies']
+        self.assertEqual([reply['id'] for reply in second['results']], expected[10:20])
+        self.assertEqual(self.client.get(next_url).json()['replies'], second)
+        self.assertEqual([page[-1]['content'] for page in self.pages(self.editor)][-1], 'A new reply')
+
+
+class EventTests(ContactTestCase):
+    def setUp(self):
+        super().setUp()
+        events._broker = None
+        self.addCleanup(setattr, events, '_broker', None)
+        User = get_user_model()
+        self.editor = User.objects.create_user('editor@example.com', role=UserRole.EDITOR)
+        self.viewer = User.objects.create_user('viewer@example.com', role=UserRole.VIEWER)
+
+    def bearer(self, user):
+        return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_stream_needs_the_asgi_server(self):
+        response = self.client.get('/api/contacts/events/', headers=self.bearer(self.editor))
+        self.assertEqual(response.status_code, 503)
+
+    async def test_stream_needs_an_editor(self):
+        self.assertEqual((await self.async_client.get('/api/contacts/events/')).status_code, 401)
+        viewer = await sync_to_async(self.bearer)(self.viewer)
+        self.assertEqual((await self.async_client.get('/api/contacts/events/', headers=viewer)).status_code, 403)
+
+    async def test_stream_sends_stats_then_events(self):
+        editor = await sync_to_async(self.bearer)(self.editor)
+        response = await self.async_client.get('/api/contacts/events/', headers=editor)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        first = await anext(chunks)
+        self.assertIn(b'event: stats\n', first)
+        self.assertIn(b'"total_messages":0', first)
+
+        events.get_broker().publish({'type': 'message.updated', 'id': 'abc'})
+        self.assertEqual(
+            await asyncio.wait_for(anext(chunks), timeout=5),
+            b'event: message.updated\ndata: {"type":"message.updated","id":"abc"}\n\n',
+        )
+
+    @override_settings(CONTACT_EVENTS_HEARTBEAT=0.01)
+    async def test_stream_keeps_alive_and_unsubscribes_when_closed(self):
+        broker = events.get_broker()
+        body = stream.event_stream(broker.subscribe(), {'total_messages': 0})
+        self.assertTrue((await anext(body)).startswith('retry: 5000\nevent: stats\n'))
+        self.assertEqual(await anext(body), ': keep-alive\n\n')
+        await body.aclose()
+        self.assertEqual(broker.subscriptions, set())
+
+    async def test_overflow_collapses_into_one_resync(self):
+        subscription = events.Broker(events.LocalBackend()).subscribe(size=3)
+        for i in range(10):
+            subscription.put({'type': 'message.updated', 'id': str(i)})
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertEqual(await subscription.get(), events.RESYNC)
+        subscription.put({'type': 'message.updated', 'id': 'after'})
+        self.assertEqual(await subscription.get(), {'type': 'message.updated', 'id': 'after'})
+
+    async def test_broker_delivers_to_subscriptions(self):
+        broker = events.Broker(events.LocalBackend())
+        subscription = broker.subscribe()
+        event = {'type': 'reply.created', 'id': '1'}
+        # From another thread, like the socket reader
+        await sync_to_async(broker.deliver, thread_sensitive=False)(event)
+        self.assertEqual(await asyncio.wait_for(subscription.get(), timeout=5), event)
+
+        closed = asyncio.new_event_loop()
+        closed.close()
+        stale = events.Subscription(broker, closed, 1)
+        broker.subscriptions.add(stale)
+        broker.deliver(event)
+        self.assertEqual(broker.subscriptions, {subscription})
+
+    def test_socket_backend_reaches_other_workers(self):
+        directory = tempfile.mkdtemp(prefix='events-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        received, arrived = [], threading.Event()
+        events.SocketBackend(directory).start(lambda event: (received.append(event), arrived.set()))
+        # A worker that died without removing its socket
+        dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        dead.bind(os.path.join(directory, '99999-dead.sock'))
+        dead.close()
+
+        events.SocketBackend(directory).send({'type': 'message.created', 'id': 'abc'})
+        self.assertTrue(arrived.wait(5))
+        self.assertEqual(received, [{'type': 'message.created', 'id': 'abc'}])
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_publish_waits_for_commit(self):
+        with mock.patch.object(events, 'get_broker') as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                events.publish({'type': 'message.updated', 'id': 'abc'})
+                get_broker.return_value.publish.assert_not_called()
+            get_broker.return_value.publish.assert_called_once_with({'type': 'message.updated', 'id': 'abc'})
+
+            get_broker.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(ValueError), transaction.atomic():
+                    events.publish({'type': 'message.updated', 'id': 'rolled-back'})
+                    raise ValueError
+            get_broker.return_value.publish.assert_not_called()
+
+    def test_saved_message_is_published(self):
+        broker = mock.Mock()
+        with mock.patch.object(events, 'get_broker', return_value=broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                message = ContactMessage.objects.create(sender_name='Ada', subject='Hello', message='Hi there.')
+        event = broker.publish.call_args.args[0]
+        self.assertEqual((event['type'], event['id']), ('message.created', str(message.pk)))
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import stream, views
 
 router = DefaultRouter()
 router.register(r'messages', views.ContactMessageViewSet, basename='contact-message')
@@ -9,6 +9,8 @@ router.register(r'replies', views.MessageReplyViewSet, basename='message-reply')
 urlpatterns = [
     # Public anonymous contact form submission - NO AUTH REQUIRED!
     path('submit/', views.public_contact_submit, name='public-contact-submit'),
+    # Live inbox events for editors (Server-Sent Events, ASGI only)
+    path('events/', stream.inbox_events, name='contact-events'),
     # Admin endpoints - authentication required
     path('', include(router.urls)),
 ]
@@ -1,25 +1,41 @@
 from rest_framework import status, generics, viewsets, serializers
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 from rest_framework.authentication import SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Q, Count
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Count, Prefetch
 from django.utils import timezone
 
+from accounts.models import User
 from .models import ContactMessage, MessageReply, MessageStatus
+from .dedup import save_or_fold
+from .notifications import queue_new_messages, queue_reply
+from .spool import spool_submission
 from .serializers import (
     ContactMessageSerializer, ContactMessageCreateSerializer,
     ContactMessageListSerializer, ContactMessageAdminSerializer,
     MessageReplySerializer, MessageReplyCreateSerializer,
-    MessageStatsSerializer
+    MessageStatsSerializer, ThreadMessageSerializer, ThreadReplySerializer
 )
 from portfolio_api.permissions import IsEditorOrAbove, IsSuperAdmin, IsOwnerOrAdmin
+from portfolio_api.sparse_fields import SparseFieldsMixin
 from accounts.views import log_user_activity
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ThreadReplyPagination(CursorPagination):
+    """Oldest replies first; the cursor keeps its place as new replies arrive"""
+    ordering = ('created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ContactMessageViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for contact messages
     
@@ -30,12 +46,16 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication, SessionAuthentication]
     # No default permission - will be set by get_permissions
     permission_classes = []
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = {'list': 4, 'retrieve': 5, 'statistics': 8, 'thread': 3}
     
     def get_serializer_class(self):
         if self.action == 'create':
             return ContactMessageCreateSerializer
         elif self.action == 'list':
             return ContactMessageListSerializer
+        elif self.action == 'thread':
+            return ThreadMessageSerializer
         elif self.action in ['update_status', 'update_admin']:
             return ContactMessageAdminSerializer
         return ContactMessageSerializer
@@ -85,25 +105,50 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
                 Q(sender__email__icontains=search)
             )
         
+        if self.action == 'list':
+            queryset = queryset.annotate(reply_count=Count('replies')).order_by('-created_at')
+        
         return queryset.select_related('sender', 'responded_by')
     
+    def create(self, request, *args, **kwargs):
+        if not settings.CONTACT_SPOOL_ENABLED:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sender = request.user if request.user.is_authenticated else None
+        # Inserted by the spool flusher shortly (see contacts/spool.py)
+        message_id = spool_submission(request, serializer, sender)
+        if sender:
+            log_user_activity(
+                sender,
+                'MESSAGE_SENT',
+                request,
+                {'message_id': str(message_id), 'type': serializer.validated_data.get('message_type')}
+            )
+        return Response({'id': str(message_id), **serializer.data}, status=status.HTTP_202_ACCEPTED)
+    
     def perform_create(self, serializer):
         # Capture IP and user agent
         # Sender is optional (anonymous contact form)
         sender = self.request.user if self.request.user.is_authenticated else None
         
-        message = serializer.save(
-            sender=sender,
-            ip_address=self.request.META.get('REMOTE_ADDR'),
-            user_agent=self.request.META.get('HTTP_USER_AGENT', '')
-        )
+        # Repeats of a recent message only bump its duplicate_count (see contacts/dedup.py)
+        with transaction.atomic():
+            message_id, folded = save_or_fold(
+                serializer,
+                sender=sender,
+                ip_address=self.request.META.get('REMOTE_ADDR'),
+                user_agent=self.request.META.get('HTTP_USER_AGENT', '')
+            )
+            if not folded:
+                queue_new_messages([message_id])
         
         if sender:
             log_user_activity(
                 sender,
                 'MESSAGE_SENT',
                 self.request,
-                {'message_id': str(message.id), 'type': message.message_type}
+                {'message_id': str(message_id), 'type': serializer.validated_data.get('message_type')}
             )
     
     def retrieve(self, request, *args, **kwargs):
@@ -158,6 +203,31 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
             'data': ContactMessageSerializer(message).data
         })
     
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """
+        The message and a page of its replies, oldest first, in two queries
+        
+        GET /api/contacts/messages/<id>/thread/?cursor=<next>
+        Internal notes are left out for users who are not editors. Unlike
+        retrieve, this does not mark the message as read.
+        """
+        message = self.get_object()
+        replies = MessageReply.objects.filter(message=message).select_related('author')
+        if not request.user.can_edit():
+            replies = replies.filter(is_internal=False)
+        
+        paginator = ThreadReplyPagination()
+        page = paginator.paginate_queryset(replies, request, view=self)
+        return Response({
+            'message': self.get_serializer(message).data,
+            'replies': {
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': ThreadReplySerializer(page, many=True).data,
+            },
+        })
+    
     @action(detail=False, methods=['get'], permission_classes=[IsEditorOrAbove])
     def statistics(self, request):
         """Get message statistics (admin only)"""
@@ -187,10 +257,11 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class MessageReplyViewSet(viewsets.ModelViewSet):
+class MessageReplyViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for message replies"""
     serializer_class = MessageReplySerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 6, 'retrieve': 5}
     
     def get_queryset(self):
         user = self.request.user
@@ -208,7 +279,13 @@ class MessageReplyViewSet(viewsets.ModelViewSet):
                 is_internal=False
             )
         
-        return queryset.select_related('message', 'author')
+        # Authors are rendered with UserSerializer, including content counts
+        return queryset.select_related('message').prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.with_content_counts().prefetch_related('social_links')
+            )
+        )
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -225,10 +302,13 @@ class MessageReplyViewSet(viewsets.ModelViewSet):
             if not self.request.user.can_edit() and message.sender != self.request.user:
                 raise PermissionError("Cannot reply to this message")
             
-            reply = serializer.save(
-                author=self.request.user,
-                message=message
-            )
+            with transaction.atomic():
+                reply = serializer.save(
+                    author=self.request.user,
+                    message=message
+                )
+                # Emailed by the notification worker (see contacts/notifications.py)
+                queue_reply(reply)
             
             log_user_activity(
                 self.request.user,
@@ -252,17 +332,30 @@ def public_contact_submit(request):
     """
     serializer = ContactMessageCreateSerializer(data=request.data, context={'request': request})
     
+    if serializer.is_valid() and settings.CONTACT_SPOOL_ENABLED:
+        # Acknowledge now; the spool flusher inserts it shortly (see contacts/spool.py)
+        message_id = spool_submission(request, serializer)
+        return Response({
+            'message': 'Your message has been received! We will get back to you soon.',
+            'id': str(message_id),
+            'status': 'success'
+        }, status=status.HTTP_202_ACCEPTED)
+    
     if serializer.is_valid():
-        # Create the message
-        message = serializer.save(
-            sender=None,  # Anonymous submission
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
+        # Create the message, or count it against the recent one it repeats
+        with transaction.atomic():
+            message_id, folded = save_or_fold(
+                serializer,
+                sender=None,  # Anonymous submission
+                ip_address=request.META.get('REMOTE_ADDR'),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            )
+            if not folded:
+                queue_new_messages([message_id])
         
         return Response({
             'message': 'Your message has been received! We will get back to you soon.',
-            'id': str(message.id),
+            'id': str(message_id),
             'status': 'success'
         }, status=status.HTTP_201_CREATED)
     
@@ -84,3 +84,6 @@ echo "   sudo systemctl status portfolio_api"
 echo ""
 echo "5. Reload nginx:"
 echo "   sudo systemctl reload nginx"
+echo ""
+echo "6. Warm caches for the first visitors:"
+echo "   python manage.py warm_caches --url http://127.0.0.1:8001"
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('education', '0002_access_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The FK's own index, declared in the state so it can be dropped concurrently
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='education',
+                name='user',
+                field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='education', to=settings.AUTH_USER_MODEL),
+            ),
+            migrations.AddIndex(
+                model_name='education',
+                index=models.Index(fields=['user'], name='education_education_user_id_cd4a4c5b'),
+            ),
+        ]),
+        RemoveIndexConcurrently(
+            model_name='education',
+            name='education_education_user_id_cd4a4c5b',
+        ),
+    ]
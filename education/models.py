@@ -11,7 +11,8 @@ class Education(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='education'
+        related_name='education',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     institution = models.CharField(max_length=200, help_text="School or university name")
     degree = models.CharField(max_length=200, help_text="Degree type (e.g., Bachelor's, Master's)")
@@ -42,6 +43,10 @@ class Education(models.Model):
         ordering = ['-start_date', 'order']
         verbose_name = 'Education'
         verbose_name_plural = 'Education'
+        indexes = [
+            models.Index(fields=['user', '-start_date', 'order']),
+            models.Index(fields=['-start_date', 'order']),
+        ]
     
     def __str__(self):
         return f"{self.degree} in {self.field_of_study} - {self.institution}"
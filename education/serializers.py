@@ -16,6 +16,11 @@ class EducationListSerializer(serializers.ModelSerializer):
             'grade', 'duration', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        # What method fields read (see portfolio_api.sparse_fields)
+        field_sources = {
+            'duration': ['start_date', 'end_date', 'current'],
+            'institution_display': ['institution', 'field_of_study'],
+        }
     
     def get_duration(self, obj):
         """Calculate education duration"""
@@ -52,6 +57,11 @@ class EducationDetailSerializer(serializers.ModelSerializer):
             'order', 'duration', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'owner_name', 'owner_email']
+        field_sources = {
+            'duration': ['start_date', 'end_date', 'current'],
+            'owner_name': ['user'],
+            'owner_email': ['user'],
+        }
     
     def get_duration(self, obj):
         """Calculate education duration"""
@@ -1,3 +1,34 @@
-from django.test import TestCase
+from portfolio_api.testing import FastListParityMixin, PortfolioTestCase
 
-# Create your tests here.
+from .models import Education
+
+
+class EducationQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over EducationViewSet.query_budget"""
+
+    def test_list(self):
+        self.get_ok('/api/education/')
+        self.get_ok('/api/education/', {'page': 2, 'ordering': 'start_date'})
+        self.get_ok('/api/education/', {'user': self.owner.pk})
+
+    def test_retrieve(self):
+        self.get_ok(f'/api/education/{Education.objects.values_list("pk", flat=True).first()}/')
+
+    def test_by_user(self):
+        self.get_ok(f'/api/education/by_user/{self.owner.pk}/')
+
+
+class EducationFastListTests(FastListParityMixin, PortfolioTestCase):
+    paths = [
+        '/api/education/',
+        '/api/education/by_user/{user}/',
+    ]
+    variants = [
+        {},
+        {'page': 2},
+        {'fields': 'id,institution_display,duration'},
+        {'omit': 'grade,duration'},
+        {'search': 'University 1'},
+        {'ordering': '-institution'},
+        {'user': '{user}', 'fields': 'id,institution_display,duration', 'ordering': '-institution'},
+    ]
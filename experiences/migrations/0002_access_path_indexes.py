@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('experiences', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='experience',
+            index=models.Index(fields=['user', '-start_date', 'order'], name='experiences_user_id_c4ac19_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='experience',
+            index=models.Index(fields=['-start_date', 'order'], name='experiences_start_d_0e5ba6_idx'),
+        ),
+    ]
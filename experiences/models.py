@@ -25,7 +25,8 @@ class Experience(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='experiences'
+        related_name='experiences',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     title = models.CharField(max_length=200, help_text="Job title")
     company = models.CharField(max_length=200)
@@ -65,6 +66,10 @@ class Experience(models.Model):
         ordering = ['-start_date', 'order']
         verbose_name = 'Experience'
         verbose_name_plural = 'Experiences'
+        indexes = [
+            models.Index(fields=['user', '-start_date', 'order']),
+            models.Index(fields=['-start_date', 'order']),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.company}"
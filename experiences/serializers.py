@@ -16,6 +16,11 @@ class ExperienceListSerializer(serializers.ModelSerializer):
             'duration', 'technologies', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        # What method fields read (see portfolio_api.sparse_fields)
+        field_sources = {
+            'duration': ['start_date', 'end_date', 'current'],
+            'company_display': ['company', 'location_type'],
+        }
     
     def get_duration(self, obj):
         """Calculate experience duration"""
@@ -67,6 +72,11 @@ class ExperienceDetailSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'owner_name', 'owner_email']
+        field_sources = {
+            'duration': ['start_date', 'end_date', 'current'],
+            'owner_name': ['user'],
+            'owner_email': ['user'],
+        }
     
     def get_duration(self, obj):
         """Calculate experience duration"""
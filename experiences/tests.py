@@ -1,3 +1,38 @@
-from django.test import TestCase
+from portfolio_api.testing import FastListParityMixin, PortfolioTestCase
 
-# Create your tests here.
+from .models import Experience
+
+
+class ExperienceQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over ExperienceViewSet.query_budget"""
+
+    def test_list(self):
+        self.get_ok('/api/experiences/')
+        self.get_ok('/api/experiences/', {'page': 2, 'ordering': 'company'})
+        self.get_ok('/api/experiences/', {'user': self.owner.pk})
+
+    def test_retrieve(self):
+        self.get_ok(f'/api/experiences/{Experience.objects.values_list("pk", flat=True).first()}/')
+
+    def test_by_user(self):
+        self.get_ok(f'/api/experiences/by_user/{self.owner.pk}/')
+
+    def test_current(self):
+        self.get_ok('/api/experiences/current/')
+
+
+class ExperienceFastListTests(FastListParityMixin, PortfolioTestCase):
+    paths = [
+        '/api/experiences/',
+        '/api/experiences/current/',
+        '/api/experiences/by_user/{user}/',
+    ]
+    variants = [
+        {},
+        {'page': 2},
+        {'fields': 'id,company_display,duration'},
+        {'omit': 'technologies,duration'},
+        {'search': 'Company 1'},
+        {'ordering': 'company'},
+        {'user': '{user}', 'fields': 'id,company_display,duration', 'ordering': 'company'},
+    ]
@@ -1,6 +1,5 @@
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -11,9 +10,11 @@ from .serializers import (
     ExperienceCreateUpdateSerializer
 )
 from portfolio_api.permissions import IsSuperAdminOrEditor
+from portfolio_api.fast_serializers import FastListMixin
+from portfolio_api.surrogate_keys import SurrogateKeyMixin
 
 
-class ExperienceViewSet(viewsets.ModelViewSet):
+class ExperienceViewSet(SurrogateKeyMixin, FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing work experiences
     
@@ -27,6 +28,8 @@ class ExperienceViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'company', 'description', 'technologies']
     ordering_fields = ['start_date', 'created_at', 'order', 'company']
     ordering = ['-start_date', 'order']
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = {'list': 4, 'retrieve': 3, 'by_user': 4, 'current': 3}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -50,18 +53,10 @@ class ExperienceViewSet(viewsets.ModelViewSet):
     def by_user(self, request, user_id=None):
         """Get all experiences for a specific user"""
         queryset = self.get_queryset().filter(user__id=user_id)
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = ExperienceListSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = ExperienceListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, ExperienceListSerializer)
     
     @action(detail=False, methods=['get'])
     def current(self, request):
         """Get current work experiences only"""
         queryset = self.get_queryset().filter(current=True)
-        serializer = ExperienceListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, ExperienceListSerializer, paginate=False)
@@ -0,0 +1,20 @@
+"""Gunicorn configuration for serving Portfolio API over ASGI
+
+Run with:
+    gunicorn --config gunicorn_asgi_config.py portfolio_api.asgi:application
+
+Each uvicorn worker runs an event loop, so a slow client holds a coroutine
+rather than a whole process and fewer workers are needed than in sync mode.
+"""
+
+import multiprocessing
+
+from gunicorn_config import *  # noqa: F401,F403 - shared socket, logging and process settings
+
+# Worker processes
+workers = multiprocessing.cpu_count() + 1
+worker_class = 'uvicorn_worker.UvicornWorker'
+keepalive = 5
+
+# Process naming
+proc_name = 'portfolio_api_asgi'
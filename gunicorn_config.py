@@ -1,6 +1,19 @@
 """Gunicorn configuration file for Portfolio API"""
 
+import gc
 import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Prometheus: workers write metrics to files here so /metrics can report
+# totals across all of them (see portfolio_api/metrics.py). Set before
+# prometheus_client is imported: it picks file-backed values at import time.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'portfolio_api_prometheus')
+)
+
+from prometheus_client import multiprocess  # noqa: E402
 
 # Server socket
 bind = "127.0.0.1:8001"
@@ -31,3 +44,86 @@ tmp_upload_dir = None
 
 # SSL (handled by nginx)
 # No SSL configuration needed here as nginx handles it
+
+# Boot mode: GUNICORN_PRELOAD=true loads and warms the app once in the master
+# and forks workers from it, so they start ready and share its memory.
+# Code changes then need a restart; HUP only replaces the workers.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() in ('1', 'true', 'yes', 'on')
+if preload_app:
+    # Per the gc docs: no collections in the master (freed objects would leave
+    # holes in shared pages), freeze before forking, collect again in workers
+    gc.disable()
+
+# GUNICORN_WARM=true: each new worker renders the hottest public responses
+# before taking traffic (see portfolio_api/warmup.py)
+warm_workers = os.environ.get('GUNICORN_WARM', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+if preload_app:
+    # The preloaded app creates its metrics before on_starting runs
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def on_starting(server):
+    # Values left over from a previous run would be added to the new totals
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.urls import get_resolver
+
+    # Import every view, serializer and URL pattern now, before the fork
+    get_resolver().url_patterns
+    get_resolver().reverse_dict
+    server.log.info('Application preloaded; workers fork from the warmed master')
+
+
+def pre_fork(server, worker):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    # Workers must not share the master's database sockets or pool threads
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
+
+
+def post_worker_init(worker):
+    # Each worker flushes the contact form spool and sends queued notification
+    # emails in the background (see contacts/spool.py, contacts/notifications.py)
+    from contacts.notifications import start_worker
+    from contacts.spool import start_flusher
+
+    start_flusher()
+    start_worker()
+    if not warm_workers:
+        return
+    from portfolio_api.warmup import warm_worker
+
+    try:
+        results, full = warm_worker(notify=worker.notify)
+    except Exception:
+        worker.log.exception('Cache warm-up failed; serving cold')
+        return
+    done = [result for result in results if not result['skipped']]
+    worker.log.info(
+        'Worker %s warmed %d responses in %.0f ms (%s)', worker.pid, len(done),
+        sum(result['ms'] for result in done), 'full' if full else 'first path only; warm-up slots busy'
+    )
+
+
+def child_exit(server, worker):
+    # Imported at the top: an import running in the SIGCHLD handler can race
+    # one already in progress when the master shuts down
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class PortfolioApiConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "portfolio_api"
+    verbose_name = "Portfolio API"
+
+    def ready(self):
+        from .metrics import install_cache_instrumentation
+        from .query_metrics import install_query_wrapper
+        from .slow_queries import install_slow_query_wrapper
+        from .surrogate_keys import connect_signals
+
+        install_cache_instrumentation()
+        connect_signals()
+        connection_created.connect(install_query_wrapper, dispatch_uid="portfolio_api.query_metrics")
+        connection_created.connect(install_slow_query_wrapper, dispatch_uid="portfolio_api.slow_queries")
@@ -0,0 +1,24 @@
+"""
+URL configuration for the async read-only endpoints
+
+Mounted under /api/async/. Served natively when running under ASGI
+(see gunicorn_asgi_config.py); under WSGI they still work, one request
+per worker, like every other endpoint.
+"""
+from django.urls import path
+
+from . import async_views
+
+urlpatterns = [
+    path('projects/', async_views.AsyncProjectView.as_view(), name='async-project-list'),
+    path('projects/<uuid:pk>/', async_views.AsyncProjectView.as_view(), name='async-project-detail'),
+    path('experiences/', async_views.AsyncExperienceView.as_view(), name='async-experience-list'),
+    path('experiences/<uuid:pk>/', async_views.AsyncExperienceView.as_view(), name='async-experience-detail'),
+    path('education/', async_views.AsyncEducationView.as_view(), name='async-education-list'),
+    path('education/<uuid:pk>/', async_views.AsyncEducationView.as_view(), name='async-education-detail'),
+    path('skills/', async_views.AsyncSkillView.as_view(), name='async-skill-list'),
+    path('skills/<uuid:pk>/', async_views.AsyncSkillView.as_view(), name='async-skill-detail'),
+    path('certifications/', async_views.AsyncCertificationView.as_view(), name='async-certification-list'),
+    path('certifications/<uuid:pk>/', async_views.AsyncCertificationView.as_view(), name='async-certification-detail'),
+    path('portfolio/<uuid:user_id>/', async_views.AsyncPortfolioView.as_view(), name='async-portfolio'),
+]
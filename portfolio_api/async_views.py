@@ -0,0 +1,220 @@
+"""
+Async read-only endpoints for the public portfolio data
+
+These mirror the ``list`` and ``retrieve`` actions of the DRF viewsets using
+Django's async ORM, so that under an ASGI server a slow client holds a
+coroutine instead of a whole worker process. Filtering, search and ordering
+reuse the viewset's own filter backends, and responses have the same shape
+as the synchronous endpoints, ``?fields=`` and ``?omit=`` included.
+"""
+import math
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from accounts.models import User
+from accounts.serializers import PublicProfileSerializer
+from certifications.views import CertificationViewSet
+from education.views import EducationViewSet
+from experiences.views import ExperienceViewSet
+from projects.views import ProjectViewSet
+from skills.views import SkillViewSet
+
+from .renderers import FastJSONRenderer
+from .sparse_fields import trim_serializer
+from .surrogate_keys import add_surrogate_keys, detail_keys, list_keys
+
+
+def render_json(data, status_code=status.HTTP_200_OK):
+    """Render data the same way the DRF JSON renderer does"""
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code
+    )
+
+
+def error_response(message, status_code, errors=None):
+    """Error body matching portfolio_api.utils.custom_exception_handler"""
+    return render_json({
+        'message': message,
+        'errors': errors,
+        'status': status_code,
+        'timestamp': datetime.now().isoformat()
+    }, status_code)
+
+
+class AsyncReadOnlyView(View):
+    """
+    Async GET-only mirror of a DRF viewset's list and retrieve actions
+
+    Subclasses only set ``viewset_class``; the queryset, serializers and
+    filter backends are taken from the viewset so both paths stay in sync.
+    """
+    viewset_class = None
+    http_method_names = ['get', 'head', 'options']
+    page_query_param = 'page'
+    last_page_strings = ('last',)
+    # Count, page and prefetch queries, plus the ?user= lookup (see portfolio_api.query_metrics)
+    query_budget = 4
+
+    def get_viewset(self, request, action):
+        return self.viewset_class(
+            request=Request(request),
+            format_kwarg=None,
+            action=action,
+            kwargs={}
+        )
+
+    def get_queryset(self, viewset):
+        # The viewset's own get_queryset(); its filter_queryset() applies any
+        # list-only filters (e.g. the projects' ?featured_only=)
+        return viewset.get_queryset()
+
+    async def get(self, request, pk=None):
+        if pk is None:
+            return await self.list(request)
+        return await self.retrieve(request, pk)
+
+    async def list(self, request):
+        viewset = self.get_viewset(request, 'list')
+        try:
+            # Filter validation may look up related rows (e.g. ?user=<id>)
+            queryset = await sync_to_async(viewset.filter_queryset)(self.get_queryset(viewset))
+        except DRFValidationError as exc:
+            return error_response('An error occurred', status.HTTP_400_BAD_REQUEST, exc.detail)
+
+        serializer_class = viewset.get_serializer_class()
+        fields = viewset.sparse_fields(serializer_class)
+        add_surrogate_keys(request, *list_keys(queryset.model, request.GET.get('user')))
+        page_size = api_settings.PAGE_SIZE
+        if not page_size:
+            objects = [obj async for obj in queryset]
+            return render_json(self.serialize(serializer_class, objects, request, fields))
+
+        count = await queryset.acount()
+        num_pages = max(1, math.ceil(count / page_size))
+        page_number = request.GET.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings:
+            page_number = num_pages
+        try:
+            page_number = int(page_number)
+        except (TypeError, ValueError):
+            return error_response('Invalid page.', status.HTTP_404_NOT_FOUND)
+        if page_number < 1 or page_number > num_pages:
+            return error_response('Invalid page.', status.HTTP_404_NOT_FOUND)
+
+        offset = (page_number - 1) * page_size
+        objects = [obj async for obj in queryset[offset:offset + page_size]]
+        return render_json({
+            'count': count,
+            'next': self.get_page_link(request, page_number + 1, num_pages),
+            'previous': self.get_page_link(request, page_number - 1, num_pages),
+            'results': self.serialize(serializer_class, objects, request, fields),
+        })
+
+    async def retrieve(self, request, pk):
+        viewset = self.get_viewset(request, 'retrieve')
+        serializer_class = viewset.get_serializer_class()
+        try:
+            fields = viewset.sparse_fields(serializer_class)
+        except DRFValidationError as exc:
+            return error_response('An error occurred', status.HTTP_400_BAD_REQUEST, exc.detail)
+        queryset = viewset.sparse_queryset(self.get_queryset(viewset), serializer_class)
+        try:
+            instance = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            return error_response(
+                'No %s matches the given query.' % queryset.model._meta.object_name,
+                status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = serializer_class(instance, context={'request': request})
+        if fields is not None:
+            trim_serializer(serializer, fields)
+        add_surrogate_keys(request, *detail_keys(instance))
+        return render_json(serializer.data)
+
+    def serialize(self, serializer_class, objects, request, fields=None):
+        # Relations are select_related/prefetched by the viewset queryset,
+        # and columns deferred by ?fields= are not serialized, so
+        # serialization does not touch the database.
+        serializer = serializer_class(objects, many=True, context={'request': request})
+        if fields is not None:
+            trim_serializer(serializer, fields)
+        return serializer.data
+
+    def get_page_link(self, request, page_number, num_pages):
+        if page_number < 1 or page_number > num_pages:
+            return None
+        url = request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page_number)
+
+
+class AsyncProjectView(AsyncReadOnlyView):
+    viewset_class = ProjectViewSet
+
+
+class AsyncExperienceView(AsyncReadOnlyView):
+    viewset_class = ExperienceViewSet
+
+
+class AsyncEducationView(AsyncReadOnlyView):
+    viewset_class = EducationViewSet
+
+
+class AsyncSkillView(AsyncReadOnlyView):
+    viewset_class = SkillViewSet
+
+
+class AsyncCertificationView(AsyncReadOnlyView):
+    viewset_class = CertificationViewSet
+
+
+class AsyncPortfolioView(View):
+    """
+    Complete public portfolio for one user in a single response
+
+    GET /api/async/portfolio/{user_id}/
+    """
+    http_method_names = ['get', 'head', 'options']
+    # Profile, social links and one query per section, plus project images
+    query_budget = 8
+    sections = [
+        ('projects', ProjectViewSet),
+        ('experiences', ExperienceViewSet),
+        ('education', EducationViewSet),
+        ('skills', SkillViewSet),
+        ('certifications', CertificationViewSet),
+    ]
+
+    async def get(self, request, user_id):
+        try:
+            user = await User.objects.prefetch_related('social_links').aget(
+                id=user_id,
+                is_active=True
+            )
+        except User.DoesNotExist:
+            return error_response('No User matches the given query.', status.HTTP_404_NOT_FOUND)
+
+        context = {'request': request}
+        data = {'profile': PublicProfileSerializer(user, context=context).data}
+        add_surrogate_keys(request, *detail_keys(user))
+        for name, viewset_class in self.sections:
+            viewset = viewset_class(request=Request(request), format_kwarg=None, action='list', kwargs={})
+            serializer_class = viewset.get_serializer_class()
+            queryset = viewset.get_queryset().filter(user_id=user.id)
+            objects = [obj async for obj in queryset]
+            data[name] = serializer_class(objects, many=True, context=context).data
+            add_surrogate_keys(request, *list_keys(queryset.model, user.id))
+
+        return render_json(data)
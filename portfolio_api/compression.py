@@ -0,0 +1,138 @@
+"""
+Response compression with a cache of precompressed bodies
+
+``CompressionMiddleware`` compresses responses with brotli (when the
+``brotli`` package is installed) or gzip, whichever the client prefers in
+``Accept-Encoding``. Responses that are smaller than
+``COMPRESSION_MIN_LENGTH``, already encoded, streamed or not text-like are
+left alone.
+
+Public responses (anonymous GET/HEAD with status 200 that are not marked
+private or no-store) are compressed once per ETag. The compressed body is
+stored in the ``COMPRESSION_CACHE`` cache, and every later request for the
+same content version is served from there. The ETag itself comes from
+``ConditionalGetMiddleware``, which must sit directly below this middleware
+so it hashes and 304s the uncompressed body.
+
+Other responses are compressed per request. gzip gets the same random
+filename padding as Django's ``GZipMiddleware`` to make BREACH harder.
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|problem\+json|vnd\.oai\.openapi)|image/svg\+xml)'
+)
+_CODING_RE = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def supported_encodings():
+    """Codings this server can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(header):
+    """Best coding from an ``Accept-Encoding`` header, or None for identity"""
+    weights = {}
+    for part in header.split(','):
+        match = _CODING_RE.match(part)
+        if not match or not match[1]:
+            continue
+        try:
+            weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(content, coding, padded=False):
+    if coding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    if padded:
+        return compress_string(content, max_random_bytes=GZipMiddleware.max_random_bytes)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def is_public(request, response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return False
+    if 'HTTP_AUTHORIZATION' in request.META:
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    cache_control = response.get('Cache-Control', '').lower()
+    return 'private' not in cache_control and 'no-store' not in cache_control
+
+
+class CompressionMiddleware:
+    """Compress responses, reusing compressed bodies of public responses"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+            return response
+
+        # Varies even when this client gets identity, so caches keep them apart
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        etag = response.get('ETag')
+        if etag and is_public(request, response):
+            cache = caches[settings.COMPRESSION_CACHE]
+            version = etag.removeprefix('W/').strip('"')
+            key = f'compressed:{coding}:{version}:{len(response.content)}'
+            compressed = cache.get(key)
+            if compressed is None:
+                compressed = compress(response.content, coding)
+                cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        else:
+            compressed = compress(response.content, coding, padded=True)
+
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        # The compressed body is a different representation of the same resource
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,55 @@
+"""
+Migration operations that add and drop indexes without blocking writes
+
+On PostgreSQL ``AddIndexConcurrently`` runs ``CREATE INDEX CONCURRENTLY``,
+so the table stays writable while the index builds. Other backends get a
+plain ``CREATE INDEX``. Concurrent builds cannot run inside a transaction,
+so migrations using these operations set ``atomic = False``.
+
+``RemoveIndexConcurrently`` drops an index the same way. To drop the index
+Django creates for a foreign key, set ``db_index=False`` on the field and
+declare its index in the migration state first::
+
+    migrations.SeparateDatabaseAndState(state_operations=[
+        migrations.AlterField(model_name='skill', name='user', field=...),
+        migrations.AddIndex(model_name='skill', index=models.Index(fields=['user'], name='skills_skill_user_id_7bd7aef6')),
+    ]),
+    RemoveIndexConcurrently(model_name='skill', name='skills_skill_user_id_7bd7aef6'),
+
+A concurrent build that fails (a deadlock, a cancelled deploy) leaves an
+INVALID index behind under the same name; ``manage.py audit_indexes``
+lists those. Drop it with ``DROP INDEX CONCURRENTLY`` and migrate again.
+"""
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently as PostgresAddIndexConcurrently,
+    RemoveIndexConcurrently as PostgresRemoveIndexConcurrently,
+)
+from django.db.migrations.operations import AddIndex, RemoveIndex
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    """``AddIndex`` built concurrently on PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrently(PostgresRemoveIndexConcurrently):
+    """``RemoveIndex`` dropped concurrently on PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,66 @@
+"""
+Database connection pool statistics
+
+Pooling itself is Django's built-in psycopg 3 pool, configured in settings
+(``DATABASES[...]['OPTIONS']['pool']``). Each gunicorn worker owns its own
+pool, so the numbers reported here are per worker and are summed by the
+metrics endpoint.
+"""
+from django.db import connections
+
+
+def _ratio(total, count):
+    return round(total / count, 3) if count else 0.0
+
+
+def pool_stats():
+    """
+    Return ``{alias: stats}`` for every database alias that uses a pool
+
+    Checkout figures are cumulative since the pool was created: ``checkouts``
+    is the number of connection requests, ``checkout_wait_ms`` the total time
+    spent waiting for a free connection and ``queued_checkouts`` how many of
+    them had to wait at all.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+
+        raw = pool.get_stats()
+        size = raw.get('pool_size', 0)
+        available = raw.get('pool_available', 0)
+        checkouts = raw.get('requests_num', 0)
+        opened = raw.get('connections_num', 0)
+        stats[alias] = {
+            'min_size': raw.get('pool_min', 0),
+            'max_size': raw.get('pool_max', 0),
+            'size': size,
+            'available': available,
+            'in_use': size - available,
+            'waiting': raw.get('requests_waiting', 0),
+            'checkouts': checkouts,
+            'queued_checkouts': raw.get('requests_queued', 0),
+            'checkout_errors': raw.get('requests_errors', 0),
+            'checkout_wait_ms': raw.get('requests_wait_ms', 0),
+            'avg_checkout_wait_ms': _ratio(raw.get('requests_wait_ms', 0), checkouts),
+            'connections_opened': opened,
+            'avg_connect_ms': _ratio(raw.get('connections_ms', 0), opened),
+            'connections_lost': raw.get('connections_lost', 0),
+            'bad_returns': raw.get('returns_bad', 0),
+        }
+    return stats
+
+
+def is_pool_timeout(exc):
+    """True if ``exc`` means the pool had no free connection within its budget"""
+    try:
+        from psycopg_pool import PoolTimeout
+    except ImportError:
+        return False
+    while exc is not None:
+        if isinstance(exc, PoolTimeout):
+            return True
+        exc = exc.__cause__
+    return False
@@ -0,0 +1,164 @@
+"""
+Read-replica routing with read-your-writes stickiness
+
+Reads are sent to a replica only while serving a safe-method request (see
+``ReplicaRoutingMiddleware``); management commands, shells and write requests
+always use the primary. After a successful write the client receives a cookie
+that pins its requests to the primary for ``DB_REPLICA_STICKY_SECONDS``, so a
+user never reads an older version of what they just saved. Replicas whose
+replication lag exceeds ``DB_REPLICA_MAX_LAG`` are skipped.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE_NAME = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# True while serving a request whose reads may go to a replica
+_replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+# alias -> (checked_at, healthy), refreshed every DB_REPLICA_LAG_CHECK_INTERVAL
+_replica_health = {}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def measure_replica_lag(alias):
+    """Replication lag of ``alias`` in seconds"""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # No lag when everything received has been replayed, otherwise
+            # the age of the last replayed transaction.
+            cursor.execute(
+                "SELECT CASE "
+                "WHEN NOT pg_is_in_recovery() THEN 0 "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                "END"
+            )
+            return float(cursor.fetchone()[0])
+        # Engines without replication (e.g. SQLite files in development)
+        # only get a liveness check. SQLite answers SELECT 1 without reading
+        # the file, so read its schema instead.
+        cursor.execute('SELECT count(*) FROM sqlite_master' if connection.vendor == 'sqlite' else 'SELECT 1')
+        return 0.0
+
+
+def replica_is_healthy(alias):
+    now = time.monotonic()
+    checked = _replica_health.get(alias)
+    if checked and now - checked[0] < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+
+    try:
+        lag = measure_replica_lag(alias)
+        healthy = lag <= settings.DB_REPLICA_MAX_LAG
+        if not healthy:
+            logger.warning('Replica %s is %.1fs behind, reading from primary', alias, lag)
+    except DatabaseError:
+        logger.exception('Replica %s is unavailable, reading from primary', alias)
+        healthy = False
+
+    _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+class ReplicaRouter:
+    """Send reads to a healthy replica when the current request allows it"""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads_allowed.get():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction on the primary must see its own writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        candidates = replica_aliases()
+        random.shuffle(candidates)
+        for alias in candidates:
+            if replica_is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide per request whether reads may use a replica
+
+    Must come before any middleware that reads from the database
+    (sessions, authentication).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _replica_reads_allowed.set(self.allows_replica_reads(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads_allowed.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = _replica_reads_allowed.set(self.allows_replica_reads(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads_allowed.reset(token)
+        return self.process_response(request, response)
+
+    def allows_replica_reads(self, request):
+        if request.method not in SAFE_METHODS or not replica_aliases():
+            return False
+        return not self.is_sticky(request)
+
+    def is_sticky(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(STICKY_COOKIE_NAME, 0))
+        except ValueError:
+            return False
+        now = time.time()
+        # Cap at the configured window so a forged cookie cannot pin forever
+        return now < pinned_until <= now + settings.DB_REPLICA_STICKY_SECONDS
+
+    def process_response(self, request, response):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and replica_aliases()
+        ):
+            window = settings.DB_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE_NAME,
+                f'{time.time() + window:.3f}',
+                max_age=window,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
@@ -0,0 +1,255 @@
+"""
+Model-free serialization for read-only list responses
+
+DRF serializes a list by building a model instance per row and then asking
+every field for its value. For the public list endpoints,
+``compile_serializer`` turns a read-only ``ModelSerializer`` into a plan,
+built once per serializer class, that reads straight from ``.values()``
+rows:
+
+* model fields are read from their column and converted with the DRF
+  field's ``to_representation``, skipped when it would return the value
+  unchanged
+* ``get_FOO_display`` sources are looked up in the field's choices
+* model properties and ``SerializerMethodField`` methods are called with a
+  ``Row``, a dict whose columns can also be read as attributes
+
+The output is identical to ``serializer_class(rows, many=True).data``.
+Serializers opt in to details the plan cannot infer:
+
+* ``Meta.field_sources`` lists the columns that methods or properties read
+  (see ``portfolio_api.sparse_fields``); undeclared ones get every column
+* ``fast_prepare_rows(rows)`` runs once per page, e.g. to load related data
+  in one query; it can check ``self.fields`` to skip unselected fields
+* ``fast_get_FOO(row)`` replaces ``get_FOO`` on the fast path
+
+``?fields=`` and ``?omit=`` narrow both the columns read and the plan.
+``FAST_LIST_SERIALIZERS = False`` switches every view back to DRF.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils.encoding import force_str
+from django.utils.hashable import make_hashable
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .sparse_fields import SparseFieldsMixin, trim_serializer
+
+# Fields whose to_representation returns values from the database unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.EmailField, serializers.URLField, serializers.SlugField,
+    serializers.IntegerField, serializers.BooleanField,
+)
+
+_compiled = {}
+
+
+class Row(dict):
+    """A ``.values()`` row whose columns can also be read as attributes"""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _converter(field):
+    if type(field) in PASSTHROUGH_FIELDS:
+        return None
+    if isinstance(field, serializers.JSONField) and not field.binary:
+        return None
+    # Same results as to_representation for values a column can hold
+    if type(field) is serializers.UUIDField and field.uuid_format == 'hex_verbose':
+        return str
+    if type(field) is serializers.DateField:
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return date.isoformat
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field.to_representation if field.pk_field else None
+    if isinstance(field, (serializers.FileField, serializers.HyperlinkedRelatedField)):
+        raise ImproperlyConfigured(
+            f'{field.parent.__class__.__name__}.{field.field_name} needs the request; '
+            f'use a method field with a fast_get_{field.field_name} variant'
+        )
+    return field.to_representation
+
+
+def _column_reader(column, convert):
+    if convert is None:
+        return lambda row: row[column]
+
+    def read(row):
+        value = row[column]
+        return None if value is None else convert(value)
+    return read
+
+
+def _display_reader(column, choices, convert):
+    def read(row):
+        value = row[column]
+        display = force_str(choices.get(make_hashable(value), value), strings_only=True)
+        if display is None:
+            return None
+        return display if convert is None else convert(display)
+    return read
+
+
+def _property_reader(getter, convert):
+    def read(row):
+        value = getter(row)
+        if value is None or convert is None:
+            return value
+        return convert(value)
+    return read
+
+
+class CompiledSerializer:
+    """Read plan for one serializer class; see ``compile_serializer``"""
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        meta = serializer_class.Meta
+        model = meta.model
+        declared = getattr(meta, 'field_sources', {})
+        # Columns each field reads, or None when it may read any of them
+        self.field_columns = {}
+        # (field name, reader, method name); readers take a row, methods are
+        # looked up on a serializer instance per response
+        self.plan = []
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in declared:
+                self.field_columns[name] = [
+                    self._model_field(model, path).attname for path in declared[name]
+                    if self._model_field(model, path) is not None
+                ]
+            if isinstance(field, serializers.SerializerMethodField):
+                method = field.method_name
+                if hasattr(serializer_class, f'fast_{method}'):
+                    method = f'fast_{method}'
+                self.plan.append((name, None, method))
+                self.field_columns.setdefault(name, None)
+                continue
+            if len(field.source_attrs) != 1:
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{name}: dotted sources are not supported')
+
+            source = field.source_attrs[0]
+            convert = _converter(field)
+            model_field = self._model_field(model, source)
+            if model_field is not None:
+                self.field_columns[name] = [model_field.attname]
+                self.plan.append((name, _column_reader(model_field.attname, convert), None))
+                continue
+
+            display_of = source[4:-8] if source.startswith('get_') and source.endswith('_display') else None
+            choice_field = self._model_field(model, display_of) if display_of else None
+            if choice_field is not None and choice_field.choices:
+                self.field_columns[name] = [choice_field.attname]
+                choices = dict(make_hashable(choice_field.flatchoices))
+                self.plan.append((name, _display_reader(choice_field.attname, choices, convert), None))
+                continue
+
+            attribute = getattr(model, source, None)
+            if isinstance(attribute, property):
+                self.plan.append((name, _property_reader(attribute.fget, convert), None))
+                self.field_columns.setdefault(name, None)
+                continue
+            raise ImproperlyConfigured(f'{serializer_class.__name__}.{name}: cannot read {source!r} from a row')
+
+        self.columns = self._columns(self.field_columns)
+
+    @staticmethod
+    def _model_field(model, name):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        return field
+
+    def _columns(self, field_columns):
+        model = self.serializer_class.Meta.model
+        if any(columns is None for columns in field_columns.values()):
+            # Some method or property reads undeclared columns; fetch them all
+            return [field.attname for field in model._meta.concrete_fields]
+        columns = [model._meta.pk.attname]
+        for field in field_columns.values():
+            columns.extend(field)
+        return list(dict.fromkeys(columns))
+
+    def values(self, queryset, fields=None):
+        """``queryset`` as rows holding every column the serializer (or its ``fields``) reads"""
+        columns = self.columns
+        if fields is not None:
+            columns = self._columns({name: self.field_columns[name] for name in fields})
+        return queryset.prefetch_related(None).values(*columns)
+
+    def serialize(self, rows, context=None, fields=None):
+        """Representations of ``rows``, as ``serializer_class(..., many=True).data`` would give"""
+        rows = [Row(row) for row in rows]
+        serializer = self.serializer_class(context=context or {})
+        plan = self.plan
+        if fields is not None:
+            trim_serializer(serializer, fields)
+            plan = [entry for entry in plan if entry[0] in fields]
+        if hasattr(serializer, 'fast_prepare_rows'):
+            serializer.fast_prepare_rows(rows)
+        readers = [(name, read or getattr(serializer, method)) for name, read, method in plan]
+        return [{name: read(row) for name, read in readers} for row in rows]
+
+
+def compile_serializer(serializer_class):
+    """``CompiledSerializer`` for ``serializer_class``, built on first use"""
+    compiled = _compiled.get(serializer_class)
+    if compiled is None:
+        compiled = _compiled[serializer_class] = CompiledSerializer(serializer_class)
+    return compiled
+
+
+class FastListMixin(SparseFieldsMixin):
+    """
+    ViewSet mixin serving list responses from ``.values()`` rows
+
+    ``list`` uses ``get_serializer_class()``; custom actions call
+    ``fast_list_response`` with the queryset and list serializer, or
+    ``fast_rows`` and ``fast_serialize`` to shape the response themselves.
+    Both honour ``?fields=`` and ``?omit=`` for that serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.fast_list_response(queryset, self.get_serializer_class())
+
+    def fast_list_response(self, queryset, serializer_class, paginate=True):
+        rows = self.fast_rows(queryset, serializer_class)
+        page = self.paginate_queryset(rows) if paginate else None
+        if page is None:
+            return Response(self.fast_serialize(rows, serializer_class))
+        return self.get_paginated_response(self.fast_serialize(page, serializer_class))
+
+    def fast_rows(self, queryset, serializer_class):
+        """``queryset`` as the rows ``fast_serialize`` takes (unchanged when disabled)"""
+        queryset = self.sparse_queryset(queryset, serializer_class)
+        if not settings.FAST_LIST_SERIALIZERS:
+            return queryset
+        return compile_serializer(serializer_class).values(queryset, self.sparse_fields(serializer_class))
+
+    def fast_serialize(self, rows, serializer_class):
+        """``serializer_class(rows, many=True).data``"""
+        context = self.get_serializer_context()
+        fields = self.sparse_fields(serializer_class)
+        if not settings.FAST_LIST_SERIALIZERS:
+            serializer = serializer_class(rows, many=True, context=context)
+            if fields is not None:
+                trim_serializer(serializer, fields)
+            return serializer.data
+        return compile_serializer(serializer_class).serialize(rows, context, fields)
@@ -0,0 +1,221 @@
+"""
+Bounded password hashing for the authentication endpoints
+
+PBKDF2 is deliberately expensive, so every login, registration and password
+check goes through a small pool of hashing slots shared by all gunicorn
+workers on the host. A request that cannot get a slot within the queue budget
+is answered with 503 instead of queueing behind the others, and IP/email pairs
+with too many recent failures are rejected before any hash is computed.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+class HashingCapacityExceeded(APIException):
+    """Raised when no hashing slot frees up within the queue budget"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Authentication service is busy. Please retry shortly.'
+    default_code = 'hashing_capacity_exceeded'
+
+    def __init__(self, detail=None, code=None, wait=1):
+        super().__init__(detail, code)
+        # Picked up by the DRF exception handler as a Retry-After header
+        self.wait = wait
+
+
+class HashingGate:
+    """
+    Cross-process concurrency limit for password hashing
+
+    Each slot is a lock file; holding an exclusive flock on it means holding
+    the slot. Locks are released by the kernel if a worker dies, so a crashed
+    process can never leak capacity. Without fcntl the limit is per process.
+    """
+    poll_interval = 0.01
+
+    def __init__(self, slots, timeout, lock_dir):
+        self.slots = max(1, slots)
+        self.timeout = timeout
+        self.lock_dir = str(lock_dir)
+        self._thread_locks = [threading.Lock() for _ in range(self.slots)]
+        self._fds = [None] * self.slots
+
+    def _slot_fd(self, index):
+        if self._fds[index] is None:
+            os.makedirs(self.lock_dir, exist_ok=True)
+            path = os.path.join(self.lock_dir, f'slot-{index}.lock')
+            self._fds[index] = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        return self._fds[index]
+
+    def _try_acquire(self, index):
+        # Threads in this process share the slot's file descriptor, and flock
+        # does not exclude holders of the same descriptor, so guard it first.
+        if not self._thread_locks[index].acquire(blocking=False):
+            return False
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._slot_fd(index), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            self._thread_locks[index].release()
+            return False
+
+    def _release(self, index):
+        if fcntl is not None:
+            fcntl.flock(self._slot_fd(index), fcntl.LOCK_UN)
+        self._thread_locks[index].release()
+
+    def acquire(self):
+        """Wait for a free slot and return its index"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            offset = random.randrange(self.slots)
+            for step in range(self.slots):
+                index = (offset + step) % self.slots
+                if self._try_acquire(index):
+                    return index
+            if time.monotonic() >= deadline:
+                raise HashingCapacityExceeded(wait=max(1, round(self.timeout)))
+            time.sleep(self.poll_interval)
+
+    @contextmanager
+    def slot(self):
+        index = self.acquire()
+        try:
+            yield
+        finally:
+            self._release(index)
+
+
+class FailedCredentialTracker:
+    """
+    Sliding window of failed credential checks per IP/email pair
+
+    Only the timestamps of the most recent ``limit`` failures are kept, which
+    is all that is needed to decide whether the window is full.
+    """
+    key_prefix = 'auth-failures'
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+
+    def _key(self, ip, email):
+        identity = f"{ip or ''}|{(email or '').strip().lower()}"
+        return f"{self.key_prefix}:{hashlib.sha256(identity.encode()).hexdigest()}"
+
+    def _recent(self, key, now):
+        return [ts for ts in cache.get(key, []) if now - ts < self.window]
+
+    def check(self, ip, email):
+        """Raise Throttled if the pair has exhausted its failure budget"""
+        now = time.time()
+        recent = self._recent(self._key(ip, email), now)
+        if len(recent) >= self.limit:
+            wait = self.window - (now - recent[0])
+            raise Throttled(
+                wait=wait,
+                detail='Too many failed attempts. Please try again later.'
+            )
+
+    def record_failure(self, ip, email):
+        now = time.time()
+        key = self._key(ip, email)
+        recent = self._recent(key, now)
+        recent.append(now)
+        cache.set(key, recent[-self.limit:], self.window)
+
+    def reset(self, ip, email):
+        cache.delete(self._key(ip, email))
+
+
+_gate = None
+_gate_lock = threading.Lock()
+
+
+def get_hashing_gate():
+    """Return the process-wide hashing gate, configured from settings"""
+    global _gate
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                _gate = HashingGate(
+                    slots=settings.PASSWORD_HASHING_CONCURRENCY,
+                    timeout=settings.PASSWORD_HASHING_QUEUE_TIMEOUT,
+                    lock_dir=settings.PASSWORD_HASHING_LOCK_DIR,
+                )
+    return _gate
+
+
+def hashing_slot():
+    """Context manager holding a hashing slot, e.g. around set_password()"""
+    return get_hashing_gate().slot()
+
+
+def get_failure_tracker():
+    return FailedCredentialTracker(
+        limit=settings.AUTH_FAILURE_LIMIT,
+        window=settings.AUTH_FAILURE_WINDOW,
+    )
+
+
+def _client_ip(request):
+    """
+    The client's address: nginx's X-Real-IP when the request came through a
+    proxy in TRUSTED_PROXY_IPS, otherwise the peer address. Behind nginx the
+    peer is always 127.0.0.1, which would key every failure on the email alone.
+    """
+    if request is None:
+        return None
+    remote = request.META.get('REMOTE_ADDR')
+    if remote in settings.TRUSTED_PROXY_IPS:
+        return request.META.get('HTTP_X_REAL_IP', '').strip() or remote
+    return remote
+
+
+def gated_authenticate(request, email, password):
+    """authenticate() behind the failure window and the hashing gate"""
+    tracker = get_failure_tracker()
+    ip = _client_ip(request)
+    tracker.check(ip, email)
+
+    with hashing_slot():
+        user = authenticate(request=request, username=email, password=password)
+
+    if user is None:
+        tracker.record_failure(ip, email)
+    else:
+        tracker.reset(ip, email)
+    return user
+
+
+def gated_check_password(request, user, raw_password):
+    """user.check_password() behind the failure window and the hashing gate"""
+    tracker = get_failure_tracker()
+    ip = _client_ip(request)
+    tracker.check(ip, user.email)
+
+    with hashing_slot():
+        valid = user.check_password(raw_password)
+
+    if valid:
+        tracker.reset(ip, user.email)
+    else:
+        tracker.record_failure(ip, user.email)
+    return valid
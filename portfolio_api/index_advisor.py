@@ -0,0 +1,477 @@
+"""
+Index suggestions for a captured query workload
+
+A workload is the statements the API ran, how often and for how long: the
+slow-query log (``portfolio_api.slow_queries``; with
+``SLOW_QUERY_THRESHOLD_MS=0`` while production or a replayed load test runs
+it captures every statement), or the queries behind the warm-up paths
+rendered in this process (``replay_workload``).
+
+For each SELECT, the table it reads, its equality and range predicates on
+that table, its ORDER BY and its LIMIT are parsed from the SQL Django
+generated. Candidate indexes are the equality columns, most selective
+first, followed by the range column or by the ORDER BY. Each candidate is
+priced against every statement it could serve:
+
+* on PostgreSQL with the hypopg extension installed, as a hypothetical
+  index: the statement is planned with and without it, and the drop in the
+  planner's total cost, when the plan uses the index, is the share of its
+  time saved. Planning needs the statement's parameters
+  (``SLOW_QUERY_LOG_PARAMS``) or PostgreSQL 16's ``EXPLAIN (GENERIC_PLAN)``
+* otherwise, with a cost model fed by sampled table statistics: the row
+  count and per-column distinct values (``pg_stats`` on PostgreSQL, a
+  random sample elsewhere) give the rows each access path reads and sorts
+
+Suggestions are ranked by expected time saved, the sum over the statements
+a candidate speeds up of their total time in the workload times the share
+saved. Savings of different suggestions overlap: add the top one and run
+the advisor again.
+"""
+import json
+import math
+import re
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.db import DatabaseError
+
+from .management.commands.audit_indexes import coverage, database_indexes
+from .slow_queries import fingerprint
+
+# Relative costs of the model, after PostgreSQL's planner constants: a row
+# read in a full scan, a row fetched through an index (a random heap
+# access), and a row compared once while sorting
+SEQ_ROW_COST = 1.0
+INDEX_ROW_COST = 4.0
+SORT_ROW_COST = 0.2
+# Share of rows a range predicate keeps, PostgreSQL's default for an
+# inequality it has no statistics for
+RANGE_SELECTIVITY = 1 / 3
+# Ignore candidates that save less than this share of a statement's time
+MIN_SAVING = 0.05
+
+_SELECT_RE = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+_CLAUSE_RE = re.compile(r'\b(FROM|WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|OFFSET)\b', re.IGNORECASE)
+_AND_RE = re.compile(r'\bAND\b', re.IGNORECASE)
+_OR_RE = re.compile(r'\bOR\b', re.IGNORECASE)
+_COMMA_RE = re.compile(r',')
+_COLUMN = r'"(?P<table>[^"]+)"\."(?P<column>[^"]+)"'
+_EQUAL_RE = re.compile(_COLUMN + r'\s*(?:=|IN\s*\(|IS\s+NULL\b)', re.IGNORECASE)
+_RANGE_RE = re.compile(_COLUMN + r'\s*(?:<|>|BETWEEN\b)', re.IGNORECASE)
+_BOOLEAN_RE = re.compile(r'(?:NOT\s+)?' + _COLUMN + r'$', re.IGNORECASE)
+_ORDER_RE = re.compile(_COLUMN + r'(?:\s+(?P<direction>ASC|DESC))?$', re.IGNORECASE)
+_TABLE_RE = re.compile(r'"([^"]+)"')
+_PLACEHOLDER_RE = re.compile(r'%s|%%')
+
+
+def _mask(sql):
+    """``sql`` with literals, quoted names and parenthesised text blanked, keeping positions and outer parentheses"""
+    out, depth, quote = [], 0, None
+    for char in sql:
+        if quote:
+            out.append(' ')
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+            out.append(' ' if depth else char)
+        elif char == '(':
+            depth += 1
+            out.append('(' if depth == 1 else ' ')
+        elif char == ')':
+            depth -= 1
+            out.append(')' if depth == 0 else ' ')
+        else:
+            out.append(' ' if depth else char)
+    return ''.join(out)
+
+
+def _split(text, separator):
+    masked = _mask(text)
+    parts, start = [], 0
+    for match in separator.finditer(masked):
+        parts.append(text[start:match.start()].strip())
+        start = match.end()
+    parts.append(text[start:].strip())
+    return parts
+
+
+def _unwrap(text):
+    """``text`` without parentheses around the whole of it"""
+    text = text.strip()
+    while text.startswith('(') and text.endswith(')') and _mask(text).count('(') == 1:
+        text = text[1:-1].strip()
+    return text
+
+
+def _conjuncts(where):
+    """Terms ANDed together at the top of a WHERE clause; none if it has a top-level OR"""
+    where = _unwrap(where)
+    if _OR_RE.search(_mask(where)):
+        return []
+    terms = []
+    for part in _split(where, _AND_RE):
+        unwrapped = _unwrap(part)
+        terms.extend(_conjuncts(unwrapped) if unwrapped != part else [part])
+    return terms
+
+
+def parse_select(sql):
+    """
+    Access path of a single-table SELECT as ``{'table', 'equal', 'range',
+    'ordering', 'limit'}``, or None for other statements
+    """
+    if not _SELECT_RE.match(sql):
+        return None
+    masked = _mask(sql)
+    matches = list(_CLAUSE_RE.finditer(masked))
+    clauses = {}
+    for position, match in enumerate(matches):
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(sql)
+        clauses.setdefault(' '.join(match.group(1).upper().split()), sql[match.end():end].strip())
+    if 'FROM' not in clauses or 'GROUP BY' in clauses:
+        return None
+    table = _TABLE_RE.match(clauses['FROM'])
+    if table is None:
+        return None
+    table = table.group(1)
+
+    equal, ranges = [], []
+    for term in _conjuncts(clauses.get('WHERE', '')):
+        for pattern, found in ((_EQUAL_RE, equal), (_BOOLEAN_RE, equal), (_RANGE_RE, ranges)):
+            match = pattern.match(term)
+            if match:
+                if match['table'] == table and match['column'] not in found:
+                    found.append(match['column'])
+                break
+
+    ordering = []
+    for term in _split(clauses.get('ORDER BY', ''), _COMMA_RE) if 'ORDER BY' in clauses else []:
+        match = _ORDER_RE.match(term)
+        if match is None or match['table'] != table:
+            break
+        ordering.append((match['column'], (match['direction'] or '').upper() == 'DESC'))
+
+    limit = clauses.get('LIMIT', '')
+    return {
+        'table': table,
+        'equal': equal,
+        'range': [column for column in ranges if column not in equal],
+        'ordering': ordering,
+        'limit': int(limit) if limit.isdigit() else None,
+    }
+
+
+def group_workload(entries):
+    """Query log entries grouped by fingerprint, most total time first"""
+    groups = {}
+    for entry in entries:
+        key = entry.get('fingerprint') or fingerprint(entry['sql'])
+        group = groups.setdefault(key, {
+            'fingerprint': key, 'sql': entry['sql'], 'params': None, 'views': Counter(), 'count': 0, 'total_ms': 0.0,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['views'][entry.get('view') or '-'] += 1
+        if group['params'] is None and entry.get('params') is not None:
+            # IN lists vary in length within a fingerprint, so keep the SQL the parameters belong to
+            group['sql'], group['params'] = entry['sql'], entry['params']
+    for group in groups.values():
+        group['total_ms'] = round(group['total_ms'], 3)
+        group['views'] = dict(group['views'].most_common())
+    return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+
+
+def load_workload(path, since=None):
+    """Entries of a JSON-lines query log (the slow-query log format), optionally from the last ``since`` hours"""
+    cutoff = time.time() - since * 3600 if since else None
+    entries = []
+    with open(path) as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Partially written line
+            if 'sql' not in entry or 'duration_ms' not in entry:
+                continue
+            if cutoff and entry.get('time', 0) < cutoff:
+                continue
+            entries.append(entry)
+    return entries
+
+
+def replay_workload(paths, connection):
+    """Render ``paths`` in this process and return the statements they ran as query log entries"""
+    from .warmup import Warmer
+
+    entries = []
+
+    def capture(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not many:
+                entries.append({
+                    'sql': sql,
+                    'params': list(params) if isinstance(params, (list, tuple)) else params,
+                    'duration_ms': (time.perf_counter() - started) * 1000,
+                })
+
+    with connection.execute_wrapper(capture):
+        Warmer().warm(paths, encodings=['identity'])
+    return entries
+
+
+class TableStats:
+    """Row count and per-column distinct values of a table, from planner statistics or a random sample"""
+
+    def __init__(self, connection, table, sample_size=1000):
+        self.connection = connection
+        self.table = table
+        self.sample_size = sample_size
+        self._distinct = {}
+        self.rows = self._row_count()
+
+    def _fetch(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _row_count(self):
+        if self.connection.vendor == 'postgresql':
+            rows = self._fetch('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [self.table])
+            if rows and rows[0][0] > 0:
+                return int(rows[0][0])
+        return self._fetch(f'SELECT COUNT(*) FROM {self.connection.ops.quote_name(self.table)}')[0][0]
+
+    def distinct(self, column):
+        """Estimated distinct values of ``column``, at least 1"""
+        if column not in self._distinct:
+            estimate = self._analyzed_distinct(column)
+            if estimate is None:
+                estimate = self._sampled_distinct(column)
+            self._distinct[column] = max(1.0, min(estimate, self.rows or 1))
+        return self._distinct[column]
+
+    def _analyzed_distinct(self, column):
+        if self.connection.vendor != 'postgresql':
+            return None
+        rows = self._fetch(
+            'SELECT n_distinct FROM pg_stats WHERE schemaname = current_schema() AND tablename = %s AND attname = %s',
+            [self.table, column],
+        )
+        if not rows or rows[0][0] is None:
+            return None
+        # Negative values are a share of the row count
+        return rows[0][0] if rows[0][0] > 0 else -rows[0][0] * self.rows
+
+    def _sampled_distinct(self, column):
+        quote = self.connection.ops.quote_name
+        random = 'RAND()' if self.connection.vendor == 'mysql' else 'RANDOM()'
+        values = [row[0] for row in self._fetch(
+            f'SELECT {quote(column)} FROM {quote(self.table)} ORDER BY {random} LIMIT %s',
+            [self.sample_size],
+        )]
+        if not values:
+            return 1.0
+        counts = Counter(values)
+        sampled, seen = len(values), len(counts)
+        singletons = sum(1 for count in counts.values() if count == 1)
+        if sampled >= self.rows or singletons == 0:
+            return seen
+        # Haas and Stokes' Duj1 estimator, as PostgreSQL's ANALYZE uses
+        return sampled * seen / (sampled - singletons + singletons * sampled / self.rows)
+
+    def selectivity(self, column):
+        return 1.0 / self.distinct(column)
+
+
+def path_cost(index, query, stats):
+    """Estimated cost of ``query`` through ``index`` (``[(column, descending)]``; None for a full scan), or None if unusable"""
+    rows = max(stats.rows, 1)
+    equal, ranges, ordering = query['equal'], query['range'], query['ordering']
+    selected = math.prod(stats.selectivity(column) for column in equal) * (RANGE_SELECTIVITY if ranges else 1)
+    returned = max(rows * selected, 1)
+
+    if index is None:
+        read, in_order = rows * SEQ_ROW_COST, False
+    else:
+        matched, used = 1.0, 0
+        for column, _ in index:
+            if column not in equal:
+                break
+            matched *= stats.selectivity(column)
+            used += 1
+        if used < len(index) and ranges and index[used][0] in ranges:
+            matched *= RANGE_SELECTIVITY
+            used += 1
+        in_order = bool(ordering) and coverage(index, equal, ordering) == 2
+        if not used and not in_order:
+            return None
+        fetched = rows * matched
+        if in_order and query['limit']:
+            # Rows come back sorted, so the scan stops once LIMIT of them pass the other predicates
+            fetched = min(fetched, query['limit'] * matched / selected)
+        read = math.log2(rows + 1) + fetched * INDEX_ROW_COST
+    if ordering and not in_order:
+        read += returned * math.log2(returned + 1) * SORT_ROW_COST
+    return read
+
+
+def model_cost(indexes, query, stats):
+    """Cost of the cheapest access path to ``query`` among a full scan and ``indexes``"""
+    costs = [path_cost(index, query, stats) for index in [None, *indexes]]
+    return min(cost for cost in costs if cost is not None)
+
+
+def candidates(query, stats):
+    """Indexes that could serve ``query``: its equality columns, most selective first, then its range or ORDER BY"""
+    equal = [(column, False) for column in sorted(query['equal'], key=stats.distinct, reverse=True)]
+    found = []
+    for tail in ([(query['range'][0], False)] if query['range'] else [], query['ordering'], []):
+        index = tuple(equal + [term for term in tail if term[0] not in query['equal']])
+        if index and index not in found:
+            found.append(index)
+    return found
+
+
+def index_sql(connection, table, index):
+    quote = connection.ops.quote_name
+    columns = ', '.join(f'{quote(column)}{" DESC" if descending else ""}' for column, descending in index)
+    return f'CREATE INDEX ON {quote(table)} ({columns})'
+
+
+def model_index(table, index):
+    """``(model label, field names)`` for an index on a model's table, or ``(None, None)``"""
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.db_table != table:
+            continue
+        names = {field.column: field.name for field in model._meta.concrete_fields}
+        if all(column in names for column, _ in index):
+            return model._meta.label, [f'{"-" if descending else ""}{names[column]}' for column, descending in index]
+    return None, None
+
+
+class HypotheticalPlanner:
+    """Plan costs with and without hypopg's hypothetical indexes, on PostgreSQL"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        # EXPLAIN (GENERIC_PLAN) plans a statement without its parameters
+        self.generic = connection.pg_version >= 160000
+        self.baseline = {}
+
+    @staticmethod
+    def available(connection):
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+            return cursor.fetchone() is not None
+
+    def can_plan(self, group):
+        return group['params'] is not None or self.generic
+
+    def plan(self, group):
+        """``(total cost, plan JSON text)``, or None if the statement cannot be planned"""
+        sql, params = group['sql'], group['params']
+        if params is None:
+            numbers = iter(range(1, sql.count('%s') + 1))
+            sql = _PLACEHOLDER_RE.sub(lambda match: f'${next(numbers)}' if match.group() == '%s' else '%', sql)
+            prefix = 'EXPLAIN (GENERIC_PLAN, FORMAT JSON) '
+        else:
+            prefix = 'EXPLAIN (FORMAT JSON) '
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                plan = cursor.fetchone()[0]
+        except DatabaseError:
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Total Cost'], json.dumps(plan)
+
+    def savings(self, table, index, groups):
+        """Share of cost saved per group by a hypothetical ``index``, None for groups that cannot be planned"""
+        for group in groups:
+            if group['fingerprint'] not in self.baseline:
+                self.baseline[group['fingerprint']] = self.plan(group)
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT indexname FROM hypopg_create_index(%s)', [index_sql(self.connection, table, index)])
+            name = cursor.fetchone()[0]
+            try:
+                shares = {}
+                for group in groups:
+                    before, after = self.baseline[group['fingerprint']], self.plan(group)
+                    if before is None or after is None:
+                        shares[id(group)] = None
+                    elif name in after[1] and before[0] > 0:
+                        shares[id(group)] = max(0.0, 1 - after[0] / before[0])
+                    else:
+                        shares[id(group)] = 0.0
+            finally:
+                cursor.execute('SELECT hypopg_reset()')
+        return shares
+
+
+def advise(groups, connection, sample_size=1000, hypothetical=True):
+    """
+    Index suggestions for a grouped workload (``group_workload``), most time
+    saved first. ``hypothetical=False`` skips hypopg even where installed.
+    """
+    tables = set(connection.introspection.table_names())
+    planner = HypotheticalPlanner(connection) if hypothetical and HypotheticalPlanner.available(connection) else None
+    stats, existing, served = {}, {}, {}
+    for group in groups:
+        query = parse_select(group['sql'])
+        if query is None or query['table'] not in tables:
+            continue
+        table = query['table']
+        if table not in stats:
+            stats[table] = TableStats(connection, table, sample_size)
+            existing[table] = list(database_indexes(connection, table).values())
+        for index in candidates(query, stats[table]):
+            if any(list(index) == current[:len(index)] for current in existing[table]):
+                continue  # An existing index starts with it
+            served.setdefault((table, index), []).append((group, query))
+
+    suggestions = []
+    for (table, index), pairs in served.items():
+        shares = {}
+        plannable = [group for group, _ in pairs if planner is not None and planner.can_plan(group)]
+        if plannable:
+            shares = planner.savings(table, index, plannable)
+        statements = []
+        for group, query in pairs:
+            share, method = shares.get(id(group)), 'hypopg'
+            if share is None:
+                current = model_cost(existing[table], query, stats[table])
+                share = 1 - model_cost(existing[table] + [list(index)], query, stats[table]) / current
+                method = 'estimate'
+            if share >= MIN_SAVING:
+                statements.append({
+                    'fingerprint': group['fingerprint'],
+                    'sql': group['sql'],
+                    'count': group['count'],
+                    'total_ms': group['total_ms'],
+                    'views': group['views'],
+                    'share_saved': round(share, 3),
+                    'saved_ms': round(group['total_ms'] * share, 3),
+                    'method': method,
+                })
+        if not statements:
+            continue
+        model, fields = model_index(table, index)
+        suggestions.append({
+            'table': table,
+            'columns': [f'{"-" if descending else ""}{column}' for column, descending in index],
+            'model': model,
+            'fields': fields,
+            'sql': index_sql(connection, table, index),
+            'rows': stats[table].rows,
+            'saved_ms': round(sum(statement['saved_ms'] for statement in statements), 3),
+            'statements': sorted(statements, key=lambda statement: statement['saved_ms'], reverse=True),
+        })
+    return sorted(suggestions, key=lambda suggestion: suggestion['saved_ms'], reverse=True)
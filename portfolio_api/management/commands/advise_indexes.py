@@ -0,0 +1,97 @@
+"""
+Suggest indexes for the statements a workload actually ran
+
+    python manage.py advise_indexes                       # the slow-query log
+    python manage.py advise_indexes --log workload.jsonl --since 24
+    python manage.py advise_indexes --replay              # render the warm-up paths here and capture them
+    python manage.py advise_indexes --json
+
+Capture a full workload by running the API (or ``benchmarks.loadtest``
+against a copy of production data) with ``SLOW_QUERY_THRESHOLD_MS=0``, and
+``SLOW_QUERY_LOG_PARAMS=true`` so hypopg can plan the statements with their
+real values. See ``portfolio_api.index_advisor`` for how candidates are
+priced.
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from portfolio_api.index_advisor import (
+    HypotheticalPlanner, advise, group_workload, load_workload, replay_workload,
+)
+
+
+class Command(BaseCommand):
+    help = 'Suggest indexes for a captured query workload, ranked by expected time saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help='Query log to read (defaults to SLOW_QUERY_LOG)')
+        parser.add_argument('--since', type=float, default=None, help='Only entries from the last N hours')
+        parser.add_argument('--replay', action='store_true',
+                            help='Render the warm-up paths in this process and use their queries instead of a log')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--sample', type=int, default=1000, help='Rows sampled per column for selectivity')
+        parser.add_argument('--no-hypopg', action='store_true', help='Use the statistics estimate even where hypopg is installed')
+        parser.add_argument('--limit', type=int, default=10, help='Suggestions to show')
+        parser.add_argument('--json', action='store_true', help='Print the suggestions as JSON')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if options['replay']:
+            from portfolio_api.warmup import hot_paths
+
+            source = 'warm-up paths replayed in-process'
+            entries = replay_workload(hot_paths(), connection)
+        else:
+            path = options['log'] or settings.SLOW_QUERY_LOG
+            if not path:
+                raise CommandError('SLOW_QUERY_LOG is not set; pass --log or --replay')
+            source = path
+            try:
+                entries = load_workload(path, options['since'])
+            except FileNotFoundError:
+                raise CommandError(f'No query log at {path}')
+
+        groups = group_workload(entries)
+        hypothetical = not options['no_hypopg'] and HypotheticalPlanner.available(connection)
+        suggestions = advise(groups, connection, sample_size=options['sample'], hypothetical=hypothetical)
+        suggestions = suggestions[:options['limit']]
+        total_ms = sum(group['total_ms'] for group in groups)
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'source': source,
+                'statements': len(entries),
+                'distinct': len(groups),
+                'total_ms': round(total_ms, 3),
+                'pricing': 'hypopg' if hypothetical else 'estimate',
+                'suggestions': suggestions,
+            }, indent=2))
+            return
+
+        self.stdout.write(
+            f'{len(entries)} statements ({len(groups)} distinct, {total_ms:.1f} ms) from {source}; priced with '
+            + ('hypopg hypothetical indexes' if hypothetical else 'sampled table statistics')
+            + '\n'
+        )
+        if not suggestions:
+            self.stdout.write('No index would save time on this workload')
+            return
+        for rank, suggestion in enumerate(suggestions, 1):
+            share = suggestion['saved_ms'] / total_ms if total_ms else 0
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'#{rank} {suggestion["table"]} ({", ".join(suggestion["columns"])})  '
+                f'saves ~{suggestion["saved_ms"]:.1f} ms ({share:.0%} of the workload)  '
+                f'{len(suggestion["statements"])} statements, {suggestion["rows"]} rows'
+            ))
+            if suggestion['model']:
+                self.stdout.write(f'  {suggestion["model"]}: models.Index(fields={suggestion["fields"]!r})')
+            self.stdout.write(f'  {suggestion["sql"]}')
+            for statement in suggestion['statements']:
+                self.stdout.write(
+                    f'    {statement["saved_ms"]:>9.1f} ms  {statement["share_saved"]:>4.0%} of {statement["total_ms"]:.1f} ms '
+                    f'x{statement["count"]:<5} {statement["method"]:<8} {statement["sql"][:120]}'
+                )
+            self.stdout.write('')
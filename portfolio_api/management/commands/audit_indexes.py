@@ -0,0 +1,266 @@
+"""
+Compare the API's access paths with the indexes in the database
+
+    python manage.py audit_indexes
+    python manage.py audit_indexes --json
+    python manage.py audit_indexes --fail-on-gaps      # for CI
+
+For every DRF viewset in the URLconf, each access path its declarations
+imply is checked against the indexes that exist in the database:
+
+* ``filter``: each ``filterset_fields`` entry needs an index leading with it
+* ``ordering``: the view's default ``ordering``, and the model's
+  ``Meta.ordering`` used by actions that skip the filter backends, need an
+  index that returns rows in that order (or exactly reversed)
+* ``owner``: each foreign key filter (``?user=``, ``by_user``) followed by
+  each default ordering, so one owner's rows come back sorted from the index
+* ``sort``: each ``ordering_fields`` entry clients may sort by (advisory)
+
+A path is ``ok`` when an index serves it fully, ``partial`` when an index
+serves the filter but the rows still need sorting, and ``missing``
+otherwise. Filters on booleans and choice fields, and ``sort`` paths, are
+advisory and never fail the audit. Indexes declared on a model but absent from the database,
+invalid indexes left by failed concurrent builds (PostgreSQL) and indexes
+made redundant by a longer one with the same leading columns are listed
+too.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.generics import GenericAPIView
+from rest_framework.mixins import ListModelMixin
+
+ADVISORY_KINDS = {'sort'}
+
+
+def iter_viewsets(patterns=None):
+    """DRF list views and viewsets routed in the URLconf, each once"""
+    seen = set()
+    stack = list(get_resolver().url_patterns if patterns is None else patterns)
+    while stack:
+        pattern = stack.pop(0)
+        if isinstance(pattern, URLResolver):
+            stack[:0] = pattern.url_patterns
+            continue
+        if not isinstance(pattern, URLPattern):
+            continue
+        cls = getattr(pattern.callback, 'cls', None)
+        if cls in seen or not isinstance(cls, type):
+            continue
+        seen.add(cls)
+        if issubclass(cls, GenericAPIView) and issubclass(cls, ListModelMixin) and view_model(cls) is not None:
+            yield cls
+
+
+def view_model(view):
+    """Model a view lists, from its ``queryset`` or, when it builds one per request, its serializer"""
+    if view.queryset is not None:
+        return view.queryset.model
+    meta = getattr(view.serializer_class, 'Meta', None)
+    return getattr(meta, 'model', None)
+
+
+def _local_field(model, name):
+    """Concrete field of ``model`` that a filter or ordering on ``name`` reads first"""
+    try:
+        field = model._meta.get_field(name.lstrip('-').split('__', 1)[0])
+    except Exception:
+        return None
+    return field if getattr(field, 'concrete', False) and not field.many_to_many else None
+
+
+def _ordering_columns(model, ordering):
+    """``[(column, descending)]`` for the leading plain-field terms of ``ordering``"""
+    columns = []
+    for term in ordering or ():
+        if not isinstance(term, str) or '__' in term or term == '?':
+            break
+        name = term.lstrip('-')
+        field = model._meta.pk if name == 'pk' else _local_field(model, name)
+        if field is None or field.is_relation:
+            break
+        columns.append((field.column, term.startswith('-')))
+    return columns
+
+
+def database_indexes(connection, table):
+    """``{name: [(column, descending)]}`` for the indexes and keys on ``table``"""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    indexes = {}
+    for name, info in constraints.items():
+        if not (info.get('index') or info.get('primary_key') or info.get('unique')) or not info['columns']:
+            continue
+        orders = info.get('orders') or ['ASC'] * len(info['columns'])
+        indexes[name] = [(column, order == 'DESC') for column, order in zip(info['columns'], orders)]
+    return indexes
+
+
+def invalid_indexes(connection):
+    """Indexes left INVALID by a failed CREATE INDEX CONCURRENTLY"""
+    if connection.vendor != 'postgresql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, t.relname FROM pg_index i '
+            'JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_class t ON t.oid = i.indrelid '
+            'WHERE NOT i.indisvalid'
+        )
+        return cursor.fetchall()
+
+
+def coverage(index, equal, ordering):
+    """
+    How well ``index`` serves ``equal`` equality columns followed by
+    ``ordering``: 2 fully, 1 for the equality part only, 0 not at all
+    """
+    if not equal and not ordering:
+        return 0
+    columns = [column for column, _ in index]
+    if set(columns[:len(equal)]) != set(equal):
+        return 0
+    rest = index[len(equal):]
+    if not ordering:
+        return 2
+    if len(rest) >= len(ordering) and [column for column, _ in rest[:len(ordering)]] == [c for c, _ in ordering]:
+        # A btree can be read backwards, so every direction flipped also works
+        flips = {desc != wanted for (_, desc), (_, wanted) in zip(rest, ordering)}
+        if len(flips) == 1:
+            return 2
+    return 1 if equal else 0
+
+
+def check_path(indexes, kind, equal, ordering, note=''):
+    best, best_name = 0, None
+    for name, index in indexes.items():
+        score = coverage(index, equal, ordering)
+        if score > best:
+            best, best_name = score, name
+    return {
+        'kind': kind,
+        'path': ', '.join(equal + [f'{"-" if desc else ""}{column}' for column, desc in ordering]),
+        'status': ('missing', 'partial', 'ok')[best],
+        'index': best_name,
+        'note': note,
+    }
+
+
+def audit_viewset(viewset, indexes):
+    model = view_model(viewset)
+    filters = getattr(viewset, 'filterset_fields', None) or []
+    if isinstance(filters, dict):
+        filters = list(filters)
+    orderings = []
+    for ordering in (getattr(viewset, 'ordering', None), model._meta.ordering):
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        columns = _ordering_columns(model, ordering)
+        if columns and columns not in orderings:
+            orderings.append(columns)
+
+    checks = []
+    for name in filters:
+        field = _local_field(model, name)
+        if field is None:
+            continue
+        note = ''
+        if isinstance(field, models.BooleanField):
+            note = 'boolean: low selectivity, advisory'
+        elif field.choices:
+            note = 'choices: low selectivity, advisory'
+        checks.append(check_path(indexes, 'filter', [field.column], [], note))
+        if field.is_relation:
+            for ordering in orderings:
+                checks.append(check_path(indexes, 'owner', [field.column], ordering))
+    for ordering in orderings:
+        checks.append(check_path(indexes, 'ordering', [], ordering))
+
+    sort_fields = getattr(viewset, 'ordering_fields', None)
+    if sort_fields and sort_fields != '__all__':
+        for name in sort_fields:
+            columns = _ordering_columns(model, [name])
+            if columns:
+                checks.append(check_path(indexes, 'sort', [], columns))
+    return checks
+
+
+def redundant_indexes(indexes):
+    """Plain indexes whose columns lead a longer index on the same table"""
+    found = []
+    for name, index in indexes.items():
+        columns = [column for column, _ in index]
+        for other_name, other in indexes.items():
+            other_columns = [column for column, _ in other]
+            if other_name != name and len(other_columns) > len(columns) and other_columns[:len(columns)] == columns:
+                found.append({'index': name, 'covered_by': other_name})
+                break
+    return found
+
+
+def is_gap(check):
+    return check['status'] != 'ok' and check['kind'] not in ADVISORY_KINDS and not check['note']
+
+
+class Command(BaseCommand):
+    help = "Report access paths of the API's viewsets that no database index serves"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--fail-on-gaps', action='store_true',
+                            help='Exit non-zero if a filter, ordering or owner path is not fully indexed')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        tables = set(connection.introspection.table_names())
+        report = []
+        for viewset in iter_viewsets():
+            model = view_model(viewset)
+            table = model._meta.db_table
+            if table not in tables:
+                raise CommandError(f'Table {table} does not exist; run migrate first')
+            indexes = database_indexes(connection, table)
+            unique_keys = {name for name in indexes if name == '__primary__' or name.endswith('_pkey')}
+            declared = [index.name for index in model._meta.indexes]
+            report.append({
+                'viewset': f'{viewset.__module__}.{viewset.__name__}',
+                'model': model._meta.label,
+                'table': table,
+                'checks': audit_viewset(viewset, indexes),
+                'not_in_database': [name for name in declared if name not in indexes],
+                'redundant': [
+                    item for item in redundant_indexes(indexes)
+                    if item['index'] not in unique_keys
+                ],
+            })
+        invalid = [{'index': name, 'table': table} for name, table in invalid_indexes(connection)]
+        gaps = [check for entry in report for check in entry['checks'] if is_gap(check)]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'viewsets': report, 'invalid': invalid, 'gaps': len(gaps)}, indent=2))
+        else:
+            self.write_report(report, invalid, gaps)
+        if options['fail_on_gaps'] and (gaps or invalid):
+            raise CommandError(f'{len(gaps)} unindexed access paths, {len(invalid)} invalid indexes')
+
+    def write_report(self, report, invalid, gaps):
+        styles = {'ok': self.style.SUCCESS, 'partial': self.style.WARNING, 'missing': self.style.ERROR}
+        for entry in report:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{entry["model"]} ({entry["table"]}) via {entry["viewset"]}'))
+            for check in entry['checks']:
+                status = styles[check['status']](f'{check["status"]:<8}')
+                detail = check['index'] or '-'
+                note = f'  ({check["note"]})' if check['note'] else ''
+                self.stdout.write(f'  {status} {check["kind"]:<9} {check["path"]:<45} {detail}{note}')
+            for name in entry['not_in_database']:
+                self.stdout.write(self.style.ERROR(f'  declared index {name} is not in the database; run migrate'))
+            for item in entry['redundant']:
+                self.stdout.write(f'  redundant {item["index"]}: leading columns of {item["covered_by"]}')
+            self.stdout.write('')
+        for item in invalid:
+            self.stdout.write(self.style.ERROR(
+                f'INVALID index {item["index"]} on {item["table"]}: DROP INDEX CONCURRENTLY it and migrate again'
+            ))
+        self.stdout.write(f'{len(gaps)} unindexed access paths' + (f', {len(invalid)} invalid indexes' if invalid else ''))
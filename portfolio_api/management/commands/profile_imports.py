@@ -0,0 +1,110 @@
+"""
+Report the slowest imports of a worker boot
+
+    python manage.py profile_imports
+    python manage.py profile_imports --limit 15 --sort self
+    python manage.py profile_imports --app portfolio_api.asgi.application --json
+
+Boots a fresh interpreter under ``python -X importtime`` the way a gunicorn
+worker does (load the application, then the URLconf, which imports every
+view) and lists the modules that took longest to import, plus the time per
+top-level package. ``cumulative`` includes a module's own imports; ``self``
+is the module body alone.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_SCRIPT = """
+import time
+started = time.perf_counter()
+from django.utils.module_loading import import_string
+import_string({app!r})
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+
+
+def parse_importtime(output):
+    """``-X importtime`` stderr as ``[{'module', 'self_us', 'cumulative_us', 'depth'}]``"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            # Nested imports are indented two spaces per level
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return modules
+
+
+def summarise(modules, sort, limit):
+    by_package = Counter()
+    for module in modules:
+        by_package[module['module'].split('.', 1)[0]] += module['self_us']
+    key = 'self_us' if sort == 'self' else 'cumulative_us'
+    return {
+        'modules_imported': len(modules),
+        'import_ms': round(sum(module['self_us'] for module in modules) / 1000, 1),
+        'slowest': sorted(modules, key=lambda module: module[key], reverse=True)[:limit],
+        'packages': [
+            {'package': name, 'self_ms': round(total / 1000, 1)}
+            for name, total in by_package.most_common(limit)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Profile the imports of a cold worker boot and list the slowest modules'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', default=None, help='Application to load (defaults to WSGI_APPLICATION)')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+        parser.add_argument('--limit', type=int, default=25, help='Modules and packages to show')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        app = options['app'] or settings.WSGI_APPLICATION
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT.format(app=app)],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+        if completed.returncode:
+            errors = [line for line in completed.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError(f'Booting {app} failed:\n' + '\n'.join(errors[-20:]))
+
+        report = {
+            'app': app,
+            'boot_ms': round(float(completed.stdout.split()[-1]) * 1000, 1),
+            **summarise(parse_importtime(completed.stderr), options['sort'], options['limit']),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f'{app}: booted in {report["boot_ms"]:.0f} ms, {report["modules_imported"]} modules imported '
+            f'({report["import_ms"]:.0f} ms importing)\n'
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Slowest modules by {options["sort"]} time'))
+        self.stdout.write(f'  {"cumulative":>10}  {"self":>8}  module')
+        for module in report['slowest']:
+            self.stdout.write(
+                f'  {module["cumulative_us"] / 1000:>8.1f}ms  {module["self_us"] / 1000:>6.1f}ms  {module["module"]}'
+            )
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time by top-level package (self)'))
+        for package in report['packages']:
+            self.stdout.write(f'  {package["self_ms"]:>8.1f}ms  {package["package"]}')
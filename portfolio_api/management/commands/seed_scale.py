@@ -0,0 +1,425 @@
+"""
+Generate a large, deterministic dataset for scaling tests
+
+    python manage.py seed_scale                   # 10k users, ~1.6M rows
+    python manage.py seed_scale --users 500 --seed 7
+
+Every row is built in Python from a seeded random generator and written with
+chunked ``bulk_create``. Primary keys are generated up front, so child rows
+reference their parents without reading them back. Model signals are muted
+and ``auto_now`` timestamps are replaced with generated dates spread over the
+last three years. Media fields point at a small pool of placeholder PNGs
+written once to the default storage. The seeded portfolios are then logged
+to the change feed (``changes.feed.backfill``), so ``/api/changes/?since=0``
+returns them like rows saved through the API.
+
+The same ``--seed`` and ratios always produce the same rows. Seeding twice
+with the same seed is refused because the generated ids would collide.
+"""
+import itertools
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import signals
+from PIL import Image
+
+from accounts.models import SocialLink, User, UserActivity, UserRole
+from certifications.models import Certification
+from changes.feed import backfill
+from contacts.dedup import content_hash, minhash
+from contacts.models import ContactMessage, MessageReply, MessageStatus, MessageType
+from education.models import Education
+from experiences.models import Experience
+from projects.models import Project, ProjectImage
+from skills.models import Skill
+
+# Timestamps are relative to a fixed date so reruns produce identical rows
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HISTORY = timedelta(days=3 * 365)
+
+MODEL_SIGNALS = (
+    signals.pre_init, signals.post_init,
+    signals.pre_save, signals.post_save,
+    signals.pre_delete, signals.post_delete,
+    signals.m2m_changed,
+)
+
+FIRST_NAMES = ['Ama', 'Kofi', 'Esi', 'Kwame', 'Akosua', 'Yaw', 'Abena', 'Kojo', 'Efua', 'Kwesi']
+LAST_NAMES = ['Mensah', 'Owusu', 'Boateng', 'Asante', 'Osei', 'Addo', 'Darko', 'Appiah']
+TECHNOLOGIES = ['Python', 'Django', 'PostgreSQL', 'React', 'Docker', 'Redis', 'AWS', 'TypeScript',
+                'Go', 'Kubernetes', 'GraphQL', 'Celery']
+ACTIVITY_ACTIONS = ['USER_LOGIN', 'PROFILE_UPDATED', 'PASSWORD_CHANGED', 'MESSAGE_SENT',
+                    'MFA_SETUP_INITIATED', 'MESSAGE_REPLY_CREATED']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 Version/17.2 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+]
+
+
+@contextmanager
+def muted_signals():
+    """Disconnect every model signal receiver for the duration of the block"""
+    saved = [(signal, signal.receivers) for signal in MODEL_SIGNALS]
+    for signal in MODEL_SIGNALS:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let bulk_create store generated values in ``auto_now``/``auto_now_add`` fields"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def ratio_count(rng, ratio):
+    """Whole part of ``ratio`` plus one more with probability of its fraction"""
+    whole = int(ratio)
+    return whole + (rng.random() < ratio - whole)
+
+
+class Generator:
+    """Seeded values shared by the row builders"""
+
+    def __init__(self, seed, name):
+        # One stream per model, so changing one ratio leaves other models alone
+        self.rng = random.Random(f'{seed}:{name}')
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def timestamp(self, after=None):
+        start = after or EPOCH - HISTORY
+        return start + timedelta(seconds=self.rng.randrange(max(1, int((EPOCH - start).total_seconds()))))
+
+    def date(self, start_year=2010, span_years=14):
+        return date(start_year, 1, 1) + timedelta(days=self.rng.randrange(365 * span_years))
+
+    def ip(self):
+        return f'10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}'
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic dataset (users, portfolios, activity and inbox) for scaling tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--users', type=int, default=10000, help='Number of users (default: 10000)')
+        parser.add_argument('--projects-per-user', type=float, default=10)
+        parser.add_argument('--images-per-project', type=float, default=1)
+        parser.add_argument('--experiences-per-user', type=float, default=3)
+        parser.add_argument('--education-per-user', type=float, default=2)
+        parser.add_argument('--skills-per-user', type=float, default=8)
+        parser.add_argument('--certifications-per-user', type=float, default=2)
+        parser.add_argument('--social-links-per-user', type=float, default=2)
+        parser.add_argument('--activities-per-user', type=float, default=100)
+        parser.add_argument('--messages-per-user', type=float, default=20)
+        parser.add_argument('--replies-per-message', type=float, default=0.5)
+        parser.add_argument('--placeholder-images', type=int, default=16,
+                            help='Distinct placeholder files per media field (default: 16)')
+        parser.add_argument('--password', default='Scale-Passw0rd!', help='Password for every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create chunk')
+        parser.add_argument('--dry-run', action='store_true', help='Print the expected row counts and exit')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        users = options['users']
+        if users < 1:
+            raise CommandError('--users must be at least 1')
+
+        self.stdout.write(self.style.SUCCESS(f'Seeding scale dataset (seed {self.seed})'))
+        for label, key in [
+            ('projects', 'projects_per_user'), ('activity rows', 'activities_per_user'),
+            ('contact messages', 'messages_per_user'),
+        ]:
+            self.stdout.write(f'  ~{int(users * options[key]):,} {label}')
+        if options['dry_run']:
+            return
+
+        if User.objects.filter(email=self.email(0)).exists():
+            raise CommandError(f'Seed {self.seed} has already been loaded; pass a different --seed')
+
+        started = time.monotonic()
+        self.images = {
+            'profile_picture': self.placeholder_pool('profiles/pictures/', (96, 96)),
+            'cover_image': self.placeholder_pool('profiles/covers/', (240, 80)),
+            'project_image': self.placeholder_pool('projects/', (160, 120)),
+        }
+        with muted_signals(), manual_timestamps(
+            User, SocialLink, UserActivity, Project, ProjectImage, Experience, Education,
+            Skill, Certification, ContactMessage, MessageReply,
+        ):
+            self.seed_all(users)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.1f}s'))
+
+    def email(self, index):
+        return f'scale-{self.seed}-{index}@example.com'
+
+    def placeholder_pool(self, directory, size):
+        """Write (once) and return the names of solid-colour placeholder PNGs"""
+        gen = Generator(self.seed, f'images:{directory}')
+        names = []
+        for index in range(self.options['placeholder_images']):
+            color = tuple(gen.rng.randrange(256) for _ in range(3))
+            name = f'{directory}placeholders/{size[0]}x{size[1]}-{index}.png'
+            if not default_storage.exists(name):
+                buffer = BytesIO()
+                Image.new('RGB', size, color).save(buffer, 'PNG')
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            names.append(name)
+        return names
+
+    def insert(self, model, rows):
+        """``bulk_create`` ``rows`` (any iterable) in transactions of ``--batch-size``"""
+        started = time.monotonic()
+        created = 0
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, self.batch_size)):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.batch_size)
+            created += len(chunk)
+        elapsed = time.monotonic() - started
+        rate = created / elapsed if elapsed else created
+        self.stdout.write(
+            f'  {model._meta.verbose_name_plural}: {created:,} rows in {elapsed:.1f}s ({rate:,.0f}/s)'
+        )
+
+    def seed_all(self, user_count):
+        gen = Generator(self.seed, 'users')
+        user_ids = [gen.uuid() for _ in range(user_count)]
+        joined = [gen.timestamp() for _ in range(user_count)]
+        self.insert(User, self.users(gen, user_ids, joined))
+        # Replies in the inbox are written by the super admin
+        admin_id = user_ids[0]
+
+        gen = Generator(self.seed, 'projects')
+        project_ids = []
+        self.insert(Project, self.projects(gen, user_ids, joined, project_ids))
+        self.insert(ProjectImage, self.project_images(Generator(self.seed, 'project_images'), project_ids))
+
+        self.insert(Experience, self.experiences(Generator(self.seed, 'experiences'), user_ids, joined))
+        self.insert(Education, self.education(Generator(self.seed, 'education'), user_ids, joined))
+        self.insert(Skill, self.skills(Generator(self.seed, 'skills'), user_ids, joined))
+        self.insert(Certification, self.certifications(Generator(self.seed, 'certifications'), user_ids, joined))
+        self.insert(SocialLink, self.social_links(Generator(self.seed, 'social_links'), user_ids))
+        self.insert(UserActivity, self.activities(Generator(self.seed, 'activities'), user_ids, joined))
+
+        gen = Generator(self.seed, 'messages')
+        messages = []
+        self.insert(ContactMessage, self.messages(gen, user_ids, admin_id, messages))
+        self.insert(MessageReply, self.replies(Generator(self.seed, 'replies'), messages, admin_id))
+
+        # Signals are muted, so nothing above reached the change feed
+        started = time.monotonic()
+        logged = backfill(user_ids, batch_size=self.batch_size)
+        self.stdout.write(f'  change log entries: {logged:,} rows in {time.monotonic() - started:.1f}s')
+
+    def users(self, gen, user_ids, joined):
+        # One hash for everyone, salted from the seed so reruns are identical
+        password = make_password(self.options['password'], salt=f'seedscale{self.seed}')
+        rng = gen.rng
+        for index, (user_id, created) in enumerate(zip(user_ids, joined)):
+            if index == 0:
+                role = UserRole.SUPER_ADMIN
+            else:
+                role = UserRole.EDITOR if rng.random() < 0.1 else UserRole.VIEWER
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield User(
+                id=user_id, email=self.email(index), password=password,
+                first_name=first_name, last_name=last_name, role=role,
+                is_staff=index == 0, is_superuser=index == 0, is_verified=True,
+                headline=f'{rng.choice(TECHNOLOGIES)} engineer', summary='Scale test portfolio. ' * 8,
+                city='Accra', country='Ghana',
+                profile_picture=rng.choice(self.images['profile_picture']),
+                cover_image=rng.choice(self.images['cover_image']) if rng.random() < 0.5 else '',
+                last_login_ip=gen.ip(), date_joined=created,
+                created_at=created, updated_at=gen.timestamp(created),
+            )
+
+    def projects(self, gen, user_ids, joined, project_ids):
+        rng = gen.rng
+        for user_id, user_joined in zip(user_ids, joined):
+            for order in range(ratio_count(rng, self.options['projects_per_user'])):
+                project_id = gen.uuid()
+                project_ids.append(project_id)
+                start = gen.date()
+                current = rng.random() < 0.2
+                created = gen.timestamp(user_joined)
+                yield Project(
+                    id=project_id, user_id=user_id, title=f'Project {order + 1}',
+                    description='A short description of the project. ' * 3,
+                    long_description='A longer description of the project. ' * 30,
+                    technologies=rng.sample(TECHNOLOGIES, 4), role='Lead developer',
+                    team_size=rng.randint(1, 12), start_date=start,
+                    end_date=None if current else start + timedelta(days=rng.randint(30, 900)),
+                    current=current, highlights=['Fast', 'Tested', 'Documented'],
+                    challenges='Challenges we met. ' * 10, outcomes='What we achieved. ' * 10,
+                    featured=order < 2, order=order, created_at=created, updated_at=created,
+                )
+
+    def project_images(self, gen, project_ids):
+        rng = gen.rng
+        for project_id in project_ids:
+            for order in range(ratio_count(rng, self.options['images_per_project'])):
+                created = gen.timestamp()
+                yield ProjectImage(
+                    id=gen.uuid(), project_id=project_id, order=order,
+                    image=rng.choice(self.images['project_image']),
+                    caption=f'Screenshot {order + 1}', uploaded_at=created,
+                )
+
+    def experiences(self, gen, user_ids, joined):
+        rng = gen.rng
+        for user_id, user_joined in zip(user_ids, joined):
+            for order in range(ratio_count(rng, self.options['experiences_per_user'])):
+                start = gen.date()
+                current = order == 0 and rng.random() < 0.5
+                created = gen.timestamp(user_joined)
+                yield Experience(
+                    id=gen.uuid(), user_id=user_id, title='Software Engineer',
+                    company=f'Company {rng.randrange(1000)}',
+                    employment_type=rng.choice(Experience.EMPLOYMENT_TYPE_CHOICES)[0],
+                    location='Accra', location_type=rng.choice(Experience.LOCATION_TYPE_CHOICES)[0],
+                    start_date=start,
+                    end_date=None if current else start + timedelta(days=rng.randint(90, 1500)),
+                    current=current, description='Built and operated services. ' * 10,
+                    responsibilities=['Design', 'Build', 'Operate'], achievements=['Shipped'],
+                    technologies=rng.sample(TECHNOLOGIES, 3), order=order,
+                    created_at=created, updated_at=created,
+                )
+
+    def education(self, gen, user_ids, joined):
+        rng = gen.rng
+        for user_id, user_joined in zip(user_ids, joined):
+            for order in range(ratio_count(rng, self.options['education_per_user'])):
+                start = gen.date(2000, 15)
+                created = gen.timestamp(user_joined)
+                yield Education(
+                    id=gen.uuid(), user_id=user_id, institution=f'University {rng.randrange(200)}',
+                    degree=rng.choice(['BSc', 'MSc', 'PhD']), field_of_study='Computer Science',
+                    start_date=start, end_date=start + timedelta(days=365 * 4),
+                    activities=['Coding club'], achievements=["Dean's list"], order=order,
+                    created_at=created, updated_at=created,
+                )
+
+    def skills(self, gen, user_ids, joined):
+        rng = gen.rng
+        for user_id, user_joined in zip(user_ids, joined):
+            # Skill names are unique per user
+            for order in range(ratio_count(rng, self.options['skills_per_user'])):
+                created = gen.timestamp(user_joined)
+                yield Skill(
+                    id=gen.uuid(), user_id=user_id, name=f'Skill {order + 1}',
+                    category=rng.choice(Skill.CATEGORY_CHOICES)[0],
+                    proficiency_level=rng.choice(Skill.PROFICIENCY_CHOICES)[0],
+                    years_of_experience=rng.randint(0, 15), endorsements=rng.randint(0, 50),
+                    order=order, created_at=created, updated_at=created,
+                )
+
+    def certifications(self, gen, user_ids, joined):
+        rng = gen.rng
+        for user_id, user_joined in zip(user_ids, joined):
+            for order in range(ratio_count(rng, self.options['certifications_per_user'])):
+                issued = gen.date()
+                created = gen.timestamp(user_joined)
+                yield Certification(
+                    id=gen.uuid(), user_id=user_id, name=f'Certification {order + 1}',
+                    issuer=rng.choice(['AWS', 'Google', 'Microsoft', 'Linux Foundation']),
+                    issue_date=issued, expiration_date=issued + timedelta(days=365 * 3),
+                    credential_id=f'CRED-{rng.randrange(10 ** 8)}',
+                    skills=rng.sample(TECHNOLOGIES, 2), order=order,
+                    created_at=created, updated_at=created,
+                )
+
+    def social_links(self, gen, user_ids):
+        rng = gen.rng
+        platforms = [code for code, _ in SocialLink.PLATFORM_CHOICES]
+        for index, user_id in enumerate(user_ids):
+            count = min(ratio_count(rng, self.options['social_links_per_user']), len(platforms))
+            for order, platform in enumerate(rng.sample(platforms, count)):
+                yield SocialLink(
+                    id=gen.uuid(), user_id=user_id, platform=platform,
+                    url=f'https://{platform}.example.com/scale-{self.seed}-{index}', order=order,
+                )
+
+    def activities(self, gen, user_ids, joined):
+        rng = gen.rng
+        for user_id, user_joined in zip(user_ids, joined):
+            for _ in range(ratio_count(rng, self.options['activities_per_user'])):
+                yield UserActivity(
+                    id=gen.uuid(), user_id=user_id, action=rng.choice(ACTIVITY_ACTIONS),
+                    ip_address=gen.ip(), user_agent=rng.choice(USER_AGENTS),
+                    timestamp=gen.timestamp(user_joined),
+                )
+
+    def messages(self, gen, user_ids, admin_id, messages):
+        """Contact messages; ``messages`` collects ``(id, created_at)`` for the replies"""
+        rng = gen.rng
+        total = int(len(user_ids) * self.options['messages_per_user'])
+        for index in range(total):
+            message_id = gen.uuid()
+            created = gen.timestamp()
+            messages.append((message_id, created))
+            # Most submissions come from anonymous visitors
+            sender_id = rng.choice(user_ids) if rng.random() < 0.3 else None
+            status = rng.choice(MessageStatus.values)
+            message_type = rng.choice(MessageType.values)
+            responded = status == MessageStatus.RESPONDED
+            subject = f'Enquiry #{index}'
+            body = 'I would like to talk about a project with you. ' * rng.randint(2, 12)
+            yield ContactMessage(
+                id=message_id, sender_id=sender_id,
+                sender_name=None if sender_id else f'Visitor {index}',
+                sender_email=None if sender_id else f'visitor-{self.seed}-{index}@example.com',
+                message_type=message_type, subject=subject, message=body,
+                # What ContactMessage views store, so dedup treats these like submissions
+                content_hash=content_hash(subject, body), minhash=minhash(subject, body),
+                project_budget=rng.choice([1000, 5000, 20000])
+                if message_type == MessageType.PROJECT_PROPOSAL else None,
+                status=status, priority=rng.random() < 0.1,
+                responded_by_id=admin_id if responded else None,
+                responded_at=gen.timestamp(created) if responded else None,
+                ip_address=gen.ip(), user_agent=rng.choice(USER_AGENTS),
+                created_at=created, updated_at=created,
+            )
+
+    def replies(self, gen, messages, admin_id):
+        rng = gen.rng
+        for message_id, message_created in messages:
+            for _ in range(ratio_count(rng, self.options['replies_per_message'])):
+                created = gen.timestamp(message_created)
+                yield MessageReply(
+                    id=gen.uuid(), message_id=message_id, author_id=admin_id,
+                    content='Thanks for getting in touch, replying shortly.',
+                    is_internal=rng.random() < 0.3, created_at=created, updated_at=created,
+                )
@@ -0,0 +1,118 @@
+"""
+Summarise the slow-query log by statement
+
+    python manage.py slow_query_report
+    python manage.py slow_query_report --since 24 --limit 10 --explain
+
+Groups the entries written by ``portfolio_api.slow_queries`` by fingerprint
+and lists them by total time spent, with the views and call sites that ran
+them and, with ``--explain``, the captured query plan.
+"""
+import json
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarise(entries):
+    """Aggregate log entries into one dict per fingerprint, slowest total first"""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'sql': entry['sql'],
+            'durations': [],
+            'params': set(),
+            'views': Counter(),
+            'frames': Counter(),
+            'explain': None,
+            'last_seen': 0,
+        })
+        group['durations'].append(entry['duration_ms'])
+        group['params'].add(entry['params_fingerprint'])
+        group['views'][entry['view'] or '-'] += 1
+        group['frames'][entry['frame'] or '-'] += 1
+        if entry.get('explain'):
+            group['explain'] = entry['explain']
+        group['last_seen'] = max(group['last_seen'], entry['time'])
+
+    summary = []
+    for group in groups.values():
+        durations = group.pop('durations')
+        summary.append({
+            **group,
+            'count': len(durations),
+            'distinct_params': len(group.pop('params')),
+            'total_ms': round(sum(durations), 3),
+            'mean_ms': round(sum(durations) / len(durations), 3),
+            'p95_ms': round(percentile(durations, 0.95), 3),
+            'max_ms': round(max(durations), 3),
+            'views': dict(group['views'].most_common()),
+            'frames': dict(group['frames'].most_common()),
+        })
+    return sorted(summary, key=lambda item: item['total_ms'], reverse=True)
+
+
+class Command(BaseCommand):
+    help = 'Summarise the slow-query log, sorted by total time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help='Log file (defaults to SLOW_QUERY_LOG)')
+        parser.add_argument('--since', type=float, default=None, help='Only entries from the last N hours')
+        parser.add_argument('--view', default=None, help='Only queries run by this URL name')
+        parser.add_argument('--limit', type=int, default=20, help='Statements to show')
+        parser.add_argument('--explain', action='store_true', help='Print the captured query plans')
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        if not path:
+            raise CommandError('SLOW_QUERY_LOG is not set; pass --log')
+        cutoff = time.time() - options['since'] * 3600 if options['since'] else None
+
+        entries = []
+        try:
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Partially written line
+                    if cutoff and entry['time'] < cutoff:
+                        continue
+                    if options['view'] and entry['view'] != options['view']:
+                        continue
+                    entries.append(entry)
+        except FileNotFoundError:
+            raise CommandError(f'No slow-query log at {path}')
+
+        summary = summarise(entries)[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+        if not summary:
+            self.stdout.write('No slow queries logged')
+            return
+
+        self.stdout.write(f'{len(entries)} slow queries in {path}\n')
+        for rank, item in enumerate(summary, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'#{rank} {item["fingerprint"]}  total {item["total_ms"]:.1f} ms  '
+                f'count {item["count"]}  mean {item["mean_ms"]:.1f}  '
+                f'p95 {item["p95_ms"]:.1f}  max {item["max_ms"]:.1f}  '
+                f'distinct params {item["distinct_params"]}'
+            ))
+            self.stdout.write(f'  {item["sql"][:500]}')
+            self.stdout.write('  views:  ' + ', '.join(f'{name} ({n})' for name, n in item['views'].items()))
+            self.stdout.write('  frames: ' + ', '.join(f'{name} ({n})' for name, n in item['frames'].items()))
+            if options['explain']:
+                plan = item['explain'] or '(not captured)'
+                self.stdout.write('  plan:\n' + '\n'.join(f'    {line}' for line in plan.splitlines()))
+            self.stdout.write('')
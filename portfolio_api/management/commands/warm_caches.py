@@ -0,0 +1,68 @@
+"""
+Pre-render the hottest public responses after a deploy
+
+    python manage.py warm_caches
+    python manage.py warm_caches --url http://127.0.0.1:8001 --concurrency 2
+    python manage.py warm_caches --users 50 --dry-run
+
+Without ``--url`` the responses are rendered in this process, which fills
+shared cache backends and the database's buffers. With ``--url`` they are
+requested from the running server, warming whichever workers answer and
+any edge cache in between. See ``portfolio_api.warmup`` for what is warmed.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio_api.warmup import Warmer, hot_paths, warm_host
+
+
+class Command(BaseCommand):
+    help = 'Render featured projects and the busiest portfolios ahead of the first visitors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help='Request the paths from this server instead of in-process')
+        parser.add_argument('--host', default=None, help='Host header (defaults to WARM_CACHE_HOST)')
+        parser.add_argument('--users', type=int, default=None, help='Portfolios to warm (defaults to WARM_CACHE_USERS)')
+        parser.add_argument('--featured', type=int, default=None,
+                            help='Featured project pages to warm (defaults to WARM_CACHE_FEATURED)')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Requests in flight at once (defaults to WARM_CACHE_CONCURRENCY)')
+        parser.add_argument('--timeout', type=float, default=None,
+                            help='Stop after this many seconds (defaults to WARM_CACHE_TIMEOUT; 0 for no limit)')
+        parser.add_argument('--dry-run', action='store_true', help='List the paths without requesting them')
+        parser.add_argument('--json', action='store_true', help='Print every request as JSON')
+
+    def handle(self, *args, **options):
+        paths = hot_paths(users=options['users'], featured=options['featured'])
+        if options['dry_run']:
+            self.stdout.write('\n'.join(paths))
+            return
+
+        timeout = settings.WARM_CACHE_TIMEOUT if options['timeout'] is None else options['timeout']
+        warmer = Warmer(
+            base_url=options['url'],
+            host=options['host'] or warm_host(),
+            concurrency=options['concurrency'] or settings.WARM_CACHE_CONCURRENCY,
+            timeout=timeout,
+        )
+        started = time.perf_counter()
+        results = warmer.warm(paths)
+        elapsed = time.perf_counter() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        failed = [result for result in results if not result['skipped'] and result['status'] != 200]
+        skipped = sum(result['skipped'] for result in results)
+        for result in failed:
+            self.stderr.write(f'{result["status"] or "error"} {result["path"]} ({result["encoding"]})')
+        if not options['json']:
+            self.stdout.write(
+                f'Warmed {len(paths)} paths, {len(results) - skipped} requests in {elapsed:.1f}s '
+                f'via {options["url"] or "this process"} as {warmer.host}'
+                + (f'; {skipped} skipped after the {timeout:g}s timeout' if skipped else '')
+            )
+        if failed:
+            raise CommandError(f'{len(failed)} warm-up requests failed')
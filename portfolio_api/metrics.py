@@ -0,0 +1,210 @@
+"""
+Prometheus metrics
+
+Under gunicorn every worker writes its samples to files in
+``PROMETHEUS_MULTIPROC_DIR``, which gunicorn_config.py creates and cleans
+on start. ``/metrics`` merges those files, so a scrape returns totals for
+the whole server whichever worker answers it. Without the variable (e.g.
+``runserver``) the numbers come from the current process only.
+
+Requests are labelled by URL name (``project-list``, ``project-detail``),
+which keeps the label set bounded regardless of ids in the path.
+"""
+import os
+import resource
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+
+from .db_pool import pool_stats
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response',
+    ['route', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size',
+    ['route', 'method'],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries executed per request',
+    ['route', 'method'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent in the database per request',
+    ['route', 'method'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total', 'Cache reads by outcome',
+    ['cache', 'result'],
+)
+REJECTIONS = Counter(
+    'http_rejections_total', 'Requests refused by throttling or rate limiting',
+    ['route', 'kind'],
+)
+WORKER_MEMORY = Gauge(
+    'worker_resident_memory_bytes', 'Resident memory of each worker process',
+    multiprocess_mode='liveall',
+)
+DB_POOL = Gauge(
+    'db_pool_connections', 'Pooled database connections, summed over live workers',
+    ['alias', 'state'], multiprocess_mode='livesum',
+)
+DB_POOL_CHECKOUTS = Gauge(
+    'db_pool_checkouts', 'Connection checkouts since each worker started, summed over live workers',
+    ['alias', 'outcome'], multiprocess_mode='livesum',
+)
+DB_POOL_WAIT = Gauge(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection since each worker started',
+    ['alias'], multiprocess_mode='livesum',
+)
+
+_MISSING = object()
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def resident_memory():
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # Peak rather than current RSS where /proc is unavailable (macOS: bytes)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def record_rejection(request, kind):
+    REJECTIONS.labels(route=route_name(request), kind=kind).inc()
+
+
+def record_pool_stats():
+    for alias, stats in pool_stats().items():
+        DB_POOL.labels(alias=alias, state='in_use').set(stats['in_use'])
+        DB_POOL.labels(alias=alias, state='available').set(stats['available'])
+        DB_POOL.labels(alias=alias, state='waiting').set(stats['waiting'])
+        DB_POOL_CHECKOUTS.labels(alias=alias, outcome='immediate').set(
+            stats['checkouts'] - stats['queued_checkouts']
+        )
+        DB_POOL_CHECKOUTS.labels(alias=alias, outcome='queued').set(stats['queued_checkouts'])
+        DB_POOL_CHECKOUTS.labels(alias=alias, outcome='error').set(stats['checkout_errors'])
+        DB_POOL_WAIT.labels(alias=alias).set(stats['checkout_wait_ms'] / 1000)
+
+
+def _instrument_cache(backend, alias):
+    hits = CACHE_LOOKUPS.labels(cache=alias, result='hit')
+    misses = CACHE_LOOKUPS.labels(cache=alias, result='miss')
+    get, get_many = backend.get, backend.get_many
+
+    def counted_get(key, default=None, version=None):
+        value = get(key, _MISSING, version=version)
+        if value is _MISSING:
+            misses.inc()
+            return default
+        hits.inc()
+        return value
+
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        found = get_many(keys, version=version)
+        hits.inc(len(found))
+        misses.inc(len(keys) - len(found))
+        return found
+
+    backend.get, backend.get_many = counted_get, counted_get_many
+    return backend
+
+
+def install_cache_instrumentation():
+    """Count hits and misses on every cache connection created from now on"""
+    if getattr(caches, '_metrics_installed', False):
+        return
+    create_connection = caches.create_connection
+
+    def create_instrumented_connection(alias):
+        return _instrument_cache(create_connection(alias), alias)
+
+    caches.create_connection = create_instrumented_connection
+    caches._metrics_installed = True
+
+
+class MetricsMiddleware:
+    """Record latency, size and database usage of every response"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    def process_exception(self, request, exception):
+        from django_ratelimit.exceptions import Ratelimited
+
+        if isinstance(exception, Ratelimited):
+            record_rejection(request, 'ratelimit')
+
+    def record(self, request, response, elapsed):
+        route, method = route_name(request), request.method
+        REQUEST_LATENCY.labels(route=route, method=method, status=response.status_code).observe(elapsed)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route=route, method=method).observe(len(response.content))
+
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            REQUEST_QUERIES.labels(route=route, method=method).observe(stats.count)
+            REQUEST_DB_TIME.labels(route=route, method=method).observe(stats.duration)
+
+        WORKER_MEMORY.set(resident_memory())
+        record_pool_stats()
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition, for scrapers connecting to gunicorn directly
+    from METRICS_ALLOWED_IPS. nginx connects from 127.0.0.1 too, so requests
+    it forwarded (they carry its X-Real-IP / X-Forwarded-For) are refused;
+    the nginx configs also deny /metrics.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden('Forbidden')
+    if 'HTTP_X_REAL_IP' in request.META or 'HTTP_X_FORWARDED_FOR' in request.META:
+        return HttpResponseForbidden('Forbidden')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,313 @@
+"""
+On-demand profiling of live requests
+
+``ProfilingMiddleware`` profiles a random ``PROFILER_SAMPLE_RATE`` fraction of
+requests, plus any request carrying a valid ``X-Profile-Token`` header. Staff
+mint tokens on the admin profiles page (/admin/profiles/); they are signed
+with SECRET_KEY and expire after ``PROFILER_TOKEN_MAX_AGE`` seconds.
+
+While a request is profiled, a background thread samples its stack every
+``PROFILER_SAMPLE_INTERVAL`` seconds. Each sample is attributed to a phase
+(middleware, auth, queryset, serializer, render or view) from the frames on
+the stack. The samples also give a collapsed-stack file that flame graph
+tools can read. In ``cprofile`` mode the request additionally runs under
+cProfile and the ``.prof`` file is kept.
+
+Profiles are written to ``PROFILER_DIR``. Only the newest
+``PROFILER_MAX_PROFILES`` are kept. Async requests under ASGI are passed
+through unprofiled.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'HTTP_X_PROFILE_TOKEN'
+TOKEN_SALT = 'portfolio_api.profiling'
+PROFILE_ID_RE = re.compile(r'^[0-9]{19,}-[0-9a-f]{8}$')
+
+# Checked in order; the first phase with a matching frame anywhere on the
+# stack wins, so an authentication query counts as auth and a queryset
+# evaluated by a serializer counts as queryset.
+PHASE_MARKERS = [
+    ('auth', 'rest_framework/views.py', {'initial'}),
+    ('render', 'rest_framework/renderers.py', None),
+    ('render', 'django/template/response.py', {'render', 'rendered_content'}),
+    ('queryset', 'django/db/', None),
+    ('serializer', 'rest_framework/serializers.py', None),
+    ('serializer', 'rest_framework/fields.py', None),
+    ('serializer', 'rest_framework/relations.py', None),
+    ('view', 'django/core/handlers/base.py', {'_get_response'}),
+]
+PHASES = ['middleware', 'auth', 'queryset', 'serializer', 'render', 'view']
+
+
+def classify(codes):
+    """Phase of a sampled stack (code objects, outermost first)"""
+    for phase, path, names in PHASE_MARKERS:
+        for code in codes:
+            if path in code.co_filename and (names is None or code.co_name in names):
+                return phase
+    return 'middleware'
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    for marker in ('site-packages/', 'lib/python'):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    else:
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+_switch_lock = threading.Lock()
+_switch_state = {'active': 0, 'saved': None}
+
+
+def _lower_switch_interval(interval):
+    # The sampler only runs when the profiled thread releases the GIL, which
+    # by default happens every 5ms; shorten that while any profile is active.
+    with _switch_lock:
+        if not _switch_state['active']:
+            _switch_state['saved'] = sys.getswitchinterval()
+            sys.setswitchinterval(min(_switch_state['saved'], interval / 2))
+        _switch_state['active'] += 1
+
+
+def _restore_switch_interval():
+    with _switch_lock:
+        _switch_state['active'] -= 1
+        if not _switch_state['active']:
+            sys.setswitchinterval(_switch_state['saved'])
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's stack at a fixed wall-clock interval"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.phases = Counter()
+        self._phase_cache = {}
+        self._stopped = threading.Event()
+
+    def start(self):
+        _lower_switch_interval(self.interval)
+        super().start()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if not codes:
+                continue
+            # Keep raw code objects; labels are only built when saving
+            stack = tuple(reversed(codes))
+            phase = self._phase_cache.get(stack)
+            if phase is None:
+                phase = self._phase_cache[stack] = classify(stack)
+            self.phases[phase] += 1
+            self.stacks[stack] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        _restore_switch_interval()
+
+    @property
+    def samples(self):
+        return sum(self.phases.values())
+
+    def collapsed(self):
+        """``(stack, count)`` lines in the collapsed format used by flame graph tools"""
+        labels = {}
+        for stack, count in self.stacks.most_common():
+            for code in stack:
+                if code not in labels:
+                    labels[code] = _frame_label(code)
+            yield ';'.join(labels[code] for code in stack), count
+
+
+def make_token(user):
+    """Header value that gets the bearer's requests profiled"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def token_is_valid(value):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(value, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class ProfileStore:
+    """Bounded ring of profiles on disk, shared by all workers"""
+
+    def __init__(self, directory=None, limit=None):
+        self.directory = directory or settings.PROFILER_DIR
+        self.limit = limit or settings.PROFILER_MAX_PROFILES
+
+    def path(self, profile_id, suffix):
+        if not PROFILE_ID_RE.match(profile_id):
+            raise ValueError(f'Invalid profile id {profile_id!r}')
+        return os.path.join(self.directory, f'{profile_id}{suffix}')
+
+    def new_id(self):
+        return f'{time.time_ns()}-{secrets.token_hex(4)}'
+
+    def save(self, profile_id, meta, stacks, profiler=None):
+        """Write ``meta``, collapsed ``(stack, count)`` pairs and the cProfile data"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(profile_id, '.folded'), 'w') as fh:
+            fh.writelines(f'{stack} {count}\n' for stack, count in stacks)
+        if profiler is not None:
+            profiler.dump_stats(self.path(profile_id, '.prof'))
+        # Metadata last: a profile is listed once its .json exists
+        tmp_path = self.path(profile_id, '.json.tmp')
+        with open(tmp_path, 'w') as fh:
+            json.dump(meta, fh)
+        os.replace(tmp_path, self.path(profile_id, '.json'))
+        self.prune()
+
+    def ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((name[:-5] for name in names if name.endswith('.json')), reverse=True)
+
+    def prune(self):
+        for profile_id in self.ids()[self.limit:]:
+            for suffix in ('.json', '.folded', '.prof'):
+                try:
+                    os.remove(self.path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass  # Another worker pruned it first
+
+    def load(self, profile_id):
+        with open(self.path(profile_id, '.json')) as fh:
+            meta = json.load(fh)
+        meta['id'] = profile_id
+        meta['has_cprofile'] = os.path.exists(self.path(profile_id, '.prof'))
+        return meta
+
+    def recent(self):
+        profiles = []
+        for profile_id in self.ids():
+            try:
+                profiles.append(self.load(profile_id))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled or explicitly requested requests
+
+    Keep it near the top of MIDDLEWARE so the middleware phase covers the
+    rest of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.store = ProfileStore()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        trigger = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self.profile(request, trigger)
+
+    def trigger(self, request):
+        token = request.META.get(TOKEN_HEADER)
+        if token and token_is_valid(token):
+            return 'token'
+        rate = settings.PROFILER_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return 'sample'
+        return None
+
+    def profile(self, request, trigger):
+        sampler = StackSampler(threading.get_ident(), settings.PROFILER_SAMPLE_INTERVAL)
+        profiler = cProfile.Profile() if settings.PROFILER_MODE == 'cprofile' else None
+
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler (debugger, coverage) owns the hook
+                    profiler = None
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+
+        profile_id = self.store.new_id()
+        try:
+            self.store.save(profile_id, self.metadata(request, response, trigger, elapsed, sampler, profiler),
+                            sampler.collapsed(), profiler)
+        except OSError:
+            logger.exception('Could not store request profile')
+            return response
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def metadata(self, request, response, trigger, elapsed, sampler, profiler):
+        samples = sampler.samples
+        # Scale sample counts to the measured wall-clock time
+        phases = {
+            phase: round(elapsed * 1000 * sampler.phases[phase] / samples, 2) if samples else 0.0
+            for phase in PHASES
+        }
+        stats = getattr(request, 'query_stats', None)
+        user = getattr(request, 'user', None)
+        return {
+            'created': time.time(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': getattr(request, 'view_name', None),
+            'status': response.status_code,
+            'user': str(user) if user is not None and user.is_authenticated else None,
+            'trigger': trigger,
+            'mode': 'cprofile' if profiler is not None else 'sample',
+            'duration_ms': round(elapsed * 1000, 2),
+            'samples': samples,
+            'phases_ms': phases,
+            'queries': stats.count if stats else None,
+            'db_ms': round(stats.duration * 1000, 2) if stats else None,
+        }
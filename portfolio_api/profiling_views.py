@@ -0,0 +1,106 @@
+"""
+Admin pages for browsing and downloading request profiles
+
+Mounted under /admin/profiles/ and wrapped with ``admin.site.admin_view``, so
+only active staff users get in.
+"""
+import io
+import os
+import pstats
+
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.urls import path
+from django.views.decorators.http import require_http_methods
+
+from .profiling import PHASES, ProfileStore, make_token
+
+DOWNLOADS = {
+    'prof': ('.prof', 'application/octet-stream'),
+    'folded': ('.folded', 'text/plain'),
+    'json': ('.json', 'application/json'),
+}
+
+
+def _load(store, profile_id):
+    try:
+        return store.load(profile_id)
+    except (FileNotFoundError, ValueError):
+        raise Http404('Profile not found')
+
+
+@require_http_methods(['GET', 'POST'])
+def profile_list(request):
+    store = ProfileStore()
+    token = make_token(request.user) if request.method == 'POST' else None
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': store.recent(),
+        'phases': PHASES,
+        'token': token,
+    }
+    return render(request, 'admin/profiles/list.html', context)
+
+
+def profile_detail(request, profile_id):
+    store = ProfileStore()
+    profile = _load(store, profile_id)
+
+    # Frames where the samples were taken, i.e. where the time was spent
+    hot_frames = {}
+    with open(store.path(profile_id, '.folded')) as fh:
+        for line in fh:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            leaf = stack.rsplit(';', 1)[-1]
+            hot_frames[leaf] = hot_frames.get(leaf, 0) + int(count)
+    samples = profile['samples'] or 1
+    hot_frames = [
+        (frame, count, round(100 * count / samples, 1))
+        for frame, count in sorted(hot_frames.items(), key=lambda item: item[1], reverse=True)[:25]
+    ]
+
+    cprofile_report = None
+    if profile['has_cprofile']:
+        output = io.StringIO()
+        stats = pstats.Stats(store.path(profile_id, '.prof'), stream=output)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(40)
+        cprofile_report = output.getvalue()
+
+    context = {
+        **admin.site.each_context(request),
+        'title': f'{profile["method"]} {profile["path"]}',
+        'profile': profile,
+        'phases': [
+            (phase, profile['phases_ms'].get(phase, 0.0),
+             round(100 * profile['phases_ms'].get(phase, 0.0) / (profile['duration_ms'] or 1), 1))
+            for phase in PHASES
+        ],
+        'hot_frames': hot_frames,
+        'cprofile_report': cprofile_report,
+    }
+    return render(request, 'admin/profiles/detail.html', context)
+
+
+def profile_download(request, profile_id, kind):
+    store = ProfileStore()
+    _load(store, profile_id)
+    if kind not in DOWNLOADS:
+        raise Http404('Unknown download')
+    suffix, content_type = DOWNLOADS[kind]
+    file_path = store.path(profile_id, suffix)
+    if not os.path.exists(file_path):
+        raise Http404('Profile file not found')
+    return FileResponse(
+        open(file_path, 'rb'), as_attachment=True,
+        filename=f'profile-{profile_id}{suffix}', content_type=content_type
+    )
+
+
+urlpatterns = [
+    path('', admin.site.admin_view(profile_list), name='profile-list'),
+    path('<str:profile_id>/', admin.site.admin_view(profile_detail), name='profile-detail'),
+    path('<str:profile_id>/download/<str:kind>/', admin.site.admin_view(profile_download),
+         name='profile-download'),
+]
@@ -0,0 +1,156 @@
+"""
+Per-request query counting and query budgets
+
+Every database connection gets a permanent execute wrapper (installed from
+``PortfolioApiConfig.ready``) that records into the collector of the current
+request, if any. Collectors live in a context variable, so queries issued from
+``sync_to_async`` threads under ASGI are attributed to the right request.
+
+Viewsets declare budgets with a ``query_budget`` attribute, either a number
+for every action or a dict keyed by action name (``'default'`` as fallback)::
+
+    query_budget = {'list': 4, 'retrieve': 3, 'default': 6}
+
+A request over budget logs a warning, and raises ``QueryBudgetExceeded`` when
+``QUERY_BUDGET_STRICT`` is on, as it is for tests built on
+``portfolio_api.testing.PortfolioTestCase``.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_stats = ContextVar('query_stats', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its declared budget"""
+
+
+class QueryStats:
+    """Queries executed while collecting, with total time and repeated SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.view_name = None
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """``{sql: times}`` for statements executed more than once"""
+        return {sql: times for sql, times in self.statements.items() if times > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(times - 1 for times in self.statements.values() if times > 1)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``query_wrapper`` once per connection"""
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_wrapper)
+
+
+@contextmanager
+def collect_queries():
+    """Collect the queries run inside the block into a new ``QueryStats``"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def current_query_stats():
+    return _current_stats.get()
+
+
+def get_query_budget(view_func, method):
+    """Budget declared on the view class for the action handling ``method``"""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if not isinstance(budget, dict):
+        return budget
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return budget.get(action, budget.get('default'))
+
+
+class QueryMetricsMiddleware:
+    """
+    Count queries per request, report them in Server-Timing and enforce budgets
+
+    Place it near the top of MIDDLEWARE so session and authentication
+    queries are included in the count.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect_queries() as stats:
+            request.query_stats = stats
+            response = self.get_response(request)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        with collect_queries() as stats:
+            request.query_stats = stats
+            response = await self.get_response(request)
+        return self.finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
+        request.view_name = request.query_stats.view_name = getattr(request.resolver_match, 'view_name', None)
+
+    def finish(self, request, response, stats):
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and stats.count > budget:
+            message = (
+                f'{request.method} {request.path} ({getattr(request, "view_name", None)}) '
+                f'ran {stats.count} queries, budget is {budget}'
+            )
+            if stats.duplicates:
+                worst = max(stats.duplicates.items(), key=lambda item: item[1])
+                message += f'; repeated {worst[1]}x: {worst[0][:200]}'
+            logger.warning(message)
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+
+        if settings.QUERY_METRICS_HEADERS:
+            timing = (
+                f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                f'db-dup;desc="{stats.duplicate_count} duplicated"'
+            )
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+        return response
@@ -0,0 +1,152 @@
+"""
+JSON rendering and parsing with orjson
+
+``FastJSONRenderer`` and ``FastJSONParser`` replace DRF's JSON classes. They
+use orjson when it is installed and DRF's stdlib implementation otherwise,
+and also fall back to it for output orjson cannot produce: indented JSON
+(the browsable API), ASCII-only output, or values orjson rejects. orjson
+encodes UUIDs natively; dates, times, Decimals and anything else go through
+DRF's encoder, so they come out the same on both paths.
+
+``JSONFragment`` wraps bytes that are already valid JSON, such as a cached
+per-object blob. Put one anywhere in response data and its bytes are copied
+into the output as they are, instead of being decoded and encoded again.
+orjson embeds them with ``orjson.Fragment``; the stdlib path (and orjson
+releases without it) encode a placeholder and splice the bytes in after.
+
+One difference remains: orjson writes NaN and infinite floats as ``null``,
+where DRF's encoder raises ``ValueError`` under ``STRICT_JSON``. Finding
+them first would mean walking every response, and the API has no float
+that can be NaN or infinite (decimals are rendered as strings), so the fast
+path accepts it.
+"""
+import io
+import re
+import secrets
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+if orjson is not None:
+    # Older orjson has no Fragment; fragments are then spliced in afterwards
+    ORJSON_FRAGMENT = getattr(orjson, 'Fragment', None)
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_encode_default = JSONEncoder().default
+# orjson reads integers wider than 64 bits as floats; leave those bodies to the stdlib
+_LONG_NUMBER_RE = re.compile(rb'\d{19}')
+
+
+class JSONFragment:
+    """Pre-encoded JSON copied into rendered output unchanged"""
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw.encode() if isinstance(raw, str) else bytes(raw)
+
+    @classmethod
+    def encode(cls, data):
+        """Fragment holding ``data`` encoded once, e.g. to cache alongside the object"""
+        return cls(dumps(data))
+
+    def __eq__(self, other):
+        return isinstance(other, JSONFragment) and other.raw == self.raw
+
+    def __repr__(self):
+        return f'JSONFragment({self.raw[:40]!r})'
+
+
+class _FragmentSplicer:
+    """``default`` hook standing placeholders in for fragments, replaced after encoding"""
+
+    def __init__(self):
+        self.nonce = secrets.token_hex(8)
+        self.fragments = []
+
+    def default(self, obj):
+        if isinstance(obj, JSONFragment):
+            self.fragments.append(obj.raw)
+            return f'__json_fragment_{self.nonce}_{len(self.fragments) - 1}__'
+        return _encode_default(obj)
+
+    def splice(self, output):
+        if not self.fragments:
+            return output
+        pattern = re.compile(rb'"__json_fragment_' + self.nonce.encode() + rb'_(\d+)__"')
+        return pattern.sub(lambda match: self.fragments[int(match[1])], output)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, JSONFragment):
+        return ORJSON_FRAGMENT(obj.raw)
+    return _encode_default(obj)
+
+
+def _escape_line_separators(output):
+    # Valid JSON but not valid JavaScript; DRF escapes them too
+    if b'\xe2\x80' in output:
+        output = output.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+    return output
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes for ``data``, the same as ``FastJSONRenderer`` output"""
+    if orjson is not None:
+        try:
+            if ORJSON_FRAGMENT is not None:
+                return _escape_line_separators(orjson.dumps(data, default=_orjson_default, option=ORJSON_OPTIONS))
+            splicer = _FragmentSplicer()
+            output = orjson.dumps(data, default=splicer.default, option=ORJSON_OPTIONS)
+            return _escape_line_separators(splicer.splice(output))
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers over 64 bits; the stdlib encoder decides
+    return _stdlib_dumps(data)
+
+
+def _stdlib_dumps(data, indent=None, ensure_ascii=False, separators=(',', ':')):
+    splicer = _FragmentSplicer()
+    output = json.dumps(
+        data, cls=JSONEncoder, default=splicer.default, indent=indent, ensure_ascii=ensure_ascii,
+        allow_nan=not api_settings.STRICT_JSON, separators=separators,
+    )
+    return _escape_line_separators(splicer.splice(output.encode()))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` using orjson for compact output"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None and self.compact and not self.ensure_ascii:
+            return dumps(data)
+        separators = (',', ':') if self.compact else (', ', ': ')
+        if indent is not None:
+            separators = (',', ': ')
+        return _stdlib_dumps(data, indent=indent, ensure_ascii=self.ensure_ascii, separators=separators)
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` using orjson for UTF-8 bodies"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if not _LONG_NUMBER_RE.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass  # The stdlib parser decides, and words the error as DRF does
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
+import os
+import tempfile
 from pathlib import Path
 from decouple import config, Csv
 from datetime import timedelta
@@ -45,6 +48,7 @@ INSTALLED_APPS = [
     "django_filters",
     "drf_spectacular",
     # Local apps
+    "portfolio_api",  # Project-wide middleware, signals and management commands
     "accounts",  # Must be before other apps that reference User
     "contacts",
     "experiences",
@@ -52,6 +56,7 @@ INSTALLED_APPS = [
     "skills",
     "projects",
     "certifications",
+    "changes",  # Change feed of the apps above
 ]
 
 # Custom user model
@@ -59,6 +64,13 @@ AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "portfolio_api.compression.CompressionMiddleware",
+    "django.middleware.http.ConditionalGetMiddleware",
+    "portfolio_api.surrogate_keys.SurrogateKeyMiddleware",
+    "portfolio_api.profiling.ProfilingMiddleware",
+    "portfolio_api.metrics.MetricsMiddleware",
+    "portfolio_api.db_router.ReplicaRoutingMiddleware",
+    "portfolio_api.query_metrics.QueryMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -101,9 +113,45 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD", default=""),
         "HOST": config("DB_HOST", default=""),
         "PORT": config("DB_PORT", default=""),
+        # Verify pooled/persistent connections before handing them out
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Connection pooling: PostgreSQL uses Django's psycopg 3 pool (one pool per
+# worker process); other engines keep persistent connections instead.
+DB_POOL_ENABLED = config("DB_POOL_ENABLED", default=True, cast=bool)
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql" and DB_POOL_ENABLED:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": config("DB_POOL_MIN_SIZE", default=1, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", default=4, cast=int),
+            # Seconds a request may wait for a connection when the pool is exhausted
+            "timeout": config("DB_POOL_TIMEOUT", default=5.0, cast=float),
+            # Requests allowed to queue for a connection (0 = unlimited)
+            "max_waiting": config("DB_POOL_MAX_WAITING", default=0, cast=int),
+            # Recycle connections idle this long, and all connections after max_lifetime
+            "max_idle": config("DB_POOL_MAX_IDLE", default=300.0, cast=float),
+            "max_lifetime": config("DB_POOL_MAX_LIFETIME", default=1800.0, cast=float),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = config("DB_CONN_MAX_AGE", default=60, cast=int)
+
+# Read replicas: comma separated hosts, or database files when using SQLite.
+# Safe-method requests read from a healthy replica; see portfolio_api/db_router.py
+DB_REPLICAS = config("DB_REPLICAS", default="", cast=Csv())
+for index, replica in enumerate(DB_REPLICAS, start=1):
+    replica_settings = copy.deepcopy(DATABASES["default"])
+    replica_settings["NAME" if "sqlite3" in replica_settings["ENGINE"] else "HOST"] = replica
+    replica_settings["TEST"] = {"MIRROR": "default"}
+    DATABASES[f"replica_{index}"] = replica_settings
+
+DATABASE_ROUTERS = ["portfolio_api.db_router.ReplicaRouter"]
+DB_REPLICA_STICKY_SECONDS = config("DB_REPLICA_STICKY_SECONDS", default=10, cast=int)
+DB_REPLICA_MAX_LAG = config("DB_REPLICA_MAX_LAG", default=5.0, cast=float)  # seconds
+DB_REPLICA_LAG_CHECK_INTERVAL = config("DB_REPLICA_LAG_CHECK_INTERVAL", default=5.0, cast=float)
+
 
 
 # Password validation
@@ -157,6 +205,15 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "portfolio_api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "portfolio_api.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
@@ -167,7 +224,7 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "EXCEPTION_HANDLER": "portfolio_api.utils.custom_exception_handler",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
+        "portfolio_api.warmup.AnonRateThrottle",  # Lets cache warm-up requests through
         "rest_framework.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
@@ -254,3 +311,129 @@ EMAIL_VERIFICATION_TIMEOUT = config('EMAIL_VERIFICATION_TIMEOUT', default=86400,
 # Rate limiting
 RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=True, cast=bool)
 RATELIMIT_USE_CACHE = 'default'
+
+# Cache (shared between gunicorn workers when a file or network backend is used)
+CACHES = {
+    "default": {
+        "BACKEND": config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": config('CACHE_LOCATION', default='portfolio-api'),
+    }
+}
+
+# Query metrics: Server-Timing headers and per-view query budgets
+QUERY_METRICS_HEADERS = config('QUERY_METRICS_HEADERS', default=DEBUG, cast=bool)
+# Raise instead of logging when a view exceeds its budget (portfolio_api.testing.PortfolioTestCase turns it on)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+
+# Build public list responses from .values() rows (see portfolio_api/fast_serializers.py)
+FAST_LIST_SERIALIZERS = config('FAST_LIST_SERIALIZERS', default=True, cast=bool)
+
+# Response compression (see portfolio_api/compression.py); brotli is used when installed
+COMPRESSION_MIN_LENGTH = config('COMPRESSION_MIN_LENGTH', default=500, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+# Compressed bodies of public responses, keyed by ETag
+COMPRESSION_CACHE = config('COMPRESSION_CACHE', default='default')
+COMPRESSION_CACHE_TIMEOUT = config('COMPRESSION_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Surrogate keys for an edge cache (see portfolio_api/surrogate_keys.py)
+SURROGATE_KEY_HEADER = config('SURROGATE_KEY_HEADER', default='Surrogate-Key')
+# Seconds the edge may keep tagged public responses; 0 keeps everything out of it
+SURROGATE_KEY_TTL = config('SURROGATE_KEY_TTL', default=300, cast=int)
+SURROGATE_KEY_PURGER = config('SURROGATE_KEY_PURGER', default='portfolio_api.surrogate_keys.LogPurger')
+# NginxPurger: where PURGE requests go, and the cache holding its URL index
+SURROGATE_PURGE_ORIGIN = config('SURROGATE_PURGE_ORIGIN', default='http://127.0.0.1')
+SURROGATE_PURGE_TIMEOUT = config('SURROGATE_PURGE_TIMEOUT', default=2, cast=float)
+SURROGATE_KEY_CACHE = config('SURROGATE_KEY_CACHE', default='default')
+
+# Cache warming (see portfolio_api/warmup.py): `manage.py warm_caches`, and
+# each new gunicorn worker when GUNICORN_WARM=true
+WARM_CACHE_USERS = config('WARM_CACHE_USERS', default=10, cast=int)  # portfolios, busiest first
+WARM_CACHE_FEATURED = config('WARM_CACHE_FEATURED', default=10, cast=int)  # featured project pages
+WARM_CACHE_PATHS = config('WARM_CACHE_PATHS', default='', cast=Csv())  # extra paths, e.g. /api/skills/
+WARM_CACHE_HOST = config('WARM_CACHE_HOST', default='')  # defaults to the first ALLOWED_HOSTS entry
+# Workers warming at once (the rest start serving straight away), or parallel requests for the command
+WARM_CACHE_CONCURRENCY = config('WARM_CACHE_CONCURRENCY', default=2, cast=int)
+WARM_CACHE_TIMEOUT = config('WARM_CACHE_TIMEOUT', default=20.0, cast=float)  # seconds per warm
+WARM_CACHE_LOCK_DIR = config(
+    'WARM_CACHE_LOCK_DIR', default=os.path.join(tempfile.gettempdir(), 'portfolio_api', 'warmup')
+)
+
+# Slow-query log (see portfolio_api/slow_queries.py); summarise with `manage.py slow_query_report`
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100.0, cast=float)
+SLOW_QUERY_LOG = config(
+    'SLOW_QUERY_LOG', default=os.path.join(tempfile.gettempdir(), 'portfolio_api', 'slow_queries.jsonl')
+)  # empty to disable
+SLOW_QUERY_EXPLAIN = config('SLOW_QUERY_EXPLAIN', default=True, cast=bool)
+# Also log parameter values (personal data included) so `manage.py advise_indexes` can replan the queries
+SLOW_QUERY_LOG_PARAMS = config('SLOW_QUERY_LOG_PARAMS', default=False, cast=bool)
+
+# Request profiling (see portfolio_api/profiling.py); profiles are browsable at /admin/profiles/
+PROFILER_SAMPLE_RATE = config('PROFILER_SAMPLE_RATE', default=0.0, cast=float)
+PROFILER_MODE = config('PROFILER_MODE', default='cprofile')  # 'cprofile' or 'sample' (stack samples only)
+PROFILER_SAMPLE_INTERVAL = config('PROFILER_SAMPLE_INTERVAL', default=0.001, cast=float)
+PROFILER_DIR = config('PROFILER_DIR', default=os.path.join(tempfile.gettempdir(), 'portfolio_api', 'profiles'))
+PROFILER_MAX_PROFILES = config('PROFILER_MAX_PROFILES', default=200, cast=int)
+PROFILER_TOKEN_MAX_AGE = config('PROFILER_TOKEN_MAX_AGE', default=3600, cast=int)
+
+# Prometheus metrics at /metrics (see portfolio_api/metrics.py); scrape from these addresses only
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+
+# Password hashing gate (see portfolio_api/hashing.py)
+PASSWORD_HASHING_CONCURRENCY = config('PASSWORD_HASHING_CONCURRENCY', default=os.cpu_count() or 1, cast=int)
+PASSWORD_HASHING_QUEUE_TIMEOUT = config('PASSWORD_HASHING_QUEUE_TIMEOUT', default=2.0, cast=float)  # seconds
+PASSWORD_HASHING_LOCK_DIR = config(
+    'PASSWORD_HASHING_LOCK_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'portfolio_api', 'hashing')
+)
+AUTH_FAILURE_LIMIT = config('AUTH_FAILURE_LIMIT', default=5, cast=int)
+AUTH_FAILURE_WINDOW = config('AUTH_FAILURE_WINDOW', default=900, cast=int)  # 15 minutes
+# Peers whose X-Real-IP header names the client (nginx sets it); failures are keyed on that address
+TRUSTED_PROXY_IPS = config('TRUSTED_PROXY_IPS', default='127.0.0.1,::1', cast=Csv())
+
+CONTACT_MESSAGE_MAX_LENGTH = config('CONTACT_MESSAGE_MAX_LENGTH', default=10000, cast=int)  # characters in a submitted message
+
+# Contact form write-behind spool (see contacts/spool.py): submissions are
+# acknowledged with 202 and inserted in batches. Keep the directory on
+# persistent storage; it holds messages not yet in the database.
+CONTACT_SPOOL_ENABLED = config('CONTACT_SPOOL_ENABLED', default=True, cast=bool)
+# Outside the deploy directory, which every deploy replaces
+CONTACT_SPOOL_DIR = config('CONTACT_SPOOL_DIR', default='/var/lib/portfolio_api/contact_spool')
+CONTACT_SPOOL_BATCH_SIZE = config('CONTACT_SPOOL_BATCH_SIZE', default=500, cast=int)
+# Seconds between flushes by each worker's background thread; 0 leaves flushing to `manage.py flush_contact_spool`
+CONTACT_SPOOL_FLUSH_INTERVAL = config('CONTACT_SPOOL_FLUSH_INTERVAL', default=1.0, cast=float)
+# Waiting submissions above which new ones get 503 + Retry-After (seconds)
+CONTACT_SPOOL_HIGH_WATER = config('CONTACT_SPOOL_HIGH_WATER', default=10000, cast=int)
+CONTACT_SPOOL_RETRY_AFTER = config('CONTACT_SPOOL_RETRY_AFTER', default=30, cast=int)
+CONTACT_SPOOL_FSYNC = config('CONTACT_SPOOL_FSYNC', default=True, cast=bool)  # fsync each file before the 202
+
+# Contact message de-duplication (see contacts/dedup.py): repeats within the
+# TTL are counted on the original message instead of stored
+CONTACT_DEDUP_ENABLED = config('CONTACT_DEDUP_ENABLED', default=True, cast=bool)
+CONTACT_DEDUP_TTL = config('CONTACT_DEDUP_TTL', default=86400, cast=int)  # seconds
+CONTACT_DEDUP_SIMILARITY = config('CONTACT_DEDUP_SIMILARITY', default=0.7, cast=float)  # estimated share of shared word pairs
+CONTACT_DEDUP_MIN_WORDS = config('CONTACT_DEDUP_MIN_WORDS', default=8, cast=int)  # shorter texts only match exactly
+CONTACT_DEDUP_MAX_WORDS = config('CONTACT_DEDUP_MAX_WORDS', default=400, cast=int)  # words of a text shingled for near matching
+CONTACT_DEDUP_MAX_ENTRIES = config('CONTACT_DEDUP_MAX_ENTRIES', default=50000, cast=int)  # per process
+CONTACT_DEDUP_REFRESH = config('CONTACT_DEDUP_REFRESH', default=5.0, cast=float)  # seconds between loads from the database
+
+# Contact notification emails (see contacts/notifications.py): queued in an
+# outbox table with the message or reply and sent by a background worker
+CONTACT_NOTIFY_ENABLED = config('CONTACT_NOTIFY_ENABLED', default=True, cast=bool)
+CONTACT_NOTIFY_DIGEST_MINUTES = config('CONTACT_NOTIFY_DIGEST_MINUTES', default=0, cast=int)  # 0 sends staff emails at once
+CONTACT_NOTIFY_INTERVAL = config('CONTACT_NOTIFY_INTERVAL', default=5.0, cast=float)  # seconds; 0 leaves sending to send_notifications
+CONTACT_NOTIFY_BATCH_SIZE = config('CONTACT_NOTIFY_BATCH_SIZE', default=100, cast=int)  # rows per SMTP connection
+CONTACT_NOTIFY_RETRY_BASE = config('CONTACT_NOTIFY_RETRY_BASE', default=60, cast=int)  # seconds, doubled per attempt
+CONTACT_NOTIFY_MAX_ATTEMPTS = config('CONTACT_NOTIFY_MAX_ATTEMPTS', default=6, cast=int)
+
+# Live inbox events for editors over Server-Sent Events (see contacts/events.py
+# and contacts/stream.py; the stream needs the ASGI server)
+CONTACT_EVENTS_ENABLED = config('CONTACT_EVENTS_ENABLED', default=True, cast=bool)
+CONTACT_EVENTS_BACKEND = config('CONTACT_EVENTS_BACKEND', default='contacts.events.SocketBackend')  # or contacts.events.LocalBackend
+CONTACT_EVENTS_DIR = config('CONTACT_EVENTS_DIR', default='/var/lib/portfolio_api/events')  # local disk, one per host, outside the deploy directory
+CONTACT_EVENTS_HEARTBEAT = config('CONTACT_EVENTS_HEARTBEAT', default=15.0, cast=float)  # seconds between keep-alive comments
+CONTACT_EVENTS_QUEUE_SIZE = config('CONTACT_EVENTS_QUEUE_SIZE', default=100, cast=int)  # events a slow stream may lag before a resync
+
+# Portfolio change feed (see changes/feed.py)
+CHANGE_FEED_PAGE_SIZE = config('CHANGE_FEED_PAGE_SIZE', default=500, cast=int)  # entries per response, at most
+CHANGE_FEED_RETENTION_DAYS = config('CHANGE_FEED_RETENTION_DAYS', default=30, cast=int)  # prune_changes keeps deletes this long
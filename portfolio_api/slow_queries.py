@@ -0,0 +1,168 @@
+"""
+Slow-query log
+
+Every database connection gets an execute wrapper (installed from
+``PortfolioApiConfig.ready``) that times each statement. Statements slower
+than ``SLOW_QUERY_THRESHOLD_MS`` are appended as JSON lines to
+``SLOW_QUERY_LOG`` with:
+
+* the SQL and its fingerprint (the same statement with any literals and
+  ``IN`` lists normalised away)
+* a hash of the parameters, so repeats of one exact query can be told apart
+  from the same query with different values; the values themselves only
+  with ``SLOW_QUERY_LOG_PARAMS`` (they may hold personal data), which lets
+  ``manage.py advise_indexes`` plan the statements again
+* the URL name of the view being served
+* the first frame in project code that issued the query
+
+The first time a worker sees a fingerprint, it also captures the plan of
+that query (``EXPLAIN`` on PostgreSQL, ``EXPLAIN QUERY PLAN`` on SQLite).
+Plans are captured for SELECTs only, through a raw cursor, so they are not
+counted by the query metrics or logged themselves.
+
+``manage.py slow_query_report`` aggregates the log by fingerprint, and
+``manage.py advise_indexes`` suggests indexes for it.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .query_metrics import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+_PLANNABLE_RE = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+_INTERNAL_FILES = (os.path.join('portfolio_api', 'slow_queries.py'), os.path.join('portfolio_api', 'query_metrics.py'))
+
+_write_lock = threading.Lock()
+_explained = set()
+
+
+def fingerprint(sql):
+    """Short hash identifying a statement regardless of literal values"""
+    normalised = _STRING_RE.sub('?', sql)
+    normalised = _NUMBER_RE.sub('?', normalised)
+    normalised = _IN_LIST_RE.sub('IN (...)', normalised)
+    normalised = _SPACE_RE.sub(' ', normalised).strip()
+    return hashlib.sha1(normalised.encode()).hexdigest()[:16]
+
+
+def params_fingerprint(params):
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+
+
+def calling_frame():
+    """``path:line in function`` of the innermost project frame on the stack"""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(base_dir) and 'site-packages' not in filename
+                and not filename.endswith(_INTERNAL_FILES)):
+            return f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """Plan of a SELECT as text, or None when it cannot be captured"""
+    if not _PLANNABLE_RE.match(sql):
+        return None
+    if connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    elif connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        return None
+
+    # A raw cursor skips execute wrappers, so the plan query is neither
+    # counted against the request nor timed again here
+    cursor = connection.create_cursor()
+    savepoint = connection.vendor == 'postgresql' and connection.in_atomic_block
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        except DatabaseError:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            logger.debug('Could not explain %s', sql, exc_info=True)
+            return None
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail); indent children under their parent
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return '\n'.join(lines)
+    return '\n'.join(row[0] for row in rows)
+
+
+def record(connection, sql, params, duration):
+    key = fingerprint(sql)
+    stats = current_query_stats()
+    entry = {
+        'time': time.time(),
+        'pid': os.getpid(),
+        'alias': connection.alias,
+        'vendor': connection.vendor,
+        'fingerprint': key,
+        'params_fingerprint': params_fingerprint(params),
+        'duration_ms': round(duration * 1000, 3),
+        'view': getattr(stats, 'view_name', None),
+        'frame': calling_frame(),
+        'sql': sql,
+        'explain': None,
+    }
+    if settings.SLOW_QUERY_LOG_PARAMS:
+        entry['params'] = list(params) if isinstance(params, (list, tuple)) else params
+    explain_key = (connection.alias, key)
+    if settings.SLOW_QUERY_EXPLAIN and explain_key not in _explained:
+        _explained.add(explain_key)
+        entry['explain'] = explain(connection, sql, params)
+
+    logger.warning('Slow query (%.1f ms) from %s: %s', entry['duration_ms'], entry['frame'], sql[:200])
+    line = json.dumps(entry, default=str) + '\n'
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG), exist_ok=True)
+            with open(settings.SLOW_QUERY_LOG, 'a') as fh:
+                fh.write(line)
+    except OSError:
+        logger.exception('Could not write slow query log')
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS and not many:
+        record(context['connection'], sql, params, duration)
+    return result
+
+
+def install_slow_query_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``slow_query_wrapper`` once per connection"""
+    if settings.SLOW_QUERY_LOG and slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
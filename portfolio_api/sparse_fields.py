@@ -0,0 +1,183 @@
+"""
+Sparse fieldsets: ``?fields=`` and ``?omit=`` on read requests
+
+    GET /api/projects/?fields=id,title,thumbnail
+    GET /api/projects/42/?omit=long_description,challenges,outcomes,images
+
+``SparseFieldsMixin`` trims the serializer to the selected fields and trims
+the queryset to match: columns no selected field reads are left out with
+``only()``, and ``select_related`` and ``prefetch_related`` lookups no
+selected field follows are dropped, so those rows are never fetched.
+Unknown field names are a 400.
+
+The model paths a field reads are taken from its ``source``. Method fields
+and model properties declare theirs in ``Meta.field_sources``::
+
+    field_sources = {
+        'duration': ['start_date', 'end_date', 'current'],
+        'owner_name': ['user'],
+    }
+
+A path naming a relation keeps that relation's join or prefetch; a path
+such as ``user__email`` loads only that column of the joined row. When any
+selected field has no known paths the queryset is left as it is, since the
+field may read anything.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+_field_paths = {}
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def _source_paths(serializer_class, name, field):
+    declared = getattr(serializer_class.Meta, 'field_sources', {})
+    if name in declared:
+        return tuple(declared[name])
+    if field.source == '*':
+        return None
+    model = serializer_class.Meta.model
+    path = []
+    for attr in field.source_attrs:
+        if attr.startswith('get_') and attr.endswith('_display'):
+            attr = attr[4:-8]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        path.append(attr)
+        if not model_field.is_relation:
+            break
+        model = model_field.related_model
+    if not path:
+        return None  # A property or method of the model; it has to be declared
+    # A property of a related object (sender.full_name) reads the whole row
+    return ('__'.join(path),)
+
+
+def field_paths(serializer_class):
+    """Readable field names of ``serializer_class`` mapped to the model paths they read (None if unknown)"""
+    paths = _field_paths.get(serializer_class)
+    if paths is None:
+        paths = _field_paths[serializer_class] = {
+            name: _source_paths(serializer_class, name, field)
+            for name, field in serializer_class().fields.items()
+            if not field.write_only
+        }
+    return paths
+
+
+def requested_fields(request, serializer_class):
+    """
+    Fields of ``serializer_class`` selected by ``?fields=`` and ``?omit=``,
+    in serializer order, or None when the request selects nothing
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = _split(request.query_params.get(FIELDS_PARAM, ''))
+    omit = _split(request.query_params.get(OMIT_PARAM, ''))
+    if not fields and not omit:
+        return None
+
+    available = field_paths(serializer_class)
+    errors = {}
+    for param, names in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            errors[param] = [f'Unknown field: {name}' for name in unknown]
+    if errors:
+        raise ValidationError(errors)
+    return [name for name in available if (not fields or name in fields) and name not in omit]
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, children in tree.items():
+        yield prefix + name
+        yield from _select_related_paths(children, f'{prefix}{name}__')
+
+
+def trim_queryset(queryset, serializer_class, names):
+    """``queryset`` loading only what the ``names`` fields of ``serializer_class`` read"""
+    available = field_paths(serializer_class)
+    paths = [path for name in names for path in available[name] or ()]
+    if any(available[name] is None for name in names) or queryset.query.select_related is True:
+        return queryset
+
+    model = queryset.model
+    roots = {path.split('__', 1)[0] for path in paths}
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if getattr(lookup, 'prefetch_to', lookup).split('__', 1)[0] in roots
+    ]
+    queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+
+    joined = [
+        path for path in _select_related_paths(queryset.query.select_related or {})
+        if path.split('__', 1)[0] in roots
+    ]
+    queryset = queryset.select_related(None)
+    if joined:
+        queryset = queryset.select_related(*joined)
+
+    # A bare relation path needs the whole joined row; others name its columns
+    whole = {path for path in paths if '__' not in path}
+    columns = {model._meta.pk.name}
+    for path in paths:
+        root = path.split('__', 1)[0]
+        field = model._meta.get_field(root)
+        if not field.concrete or field.many_to_many:
+            continue  # Reverse and many-to-many relations are prefetched
+        if root != path and root not in whole and root in joined:
+            columns.add(path)
+        else:
+            columns.add(root)
+    return queryset.only(*columns)
+
+
+def trim_serializer(serializer, names):
+    """Drop the fields not in ``names`` from ``serializer`` (or its child when ``many=True``)"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    for name in list(serializer.fields):
+        if name not in names:
+            serializer.fields.pop(name)
+    return serializer
+
+
+class SparseFieldsMixin:
+    """
+    Generic view mixin applying ``?fields=`` and ``?omit=`` to read requests
+
+    The selection is made against ``get_serializer_class()``; actions that
+    respond with another serializer call ``sparse_queryset`` and
+    ``sparse_fields`` with it themselves.
+    """
+
+    def sparse_fields(self, serializer_class):
+        """Names selected for ``serializer_class`` by this request, or None"""
+        return requested_fields(self.request, serializer_class)
+
+    def sparse_queryset(self, queryset, serializer_class):
+        names = self.sparse_fields(serializer_class)
+        if names is None:
+            return queryset
+        return trim_queryset(queryset, serializer_class, names)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.sparse_queryset(queryset, self.get_serializer_class())
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.sparse_fields(self.get_serializer_class())
+        if names is not None:
+            trim_serializer(serializer, names)
+        return serializer
@@ -0,0 +1,292 @@
+"""
+Surrogate keys for an edge cache (nginx ``proxy_cache`` or a CDN)
+
+Public GET responses are tagged with the keys of the data they contain, in
+the ``SURROGATE_KEY_HEADER`` header (``Surrogate-Key`` by default):
+
+* ``project:<id>`` and ``user:<owner id>`` on a project's detail response
+* ``projects:<user id>`` on lists of one user's projects
+* ``projects`` on every other project list
+
+and likewise for experiences, education, skills and certifications. When a
+registered model is saved or deleted, the keys its data appears under are
+purged once the transaction commits. Child rows (project images, social
+links) purge their parent's keys. A row moved to another owner (or parent)
+also purges the keys it had before, read in ``pre_save``.
+
+Purges are delivered by ``SURROGATE_KEY_PURGER``: ``LogPurger`` only logs
+them, ``NginxPurger`` sends ``PURGE`` requests for every URL served under a
+key. Tagged responses carry an edge TTL of ``SURROGATE_KEY_TTL`` seconds
+(``X-Accel-Expires`` for nginx, ``Surrogate-Control`` for CDNs); every
+other response tells the edge not to store it, since nothing would purge
+it. Browsers are not told to cache either way.
+
+``QuerySet.update()`` and ``bulk_create()`` send no signals; code using
+them on these models calls ``purge_later`` itself.
+"""
+import functools
+import logging
+import urllib.error
+import urllib.request
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+from .compression import is_public
+
+logger = logging.getLogger(__name__)
+
+
+class KeySpec:
+    """How one model's rows map to surrogate keys"""
+
+    def __init__(self, key=None, collection=None, owner='user', parent=None, ignore_fields=()):
+        self.key = key
+        self.collection = collection
+        self.owner = owner
+        self.parent = parent
+        # Saves limited to these fields change nothing a public response shows
+        self.ignore_fields = frozenset(ignore_fields)
+
+
+# Purges of a child row go to the keys of its ``parent``
+KEY_SPECS = {
+    'accounts.User': KeySpec('user', ignore_fields=['last_login', 'password', 'mfa_secret']),
+    'accounts.SocialLink': KeySpec(parent='user'),
+    'projects.Project': KeySpec('project', 'projects'),
+    'projects.ProjectImage': KeySpec(parent='project'),
+    'experiences.Experience': KeySpec('experience', 'experiences'),
+    'education.Education': KeySpec('education', 'educations'),
+    'skills.Skill': KeySpec('skill', 'skills'),
+    'certifications.Certification': KeySpec('certification', 'certifications'),
+}
+
+
+def key_spec(model):
+    return KEY_SPECS.get(model._meta.concrete_model._meta.label)
+
+
+def detail_keys(instance):
+    """Keys for a response showing ``instance`` (and its owner's name)"""
+    spec = key_spec(type(instance))
+    keys = [f'{spec.key}:{instance.pk}']
+    attname = f'{spec.owner}_id'
+    # Left out by ?fields= (see portfolio_api.sparse_fields), so nothing of the owner is shown
+    if not spec.collection or attname in instance.get_deferred_fields():
+        return keys
+    owner_id = getattr(instance, attname, None)
+    if owner_id is not None:
+        keys.append(f'user:{owner_id}')
+    return keys
+
+
+def list_keys(model, user_id=None):
+    """Keys for a list of ``model`` rows, all of them or one user's"""
+    collection = key_spec(model).collection
+    return [f'{collection}:{user_id}' if user_id else collection]
+
+
+def purge_keys(instance):
+    """Every key that responses showing ``instance`` may be tagged with"""
+    spec = key_spec(type(instance))
+    if spec.parent:
+        try:
+            parent = getattr(instance, spec.parent)
+        except ObjectDoesNotExist:
+            return []  # Deleted along with its parent, which purged itself
+        return purge_keys(parent) if parent is not None else []
+    keys = [f'{spec.key}:{instance.pk}']
+    if spec.collection:
+        keys.append(spec.collection)
+        owner_id = getattr(instance, f'{spec.owner}_id', None)
+        if owner_id is not None:
+            keys.append(f'{spec.collection}:{owner_id}')
+    return keys
+
+
+def add_surrogate_keys(request, *keys):
+    """Tag the response to ``request`` (a Django or DRF request) with ``keys``"""
+    request = getattr(request, '_request', request)
+    if not hasattr(request, '_surrogate_keys'):
+        request._surrogate_keys = set()
+    request._surrogate_keys.update(keys)
+
+
+@functools.cache
+def _load_purger(path):
+    return import_string(path)()
+
+
+def get_purger():
+    return _load_purger(settings.SURROGATE_KEY_PURGER)
+
+
+def purge_later(keys):
+    """Purge ``keys`` once the current transaction commits (now, outside one)"""
+    keys = sorted(set(keys))
+    if keys:
+        transaction.on_commit(lambda: get_purger().purge(keys), robust=True)
+
+
+def remember_previous_keys(sender, instance, raw=False, update_fields=None, **kwargs):
+    """``pre_save`` receiver: the stored row's keys, when the save moves it to another owner or parent"""
+    spec = key_spec(sender)
+    field = spec.parent or (spec.owner if spec.collection else None)
+    if raw or field is None or instance._state.adding:
+        return
+    if update_fields is not None and not {field, f'{field}_id'} & set(update_fields):
+        return
+    stored = sender._default_manager.filter(pk=instance.pk).first()
+    if stored is not None and getattr(stored, f'{field}_id') != getattr(instance, f'{field}_id'):
+        instance._surrogate_previous_keys = purge_keys(stored)
+
+
+def purge_on_change(sender, instance, **kwargs):
+    """``post_save``/``post_delete`` receiver for the models in ``KEY_SPECS``"""
+    if kwargs.get('raw'):
+        return  # loaddata
+    previous = instance.__dict__.pop('_surrogate_previous_keys', [])
+    update_fields = kwargs.get('update_fields')
+    if update_fields and update_fields <= key_spec(sender).ignore_fields:
+        return
+    purge_later([*purge_keys(instance), *previous])
+
+
+def connect_signals():
+    for label in KEY_SPECS:
+        model = apps.get_model(label)
+        dispatch_uid = f'portfolio_api.surrogate_keys.{label}'
+        pre_save.connect(remember_previous_keys, sender=model, dispatch_uid=dispatch_uid)
+        for signal in (post_save, post_delete):
+            signal.connect(purge_on_change, sender=model, dispatch_uid=dispatch_uid)
+
+
+class BasePurger:
+    """Delivers purges; subclasses implement ``purge``"""
+
+    def observe(self, request, keys):
+        """Called for every response tagged with ``keys``"""
+
+    def purge(self, keys):
+        raise NotImplementedError
+
+
+class LogPurger(BasePurger):
+    """Stand-in that only logs the keys it is asked to purge"""
+
+    def purge(self, keys):
+        logger.info('Surrogate key purge: %s', ' '.join(keys))
+
+
+class NginxPurger(BasePurger):
+    """
+    Purge nginx ``proxy_cache`` entries by URL
+
+    nginx has no tags, so the URLs served under each key are recorded in
+    the ``SURROGATE_KEY_CACHE`` cache as responses go out, and a purge
+    sends ``PURGE <url>`` for each of them to ``SURROGATE_PURGE_ORIGIN``
+    with the original ``Host``. That needs a location answering ``PURGE``
+    (ngx_cache_purge's ``proxy_cache_purge PURGE from 127.0.0.1;``).
+    """
+    # URLs kept per key; lists with many query-string variants drop the oldest
+    max_urls = 500
+
+    def __init__(self):
+        self.cache = caches[settings.SURROGATE_KEY_CACHE]
+
+    def observe(self, request, keys):
+        url = (request.get_host(), request.get_full_path())
+        indexes = {f'surrogate-key:{key}': key for key in keys}
+        known = self.cache.get_many(list(indexes))
+        updated = {
+            index: [*known.get(index, []), url][-self.max_urls:]
+            for index in indexes if url not in known.get(index, [])
+        }
+        if updated:
+            # Outlive the cached responses they point at
+            self.cache.set_many(updated, settings.SURROGATE_KEY_TTL * 2)
+
+    def purge(self, keys):
+        indexes = [f'surrogate-key:{key}' for key in keys]
+        urls = {url for entries in self.cache.get_many(indexes).values() for url in entries}
+        self.cache.delete_many(indexes)
+        for host, path in sorted(urls):
+            request = urllib.request.Request(
+                settings.SURROGATE_PURGE_ORIGIN.rstrip('/') + path, method='PURGE', headers={'Host': host}
+            )
+            try:
+                urllib.request.urlopen(request, timeout=settings.SURROGATE_PURGE_TIMEOUT).close()
+            except urllib.error.HTTPError as exc:
+                if exc.code != 404:  # 404: nothing cached under that URL
+                    logger.warning('Purging %s%s failed: HTTP %s', host, path, exc.code)
+            except OSError as exc:
+                logger.warning('Purging %s%s failed: %s', host, path, exc)
+        logger.info('Surrogate key purge: %s (%d URLs)', ' '.join(keys), len(urls))
+
+
+class SurrogateKeyMixin:
+    """
+    ViewSet mixin tagging public GET responses with surrogate keys
+
+    Detail responses get the object's keys; lists get the model's
+    collection key, narrowed to one user by a ``user_id`` URL kwarg or a
+    ``?user=`` filter.
+    """
+
+    def get_object(self):
+        obj = super().get_object()
+        self.surrogate_object = obj
+        return obj
+
+    def surrogate_keys(self):
+        obj = getattr(self, 'surrogate_object', None)
+        if obj is not None:
+            return detail_keys(obj)
+        user_id = self.kwargs.get('user_id') or self.request.query_params.get('user')
+        return list_keys(self.get_queryset().model, user_id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in SAFE_METHODS and response.status_code == 200:
+            add_surrogate_keys(request, *self.surrogate_keys())
+        return response
+
+
+class SurrogateKeyMiddleware:
+    """Emit the keys views added, and the edge TTL headers that go with them"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        keys = getattr(request, '_surrogate_keys', None)
+        ttl = settings.SURROGATE_KEY_TTL
+        if keys and ttl and is_public(request, response):
+            response[settings.SURROGATE_KEY_HEADER] = ' '.join(sorted(keys))
+            response['Surrogate-Control'] = f'max-age={ttl}'
+            response['X-Accel-Expires'] = str(ttl)
+            get_purger().observe(request, keys)
+        else:
+            response['Surrogate-Control'] = 'no-store'
+            response['X-Accel-Expires'] = '0'
+        return response
@@ -0,0 +1,89 @@
+"""
+Shared test helpers
+
+``PortfolioTestCase`` seeds two public portfolios and an inbox once per
+class (``benchmarks.dataset``, plus project images and social links so
+prefetches have rows to fetch), and makes every request enforce its view's
+query budget: ``QueryBudgetExceeded`` propagates out of the test client and
+fails the test.
+
+``FastListParityMixin`` checks that the ``.values()`` fast path
+(``portfolio_api.fast_serializers``) renders the same bytes as the DRF
+serializers for a viewset's list endpoints.
+"""
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks.dataset import seed_portfolio
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class PortfolioTestCase(APITestCase):
+    # Rows per user and section; more than one page, so N+1 queries would show
+    rows = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        from accounts.models import SocialLink, User
+        from projects.models import Project, ProjectImage
+
+        cls.seeded = seed_portfolio(
+            users=2, projects=cls.rows, experiences=cls.rows, education=cls.rows,
+            skills=cls.rows, certifications=cls.rows, messages=cls.rows,
+        )
+        cls.admin = User.objects.get(email=cls.seeded['admin_email'])
+        cls.owner = User.objects.get(pk=cls.seeded['user_ids'][0])
+        ProjectImage.objects.bulk_create([
+            ProjectImage(project=project, image=f'projects/{project.pk}-{i}.png', order=i)
+            for project in Project.objects.all()
+            for i in range(2)
+        ])
+        SocialLink.objects.bulk_create([
+            SocialLink(user=user, platform=platform, url=f'https://{platform}.example.com/{user.pk}')
+            for user in User.objects.all()
+            for platform in ('github', 'linkedin')
+        ])
+
+    def setUp(self):
+        # Throttle counters and cached response bodies live in the cache
+        cache.clear()
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get_ok(self, path, data=None, user=None):
+        """GET ``path`` (as ``user``, with a bearer token) and assert a 200"""
+        if user is not None:
+            self.authenticate(user)
+        response = self.client.get(path, data)
+        self.client.credentials()
+        self.assertEqual(response.status_code, 200, getattr(response, 'content', b'')[:500])
+        return response
+
+
+class FastListParityMixin:
+    """
+    Mix into a ``PortfolioTestCase``; set ``paths`` (list endpoints, with
+    ``{user}`` for the seeded owner) and ``variants`` (query strings, each
+    requested on every path). Every response must be byte-identical with
+    ``FAST_LIST_SERIALIZERS`` on and off.
+    """
+    paths = []
+    variants = [{}, {'page': 2}]
+
+    def get_body(self, path, params, fast):
+        cache.clear()
+        with self.settings(FAST_LIST_SERIALIZERS=fast):
+            return self.get_ok(path, params).content
+
+    def test_fast_path_matches_drf(self):
+        for path in self.paths:
+            path = path.format(user=self.owner.pk)
+            for params in self.variants:
+                params = {name: str(value).format(user=self.owner.pk) for name, value in params.items()}
+                with self.subTest(path=path, **params):
+                    fast = self.get_body(path, params, fast=True)
+                    self.assertEqual(fast, self.get_body(path, params, fast=False))
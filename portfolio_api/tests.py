@@ -0,0 +1,490 @@
+import gzip
+import importlib.util
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import Throttled
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.models import User
+from benchmarks.harness import REPO_ROOT, GunicornServer, bench_environment
+from projects.models import Project
+from projects.views import ProjectViewSet
+from skills.models import Skill
+
+from . import compression, renderers
+from .compression import negotiate_encoding
+from .hashing import FailedCredentialTracker, _client_ip
+from .metrics import metrics_view
+from .query_metrics import QueryBudgetExceeded
+from .renderers import FastJSONRenderer, JSONFragment
+from .testing import PortfolioTestCase
+
+
+@override_settings(TRUSTED_PROXY_IPS=['127.0.0.1'])
+class ClientIpTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def test_proxied_request_uses_real_ip(self):
+        request = self.factory.post('/', REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.7')
+        self.assertEqual(_client_ip(request), '203.0.113.7')
+
+    def test_untrusted_peer_cannot_spoof_real_ip(self):
+        request = self.factory.post('/', REMOTE_ADDR='198.51.100.2', HTTP_X_REAL_IP='203.0.113.7')
+        self.assertEqual(_client_ip(request), '198.51.100.2')
+
+    def test_failures_from_one_client_do_not_lock_out_another(self):
+        tracker = FailedCredentialTracker(limit=2, window=60)
+        attacker = _client_ip(self.factory.post('/', REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.7'))
+        victim = _client_ip(self.factory.post('/', REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='192.0.2.10'))
+        for _ in range(2):
+            tracker.record_failure(attacker, 'victim@example.com')
+
+        with self.assertRaises(Throttled):
+            tracker.check(attacker, 'victim@example.com')
+        tracker.check(victim, 'victim@example.com')
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsAccessTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_direct_scrape_from_allowed_ip(self):
+        self.assertEqual(metrics_view(self.factory.get('/metrics', REMOTE_ADDR='127.0.0.1')).status_code, 200)
+
+    def test_other_ip_is_refused(self):
+        self.assertEqual(metrics_view(self.factory.get('/metrics', REMOTE_ADDR='10.0.0.5')).status_code, 403)
+
+    def test_request_through_nginx_is_refused(self):
+        request = self.factory.get('/metrics', REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.7')
+        self.assertEqual(metrics_view(request).status_code, 403)
+
+
+@skipUnless(importlib.util.find_spec('gunicorn'), 'gunicorn is not installed')
+class GunicornMetricsTests(SimpleTestCase):
+    """/metrics reports what every worker recorded, through the deployment configs"""
+
+    def scrape(self, config, app):
+        with tempfile.TemporaryDirectory() as workdir:
+            # TMPDIR moves the config's default PROMETHEUS_MULTIPROC_DIR into workdir
+            env = bench_environment(workdir, TMPDIR=workdir)
+            env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+            subprocess.run(
+                [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+                cwd=REPO_ROOT, env=env, check=True,
+            )
+            with GunicornServer(env, workdir, config=config, app=app, workers=2) as server:
+                for _ in range(6):
+                    urllib.request.urlopen(f'{server.base_url}/api/projects/').read()
+                body = urllib.request.urlopen(f'{server.base_url}/metrics').read().decode()
+                files = list(Path(workdir, 'portfolio_api_prometheus').glob('*.db'))
+        return body, files
+
+    def test_sync_workers(self):
+        body, files = self.scrape('gunicorn_config.py', 'portfolio_api.wsgi:application')
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="project-list",status="200"} 6.0', body)
+        self.assertTrue(files)
+
+    @skipUnless(importlib.util.find_spec('uvicorn_worker'), 'uvicorn-worker is not installed')
+    def test_asgi_workers(self):
+        body, files = self.scrape('gunicorn_asgi_config.py', 'portfolio_api.asgi:application')
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="project-list",status="200"} 6.0', body)
+        self.assertTrue(files)
+
+
+# Run in the server's environment: the same user in both files, each with a
+# skill named after its database, then which file reads go to outside and
+# inside a transaction during a request that may use replicas
+REPLICA_SETUP = """
+import json
+from django.db import transaction
+from accounts.models import User
+from portfolio_api import db_router
+from skills.models import Skill
+
+for alias in ('default', 'replica_1'):
+    user = User(id='00000000-0000-4000-8000-000000000001', email='owner@example.com')
+    user.save(using=alias)
+    Skill(user=user, name=alias).save(using=alias)
+db_router._replica_reads_allowed.set(True)
+outside = Skill.objects.get().name
+with transaction.atomic():
+    inside = Skill.objects.get().name
+print(json.dumps([outside, inside]))
+"""
+
+
+@skipUnless(importlib.util.find_spec('gunicorn'), 'gunicorn is not installed')
+class ReplicaRoutingTests(SimpleTestCase):
+    """Reads against a primary and a replica in two SQLite files, under gunicorn"""
+
+    def serve(self, workdir, replica=None, **overrides):
+        """Migrate both files and start a server reading from them"""
+        env = bench_environment(
+            workdir, DB_REPLICAS=Path(workdir, 'replica.sqlite3'), DB_REPLICA_LAG_CHECK_INTERVAL=0,
+            DB_CONN_MAX_AGE=0, CONTACT_SPOOL_ENABLED=False, CONTACT_NOTIFY_INTERVAL=0,
+            CONTACT_EVENTS_BACKEND='contacts.events.LocalBackend', **overrides,
+        )
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        manage = [sys.executable, 'manage.py']
+        for alias in ('default', 'replica_1'):
+            subprocess.run([*manage, 'migrate', '--database', alias, '--verbosity', '0'], cwd=REPO_ROOT, env=env, check=True)
+        setup = subprocess.run([*manage, 'shell', '-c', REPLICA_SETUP], cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True)
+        if replica is not None:
+            Path(workdir, 'replica.sqlite3').write_bytes(replica)
+        return GunicornServer(env, workdir, workers=1), json.loads(setup.stdout.splitlines()[-1])
+
+    def read(self, server, cookie=None):
+        """Name of the skill the list shows, i.e. the database it was read from"""
+        request = urllib.request.Request(f'{server.base_url}/api/skills/')
+        if cookie:
+            request.add_header('Cookie', cookie)
+        return [skill['name'] for skill in json.load(urllib.request.urlopen(request))['results']]
+
+    def test_reads_go_to_the_replica_until_a_write(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            server, (outside, inside) = self.serve(workdir)
+            self.assertEqual((outside, inside), ('replica_1', 'default'))
+            with server:
+                self.assertEqual(self.read(server), ['replica_1'])
+                submit = urllib.request.Request(
+                    f'{server.base_url}/api/contacts/submit/', method='POST',
+                    headers={'Content-Type': 'application/json'},
+                    data=json.dumps({
+                        'sender_name': 'Ada', 'sender_email': 'ada@example.com', 'message_type': 'general',
+                        'subject': 'Hello', 'message': 'A question about your work.',
+                    }).encode(),
+                )
+                response = urllib.request.urlopen(submit)
+                self.assertEqual(response.status, 201)
+                cookie = response.headers['Set-Cookie'].split(';')[0]
+                self.assertTrue(cookie.startswith('db_primary_until='))
+                self.assertEqual(self.read(server, cookie), ['default'])
+                self.assertEqual(self.read(server), ['replica_1'])
+                # A cookie pinning beyond DB_REPLICA_STICKY_SECONDS is ignored
+                self.assertEqual(self.read(server, f'db_primary_until={time.time() + 3600}'), ['replica_1'])
+
+    def test_lagging_replica_falls_back_to_the_primary(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            # SQLite reports no lag; a negative limit makes any replica too far behind
+            server, _ = self.serve(workdir, DB_REPLICA_MAX_LAG=-1)
+            with server:
+                self.assertEqual(self.read(server), ['default'])
+
+    def test_unavailable_replica_falls_back_to_the_primary(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            server, _ = self.serve(workdir, replica=b'not a database' * 100)
+            with server:
+                self.assertEqual(self.read(server), ['default'])
+
+
+class AsyncQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over its async view's query_budget"""
+    sections = ['projects', 'experiences', 'education', 'skills', 'certifications']
+
+    def test_list(self):
+        for section in self.sections:
+            with self.subTest(section):
+                self.get_ok(f'/api/async/{section}/')
+                self.get_ok(f'/api/async/{section}/', {'page': 2, 'user': self.owner.pk})
+
+    def test_retrieve(self):
+        for section in self.sections:
+            with self.subTest(section):
+                first = self.get_ok(f'/api/async/{section}/').json()['results'][0]
+                self.get_ok(f'/api/async/{section}/{first["id"]}/')
+
+    def test_portfolio(self):
+        self.get_ok(f'/api/async/portfolio/{self.owner.pk}/')
+
+
+class QueryBudgetTests(PortfolioTestCase):
+    def test_request_over_budget_fails(self):
+        with mock.patch.object(ProjectViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/projects/')
+
+
+class FragmentView(APIView):
+    permission_classes = []
+    # Spacing and number formatting no encoder would produce, so a re-encode shows
+    cached = b'{"id": 7,"score":1.50 , "tags":["a","\\u00e9"]}'
+
+    def get(self, request):
+        return Response({'items': [JSONFragment(self.cached), {'id': 8}], 'count': 2})
+
+
+class JSONFragmentTests(SimpleTestCase):
+    def render(self, accept='application/json'):
+        request = RequestFactory().get('/', HTTP_ACCEPT=accept)
+        response = FragmentView.as_view()(request)
+        return response.render().content
+
+    def test_fragment_is_copied_verbatim(self):
+        body = self.render()
+        self.assertEqual(body, b'{"items":[' + FragmentView.cached + b',{"id":8}],"count":2}')
+
+    def test_fragment_without_orjson_fragment(self):
+        with mock.patch.object(renderers, 'ORJSON_FRAGMENT', None):
+            self.assertIn(FragmentView.cached, self.render())
+
+    def test_fragment_on_the_stdlib_path(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertIn(FragmentView.cached, self.render())
+        self.assertIn(FragmentView.cached, self.render('application/json; indent=2'))
+
+    def test_fragment_in_ascii_output(self):
+        renderer = FastJSONRenderer()
+        renderer.ensure_ascii = True
+        body = renderer.render({'name': 'Caf\u00e9', 'item': JSONFragment(FragmentView.cached)})
+        self.assertEqual(body, b'{"name":"Caf\\u00e9","item":' + FragmentView.cached + b'}')
+
+    def test_encoded_fragment_matches_dumps(self):
+        data = {'id': 1, 'title': 'Caf\u00e9'}
+        self.assertEqual(JSONFragment.encode(data).raw, renderers.dumps(data))
+
+
+@override_settings(SURROGATE_KEY_PURGER='portfolio_api.surrogate_keys.LogPurger')
+class SurrogateKeyTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.filter(user=self.owner).first()
+        self.other = User.objects.get(pk=self.seeded['user_ids'][1])
+
+    def purged(self, change):
+        """Keys ``LogPurger`` is asked to purge by ``change()``, which happens only on commit"""
+        with self.assertLogs('portfolio_api.surrogate_keys', 'INFO') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+                self.assertEqual(logs.output, [])
+        return {key for line in logs.output for key in line.split('Surrogate key purge: ', 1)[1].split()}
+
+    def test_public_responses_are_tagged(self):
+        for path, params, keys in [
+            ('/api/projects/', None, 'projects'),
+            ('/api/projects/', {'user': self.owner.pk}, f'projects:{self.owner.pk}'),
+            (f'/api/projects/{self.project.pk}/', None, f'project:{self.project.pk} user:{self.owner.pk}'),
+            (f'/api/projects/{self.project.pk}/', {'fields': 'id,title'}, f'project:{self.project.pk}'),
+            (f'/api/async/projects/{self.project.pk}/', {'fields': 'id,title'}, f'project:{self.project.pk}'),
+            ('/api/skills/', {'user': self.owner.pk}, f'skills:{self.owner.pk}'),
+        ]:
+            with self.subTest(path=path, params=params):
+                response = self.get_ok(path, params)
+                self.assertEqual(response['Surrogate-Key'], keys)
+                self.assertEqual(response['Surrogate-Control'], 'max-age=300')
+
+    def test_private_responses_are_not_stored(self):
+        response = self.get_ok('/api/projects/', user=self.owner)
+        self.assertNotIn('Surrogate-Key', response)
+        self.assertEqual((response['Surrogate-Control'], response['X-Accel-Expires']), ('no-store', '0'))
+
+    def test_save_and_delete_purge_the_row_and_its_lists(self):
+        keys = {f'project:{self.project.pk}', 'projects', f'projects:{self.owner.pk}'}
+        self.assertEqual(self.purged(self.project.save), keys)
+        self.assertEqual(self.purged(self.project.delete), keys)
+
+    def test_child_row_purges_its_parent(self):
+        image = self.project.images.first()
+        self.assertEqual(self.purged(image.save), {f'project:{self.project.pk}', 'projects', f'projects:{self.owner.pk}'})
+
+    def test_moving_a_row_purges_both_owners(self):
+        def move():
+            self.project.user = self.other
+            self.project.save()
+        self.assertEqual(self.purged(move), {
+            f'project:{self.project.pk}', 'projects', f'projects:{self.owner.pk}', f'projects:{self.other.pk}',
+        })
+
+        skill = Skill.objects.filter(user=self.owner).first()
+        skill.user, skill.name = self.other, 'Moved skill'
+        self.assertEqual(
+            self.purged(lambda: skill.save(update_fields=['user', 'name'])),
+            {f'skill:{skill.pk}', 'skills', f'skills:{self.owner.pk}', f'skills:{self.other.pk}'},
+        )
+
+    def test_moving_a_child_row_purges_both_parents(self):
+        image = self.project.images.first()
+        target = Project.objects.filter(user=self.other).first()
+
+        def move():
+            image.project = target
+            image.save()
+        self.assertEqual(self.purged(move), {
+            f'project:{self.project.pk}', f'project:{target.pk}', 'projects',
+            f'projects:{self.owner.pk}', f'projects:{self.other.pk}',
+        })
+
+    def test_ignored_fields_purge_nothing(self):
+        with self.assertNoLogs('portfolio_api.surrogate_keys', 'INFO'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.owner.save(update_fields=['last_login'])
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_preference_and_weights(self):
+        for header, coding in [
+            ('', None),
+            ('identity', None),
+            ('gzip', 'gzip'),
+            ('GZIP, deflate', 'gzip'),
+            ('gzip, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('br;q=0, gzip;q=0', None),
+            ('*', 'br'),
+            ('*;q=0.1, br;q=0', 'gzip'),
+            ('gzip;q=1.2.3, br;q=0.2', 'br'),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(negotiate_encoding(header), coding)
+
+    def test_without_brotli(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(negotiate_encoding('br, gzip;q=0.1'), 'gzip')
+            self.assertIsNone(negotiate_encoding('br'))
+
+
+@skipUnless(compression.brotli, 'brotli is not installed')
+class CompressionTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.filter(user=self.owner).first()
+        self.path = f'/api/projects/{self.project.pk}/'
+        self.cache = caches[settings.COMPRESSION_CACHE]
+        self.cache.clear()
+
+    def get(self, path, encoding, user=None):
+        if user is not None:
+            self.authenticate(user)
+        response = self.client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+        self.client.credentials()
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def body(self, response):
+        """The response body with its Content-Encoding undone"""
+        coding = response.get('Content-Encoding')
+        if coding == 'br':
+            return compression.brotli.decompress(response.content)
+        if coding == 'gzip':
+            return gzip.decompress(response.content)
+        return response.content
+
+    def stored(self):
+        """Calls to ``COMPRESSION_CACHE.set`` for compressed bodies during the test"""
+        set_ = mock.patch.object(self.cache, 'set', wraps=self.cache.set).start()
+        self.addCleanup(mock.patch.stopall)
+        return lambda: [call.args[0] for call in set_.call_args_list if call.args[0].startswith('compressed:')]
+
+    def test_compresses_with_the_preferred_coding(self):
+        identity = self.get(self.path, '')
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertIn('Accept-Encoding', identity['Vary'])
+        for encoding, coding in [('gzip', 'gzip'), ('gzip;q=0.5, br', 'br')]:
+            with self.subTest(encoding=encoding):
+                response = self.get(self.path, encoding)
+                self.assertEqual(response['Content-Encoding'], coding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(response['Content-Length'], str(len(response.content)))
+                self.assertEqual(response['ETag'], 'W/' + identity['ETag'])
+                self.assertEqual(self.body(response), identity.content)
+
+    def test_small_responses_are_left_alone(self):
+        length = len(self.get(self.path, '').content)
+        with self.settings(COMPRESSION_MIN_LENGTH=length + 1):
+            response = self.get(self.path, 'gzip')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+        with self.settings(COMPRESSION_MIN_LENGTH=length):
+            self.assertEqual(self.get(self.path, 'gzip')['Content-Encoding'], 'gzip')
+
+    def test_public_bodies_are_compressed_once_per_etag(self):
+        stored = self.stored()
+        first = self.get(self.path, 'gzip')
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            second = self.get(self.path, 'gzip')
+        compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(stored()), 1)
+
+        self.project.title = 'Renamed for a new ETag'
+        self.project.save()
+        changed = self.get(self.path, 'gzip')
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(len(set(stored())), 2)
+        self.assertEqual(json.loads(self.body(changed))['title'], 'Renamed for a new ETag')
+        self.assertEqual(self.body(changed), self.get(self.path, '').content)
+
+    def test_private_bodies_are_never_cached(self):
+        stored = self.stored()
+        for encoding in ('gzip', 'br'):
+            with self.subTest(encoding=encoding):
+                response = self.get(self.path, encoding, user=self.owner)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertEqual(json.loads(self.body(response))['id'], str(self.project.pk))
+        self.assertEqual(stored(), [])
+
+
+class SparseFieldsTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.filter(user=self.owner).first()
+
+    def results(self, path, params):
+        body = self.get_ok(path, params).json()
+        return body['results'] if 'results' in body else [body]
+
+    def test_fields_and_omit_select_response_keys(self):
+        for path in [
+            '/api/projects/', f'/api/projects/{self.project.pk}/',
+            '/api/async/projects/', f'/api/async/projects/{self.project.pk}/',
+        ]:
+            for fast in (True, False):
+                with self.subTest(path=path, fast=fast), self.settings(FAST_LIST_SERIALIZERS=fast):
+                    everything = list(self.results(path, None)[0])
+                    selected = [name for name in everything if name in ('id', 'title', 'duration', 'technologies')]
+                    for params, keys in [
+                        ({'fields': 'title,duration, id,technologies'}, selected),
+                        ({'omit': 'title,duration,id,technologies'}, [name for name in everything if name not in selected]),
+                        ({'fields': 'id,title', 'omit': 'title'}, ['id']),
+                    ]:
+                        results = self.results(path, params)
+                        self.assertTrue(results)
+                        for row in results:
+                            self.assertEqual(list(row), keys, params)
+
+    def test_omitted_columns_are_not_loaded(self):
+        path = f'/api/projects/{self.project.pk}/'
+        with CaptureQueriesContext(connection) as queries:
+            self.get_ok(path, {'omit': 'long_description,challenges,images'})
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertIn('"projects_project"."title"', sql)
+        self.assertNotIn('long_description', sql)
+        self.assertNotIn('projects_projectimage', sql)
+
+    def test_unknown_fields_are_a_400(self):
+        for path in [
+            '/api/projects/', f'/api/projects/{self.project.pk}/',
+            '/api/async/projects/', f'/api/async/projects/{self.project.pk}/',
+        ]:
+            with self.subTest(path=path):
+                response = self.client.get(path, {'fields': 'id,nope', 'omit': 'secret'})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['errors'], {
+                    'fields': ['Unknown field: nope'], 'omit': ['Unknown field: secret'],
+                })
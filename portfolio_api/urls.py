@@ -20,22 +20,21 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView
-)
+from portfolio_api.metrics import metrics_view
+from portfolio_api.utils import lazy_view
 
 urlpatterns = [
     # Home page
     path("", TemplateView.as_view(template_name="home.html"), name="home"),
     
+    # Request profiles (staff only); must precede the admin catch-all
+    path("admin/profiles/", include('portfolio_api.profiling_views')),
     path("admin/", admin.site.urls),
     
-    # API Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # API Documentation (drf_spectacular.views is imported on first use)
+    path('api/schema/', lazy_view('drf_spectacular.views.SpectacularAPIView'), name='schema'),
+    path('api/schema/swagger-ui/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/schema/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
     
     # API endpoints
     path('api/auth/', include('accounts.urls')),
@@ -45,6 +44,13 @@ urlpatterns = [
     path('api/education/', include('education.urls')),
     path('api/skills/', include('skills.urls')),
     path('api/certifications/', include('certifications.urls')),
+    path('api/changes/', include('changes.urls')),
+    
+    # Prometheus scrape target
+    path('metrics', metrics_view, name='metrics'),
+    
+    # Async read-only endpoints (served natively under ASGI)
+    path('api/async/', include('portfolio_api.async_urls')),
 ]
 
 # Serve media files in development
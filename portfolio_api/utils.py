@@ -1,11 +1,19 @@
 """
 Custom utilities for the Portfolio API
 """
-from rest_framework.views import exception_handler
+import functools
+
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.views import exception_handler, set_rollback
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import Throttled
 from datetime import datetime
 
+from .db_pool import is_pool_timeout
+from .metrics import record_rejection
+
 
 def custom_exception_handler(exc, context):
     """
@@ -14,6 +22,18 @@ def custom_exception_handler(exc, context):
     # Call REST framework's default exception handler first
     response = exception_handler(exc, context)
 
+    if isinstance(exc, Throttled):
+        record_rejection(context['request'], 'throttle')
+
+    # An exhausted connection pool is a capacity problem, not a server error
+    if response is None and is_pool_timeout(exc):
+        set_rollback()
+        response = Response(
+            {'detail': 'Database is busy. Please retry shortly.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '1'}
+        )
+
     if response is not None:
         # Customize the response format
         custom_response_data = {
@@ -48,3 +68,22 @@ def get_upload_path(instance, filename, folder):
     ext = filename.split('.')[-1]
     filename = f"{slugify(instance.__class__.__name__)}_{instance.id}.{ext}"
     return os.path.join(folder, filename)
+
+
+def lazy_view(view_path, **initkwargs):
+    """
+    URLconf entry for a DRF view class that is imported on its first request
+
+    For rarely requested views whose modules are expensive to import (the
+    schema and its docs pages), so workers don't load them at boot. Like
+    ``APIView.as_view()`` the view is CSRF exempt; DRF's authentication
+    enforces CSRF for session-authenticated requests itself.
+    """
+    @functools.cache
+    def load():
+        return import_string(view_path).as_view(**initkwargs)
+
+    def view(request, *args, **kwargs):
+        return load()(request, *args, **kwargs)
+
+    return csrf_exempt(view)
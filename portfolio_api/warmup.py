@@ -0,0 +1,242 @@
+"""
+Cache warming for freshly started workers and deploys
+
+The hottest public responses (featured projects and the sections of the
+busiest portfolios, see ``hot_paths``) are rendered ahead of the first
+visitor, once per response coding, through the full middleware stack. That
+opens the database connection, runs the first-request imports, builds the
+serializer plans and fills the compressed-body cache.
+
+Two entry points:
+
+* ``warm_worker``, from gunicorn's ``post_worker_init`` hook
+  (``GUNICORN_WARM=true``): each new worker renders the paths in-process
+  before it takes traffic. At most ``WARM_CACHE_CONCURRENCY`` workers do a
+  full warm at once; the others render only the first path and start
+  serving, so a restart never takes every worker out at the same time.
+* ``manage.py warm_caches``: renders the paths in its own process (shared
+  cache backends, the database's buffers) or requests them from a running
+  server with ``--url``, which also fills an edge cache in front of it.
+
+Warm-up requests skip the anonymous rate limit: in-process ones carry a
+WSGI environ flag no client can set, HTTP ones a header holding a token
+derived from ``SECRET_KEY``.
+"""
+import io
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import throttling
+
+from .compression import supported_encodings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+WARMUP_ENVIRON_KEY = 'portfolio_api.warmup'
+WARMUP_HEADER = 'X-Cache-Warmup'
+
+SECTIONS = ['project', 'experience', 'education', 'skill', 'certification']
+
+
+def warmup_token():
+    return salted_hmac('portfolio_api.warmup', 'cache-warmup').hexdigest()
+
+
+def is_warmup(request):
+    """True for requests made by the cache warmer rather than a client"""
+    if request.META.get(WARMUP_ENVIRON_KEY):
+        return True
+    token = request.META.get('HTTP_' + WARMUP_HEADER.upper().replace('-', '_'))
+    return bool(token) and constant_time_compare(token, warmup_token())
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle):
+    """``AnonRateThrottle`` that lets warm-up requests through uncounted"""
+
+    def allow_request(self, request, view):
+        if is_warmup(request):
+            return True
+        return super().allow_request(request, view)
+
+
+def hot_users(limit):
+    """Ids of the portfolios to warm: most featured projects first, then most projects"""
+    if limit <= 0:
+        return []
+    return list(
+        get_user_model().objects.filter(is_active=True)
+        .annotate(
+            featured_count=Count('projects', filter=Q(projects__featured=True)),
+            project_count=Count('projects'),
+        )
+        .filter(project_count__gt=0)
+        .order_by('-featured_count', '-project_count', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+
+def hot_paths(users=None, featured=None):
+    """
+    Paths to warm, hottest first: featured projects, the project list, the
+    top ``featured`` project pages, every section of the top ``users``
+    portfolios, then ``WARM_CACHE_PATHS``
+    """
+    from projects.models import Project
+
+    users = settings.WARM_CACHE_USERS if users is None else users
+    featured = settings.WARM_CACHE_FEATURED if featured is None else featured
+
+    paths = [reverse('project-featured'), reverse('project-list')]
+    if featured > 0:
+        featured_ids = Project.objects.filter(featured=True).order_by('order', '-start_date').values_list(
+            'pk', flat=True
+        )[:featured]
+        paths += [reverse('project-detail', kwargs={'pk': pk}) for pk in featured_ids]
+    for user_id in hot_users(users):
+        paths.append(reverse('async-portfolio', kwargs={'user_id': user_id}))
+        paths += [reverse(f'{section}-by-user', kwargs={'user_id': user_id}) for section in SECTIONS]
+        paths.append(f'{reverse("skill-by-category")}?user={user_id}')
+    paths += [path for path in settings.WARM_CACHE_PATHS if path not in paths]
+    return paths
+
+
+def warm_host():
+    """Host header for warm-up requests, so responses match what clients get"""
+    if settings.WARM_CACHE_HOST:
+        return settings.WARM_CACHE_HOST
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class Warmer:
+    """Render paths once per response coding, in-process or over HTTP from ``base_url``"""
+
+    def __init__(self, base_url=None, host=None, concurrency=1, timeout=None, notify=None):
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.host = host or warm_host()
+        self.concurrency = max(1, concurrency)
+        self.deadline = time.monotonic() + timeout if timeout else None
+        # Called after every request; gunicorn workers pass their heartbeat
+        self.notify = notify
+        self.handler = None if base_url else WSGIHandler()
+
+    def environ(self, path, coding):
+        path, _, query = path.partition('?')
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': self.host.split(':')[0],
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': self.host,
+            'HTTP_ACCEPT': 'application/json',
+            'HTTP_ACCEPT_ENCODING': coding,
+            'HTTP_USER_AGENT': 'portfolio-api-warmup',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': self.concurrency > 1,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            WARMUP_ENVIRON_KEY: True,
+        }
+
+    def fetch_local(self, path, coding):
+        status = []
+        response = self.handler(self.environ(path, coding), lambda line, headers, exc_info=None: status.append(line))
+        try:
+            size = sum(len(chunk) for chunk in response)
+        finally:
+            response.close()  # Sends request_finished, like a server would
+        return int(status[0].split()[0]), size
+
+    def fetch_http(self, path, coding):
+        request = urllib.request.Request(self.base_url + path, headers={
+            'Host': self.host,
+            'Accept': 'application/json',
+            'Accept-Encoding': coding,
+            'User-Agent': 'portfolio-api-warmup',
+            WARMUP_HEADER: warmup_token(),
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, 0
+        except OSError:
+            return None, 0
+
+    def fetch(self, path, coding):
+        if self.deadline and time.monotonic() > self.deadline:
+            return {'path': path, 'encoding': coding, 'status': None, 'bytes': 0, 'ms': 0.0, 'skipped': True}
+        started = time.perf_counter()
+        status, size = (self.fetch_http if self.base_url else self.fetch_local)(path, coding)
+        if self.notify is not None:
+            self.notify()
+        return {
+            'path': path, 'encoding': coding, 'status': status, 'bytes': size,
+            'ms': round((time.perf_counter() - started) * 1000, 1), 'skipped': False,
+        }
+
+    def warm(self, paths, encodings=None):
+        """Request every path once per coding; returns one result dict per request"""
+        jobs = [(path, coding) for path in paths for coding in (encodings or supported_encodings())]
+        if self.concurrency == 1:
+            return [self.fetch(path, coding) for path, coding in jobs]
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='warmup') as pool:
+            return list(pool.map(lambda job: self.fetch(*job), jobs))
+
+
+@contextmanager
+def warm_slot():
+    """
+    One of ``WARM_CACHE_CONCURRENCY`` host-wide slots for a full warm, or
+    None when all are taken. Slots are flocked files, released by the kernel
+    if the worker dies. Without fcntl every worker gets one.
+    """
+    if fcntl is None:
+        yield 0
+        return
+    os.makedirs(settings.WARM_CACHE_LOCK_DIR, exist_ok=True)
+    for index in range(max(1, settings.WARM_CACHE_CONCURRENCY)):
+        fd = os.open(os.path.join(settings.WARM_CACHE_LOCK_DIR, f'slot-{index}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        try:
+            yield index
+        finally:
+            os.close(fd)  # Releases the lock
+        return
+    yield None
+
+
+def warm_worker(notify=None):
+    """Warm this process before it serves; returns the results and whether the warm was full"""
+    with warm_slot() as slot:
+        # Without a slot, one request still opens the connection and runs the first-request imports
+        paths = hot_paths() if slot is not None else [reverse('project-featured')]
+        results = Warmer(timeout=settings.WARM_CACHE_TIMEOUT, notify=notify).warm(paths)
+    return results, slot is not None
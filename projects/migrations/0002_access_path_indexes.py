@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['user', '-featured', '-start_date', 'order'], name='projects_pr_user_id_3298a1_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['-featured', '-start_date', 'order'], name='projects_pr_feature_b2c309_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='projectimage',
+            index=models.Index(fields=['project', 'order', 'uploaded_at'], name='projects_pr_project_38c859_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0002_access_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The FK's own index, declared in the state so it can be dropped concurrently
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='project',
+                name='user',
+                field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='projects', to=settings.AUTH_USER_MODEL),
+            ),
+            migrations.AddIndex(
+                model_name='project',
+                index=models.Index(fields=['user'], name='projects_project_user_id_719f19dd'),
+            ),
+        ]),
+        RemoveIndexConcurrently(
+            model_name='project',
+            name='projects_project_user_id_719f19dd',
+        ),
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='projectimage',
+                name='project',
+                field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='images', to='projects.project'),
+            ),
+            migrations.AddIndex(
+                model_name='projectimage',
+                index=models.Index(fields=['project'], name='projects_projectimage_project_id_618ded0e'),
+            ),
+        ]),
+        RemoveIndexConcurrently(
+            model_name='projectimage',
+            name='projects_projectimage_project_id_618ded0e',
+        ),
+    ]
@@ -12,7 +12,8 @@ class Project(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='projects'
+        related_name='projects',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     title = models.CharField(max_length=200)
     description = models.TextField(help_text="Short description")
@@ -92,6 +93,11 @@ class Project(models.Model):
         ordering = ['-featured', '-start_date', 'order']
         verbose_name = 'Project'
         verbose_name_plural = 'Projects'
+        # One user's projects and the full list, both in default order
+        indexes = [
+            models.Index(fields=['user', '-featured', '-start_date', 'order']),
+            models.Index(fields=['-featured', '-start_date', 'order']),
+        ]
     
     def __str__(self):
         return self.title
@@ -110,7 +116,8 @@ class ProjectImage(models.Model):
     project = models.ForeignKey(
         Project,
         on_delete=models.CASCADE,
-        related_name='images'
+        related_name='images',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     image = models.ImageField(upload_to='projects/')
     caption = models.CharField(max_length=200, blank=True, null=True)
@@ -119,6 +126,9 @@ class ProjectImage(models.Model):
     
     class Meta:
         ordering = ['order', 'uploaded_at']
+        indexes = [
+            models.Index(fields=['project', 'order', 'uploaded_at']),
+        ]
     
     def __str__(self):
         return f"{self.project.title} - Image {self.order}"
@@ -40,6 +40,12 @@ class ProjectListSerializer(serializers.ModelSerializer):
             'project_url', 'github_url', 'duration', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        # What method fields read (see portfolio_api.sparse_fields)
+        field_sources = {
+            'thumbnail': ['images'],
+            'technologies_count': ['technologies'],
+            'duration': ['start_date', 'end_date', 'current'],
+        }
     
     def get_thumbnail(self, obj):
         """Get first image as thumbnail"""
@@ -51,6 +57,26 @@ class ProjectListSerializer(serializers.ModelSerializer):
             return first_image.image.url
         return None
     
+    def fast_prepare_rows(self, rows):
+        """Load the first image of every project in one query (see portfolio_api.fast_serializers)"""
+        self._first_images = {}
+        if 'thumbnail' not in self.fields:
+            return
+        images = ProjectImage.objects.filter(project_id__in=[row['id'] for row in rows])
+        for project_id, image in images.values_list('project_id', 'image'):
+            self._first_images.setdefault(project_id, image)
+    
+    def fast_get_thumbnail(self, row):
+        """get_thumbnail for a values() row"""
+        image = self._first_images.get(row['id'])
+        if image is None:
+            return None
+        url = ProjectImage._meta.get_field('image').storage.url(image)
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+    
     def get_technologies_count(self, obj):
         """Count of technologies"""
         return len(obj.technologies) if obj.technologies else 0
@@ -98,6 +124,13 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
             'images', 'duration', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'owner_name', 'owner_email', 'video_url']
+        field_sources = {
+            'duration': ['start_date', 'end_date', 'current'],
+            'technologies_count': ['technologies'],
+            'owner_name': ['user'],
+            'owner_email': ['user'],
+            'video_url': ['video'],
+        }
     
     def get_duration(self, obj):
         """Calculate project duration"""
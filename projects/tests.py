@@ -1,3 +1,42 @@
-from django.test import TestCase
+from portfolio_api.testing import FastListParityMixin, PortfolioTestCase
 
-# Create your tests here.
+from .models import Project
+
+
+class ProjectQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over ProjectViewSet.query_budget"""
+
+    def test_list(self):
+        self.get_ok('/api/projects/')
+        self.get_ok('/api/projects/', {'page': 2, 'ordering': 'title'})
+        self.get_ok('/api/projects/', {'search': 'Project'})
+
+    def test_list_for_user(self):
+        response = self.get_ok('/api/projects/', {'user': self.owner.pk, 'featured_only': 'true'})
+        self.assertEqual(response.json()['count'], Project.objects.filter(user=self.owner, featured=True).count())
+
+    def test_retrieve(self):
+        self.get_ok(f'/api/projects/{self.seeded["project_ids"][0]}/')
+
+    def test_featured(self):
+        self.get_ok('/api/projects/featured/')
+
+    def test_by_user(self):
+        self.get_ok(f'/api/projects/by_user/{self.owner.pk}/')
+
+
+class ProjectFastListTests(FastListParityMixin, PortfolioTestCase):
+    paths = [
+        '/api/projects/',
+        '/api/projects/featured/',
+        '/api/projects/by_user/{user}/',
+    ]
+    variants = [
+        {},
+        {'page': 2},
+        {'fields': 'id,title,duration,thumbnail'},
+        {'omit': 'technologies,thumbnail,duration'},
+        {'search': 'Project 1'},
+        {'ordering': '-title'},
+        {'user': '{user}', 'fields': 'id,title,duration,thumbnail', 'ordering': '-title'},
+    ]
@@ -2,7 +2,7 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 
@@ -15,9 +15,12 @@ from .serializers import (
     ProjectImageUploadSerializer
 )
 from portfolio_api.permissions import IsOwnerOrReadOnly, IsSuperAdminOrEditor
+from portfolio_api.fast_serializers import FastListMixin
+from portfolio_api.surrogate_keys import SurrogateKeyMixin
+from portfolio_api.renderers import FastJSONParser
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SurrogateKeyMixin, FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing projects
     
@@ -36,12 +39,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
     """
     queryset = Project.objects.select_related('user').prefetch_related('images').all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsSuperAdminOrEditor]
-    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    parser_classes = [FastJSONParser, MultiPartParser, FormParser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['featured', 'current', 'user']
     search_fields = ['title', 'description', 'long_description', 'technologies', 'role']
     ordering_fields = ['start_date', 'created_at', 'order', 'title']
     ordering = ['-featured', '-start_date']
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = {'list': 5, 'retrieve': 4, 'featured': 4, 'by_user': 5}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -57,32 +62,34 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return [IsSuperAdminOrEditor()]
         return [IsAuthenticatedOrReadOnly()]
     
-    def list(self, request, *args, **kwargs):
-        """List all projects with filtering and search"""
-        queryset = self.filter_queryset(self.get_queryset())
+    def filter_queryset(self, queryset):
+        """Filter backends, plus the list's ``featured_only`` and ``current_only`` flags"""
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
         
         # Filter by user if provided
-        user_id = request.query_params.get('user')
+        user_id = params.get('user')
         if user_id:
             queryset = queryset.filter(user__id=user_id)
         
         # Filter featured only
-        featured_only = request.query_params.get('featured_only')
+        featured_only = params.get('featured_only')
         if featured_only and featured_only.lower() == 'true':
             queryset = queryset.filter(featured=True)
         
         # Filter current projects
-        current_only = request.query_params.get('current_only')
+        current_only = params.get('current_only')
         if current_only and current_only.lower() == 'true':
             queryset = queryset.filter(current=True)
         
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """List all projects with filtering and search"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.fast_list_response(queryset, ProjectListSerializer)
     
     def create(self, request, *args, **kwargs):
         """Create a new project"""
@@ -165,21 +172,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def featured(self, request):
         """Get featured projects only"""
         queryset = self.get_queryset().filter(featured=True)
-        serializer = ProjectListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, ProjectListSerializer, paginate=False)
     
     @action(detail=False, methods=['get'], url_path='by_user/(?P<user_id>[^/.]+)')
     def by_user(self, request, user_id=None):
         """Get all projects for a specific user"""
         queryset = self.get_queryset().filter(user__id=user_id)
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = ProjectListSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = ProjectListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, ProjectListSerializer)
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_images(self, request, pk=None):
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+from portfolio_api.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY on PostgreSQL cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('skills', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='skill',
+            index=models.Index(fields=['user', 'category', 'order', '-proficiency_level'], name='skills_skil_user_id_89e107_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='skill',
+            index=models.Index(fields=['category', 'order', '-proficiency_level'], name='skills_skil_categor_8b403f_idx'),
+        ),
+    ]
@@ -32,7 +32,8 @@ class Skill(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='skills'
+        related_name='skills',
+        db_index=False,  # Leads a composite index in Meta.indexes
     )
     name = models.CharField(max_length=100, help_text="Skill name")
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
@@ -56,6 +57,10 @@ class Skill(models.Model):
         unique_together = ['user', 'name']
         verbose_name = 'Skill'
         verbose_name_plural = 'Skills'
+        indexes = [
+            models.Index(fields=['user', 'category', 'order', '-proficiency_level']),
+            models.Index(fields=['category', 'order', '-proficiency_level']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_proficiency_level_display()})"
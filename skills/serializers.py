@@ -33,6 +33,11 @@ class SkillDetailSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'owner_name', 'owner_email']
+        # What method fields read (see portfolio_api.sparse_fields)
+        field_sources = {
+            'owner_name': ['user'],
+            'owner_email': ['user'],
+        }
     
     def get_owner_name(self, obj):
         """Get skill owner name"""
@@ -1,3 +1,38 @@
-from django.test import TestCase
+from portfolio_api.testing import FastListParityMixin, PortfolioTestCase
 
-# Create your tests here.
+from .models import Skill
+
+
+class SkillQueryBudgetTests(PortfolioTestCase):
+    """Each request fails with QueryBudgetExceeded if it runs over SkillViewSet.query_budget"""
+
+    def test_list(self):
+        self.get_ok('/api/skills/')
+        self.get_ok('/api/skills/', {'page': 2, 'ordering': 'name'})
+        self.get_ok('/api/skills/', {'user': self.owner.pk})
+
+    def test_retrieve(self):
+        self.get_ok(f'/api/skills/{Skill.objects.values_list("pk", flat=True).first()}/')
+
+    def test_by_user(self):
+        self.get_ok(f'/api/skills/by_user/{self.owner.pk}/')
+
+    def test_by_category(self):
+        self.get_ok('/api/skills/by_category/')
+
+
+class SkillFastListTests(FastListParityMixin, PortfolioTestCase):
+    paths = [
+        '/api/skills/',
+        '/api/skills/by_user/{user}/',
+        '/api/skills/by_category/',
+    ]
+    variants = [
+        {},
+        {'page': 2},
+        {'fields': 'id,name,category_display,proficiency_display'},
+        {'omit': 'category_display,endorsements'},
+        {'search': 'Skill 1'},
+        {'ordering': '-years_of_experience'},
+        {'user': '{user}', 'fields': 'id,name,category_display,proficiency_display', 'ordering': '-years_of_experience'},
+    ]
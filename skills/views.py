@@ -12,9 +12,11 @@ from .serializers import (
     SkillCreateUpdateSerializer
 )
 from portfolio_api.permissions import IsSuperAdminOrEditor
+from portfolio_api.fast_serializers import FastListMixin
+from portfolio_api.surrogate_keys import SurrogateKeyMixin
 
 
-class SkillViewSet(viewsets.ModelViewSet):
+class SkillViewSet(SurrogateKeyMixin, FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing skills
     
@@ -28,6 +30,8 @@ class SkillViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
     ordering_fields = ['name', 'category', 'proficiency_level', 'years_of_experience', 'endorsements', 'order']
     ordering = ['category', 'order', '-proficiency_level']
+    # Queries per request, authentication included (see portfolio_api.query_metrics)
+    query_budget = {'list': 4, 'retrieve': 3, 'by_user': 4, 'by_category': 3}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -43,6 +47,13 @@ class SkillViewSet(viewsets.ModelViewSet):
             return [IsSuperAdminOrEditor()]
         return [IsAuthenticatedOrReadOnly()]
     
+    def sparse_fields(self, serializer_class):
+        """by_category groups on category, so it is read even when not selected"""
+        fields = super().sparse_fields(serializer_class)
+        if fields is not None and self.action == 'by_category' and 'category' not in fields:
+            fields.append('category')
+        return fields
+    
     def perform_create(self, serializer):
         """Auto-assign authenticated user when creating"""
         serializer.save(user=self.request.user)
@@ -51,14 +62,7 @@ class SkillViewSet(viewsets.ModelViewSet):
     def by_user(self, request, user_id=None):
         """Get all skills for a specific user"""
         queryset = self.get_queryset().filter(user__id=user_id)
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = SkillListSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = SkillListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.fast_list_response(queryset, SkillListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_category(self, request):
@@ -72,13 +76,21 @@ class SkillViewSet(viewsets.ModelViewSet):
         if user_id:
             queryset = queryset.filter(user__id=user_id)
         
+        # One query for all categories, grouped in memory
+        selected = super().sparse_fields(SkillListSerializer)
+        drop_category = selected is not None and 'category' not in selected
+        grouped = {}
+        for skill in self.fast_serialize(self.fast_rows(queryset, SkillListSerializer), SkillListSerializer):
+            category = skill.pop('category') if drop_category else skill['category']
+            grouped.setdefault(category, []).append(skill)
+        
         for category_code, category_name in categories:
-            skills = queryset.filter(category=category_code)
-            if skills.exists():
+            skills = grouped.get(category_code)
+            if skills:
                 result[category_code] = {
                     'name': category_name,
-                    'count': skills.count(),
-                    'skills': SkillListSerializer(skills, many=True, context={'request': request}).data
+                    'count': len(skills),
+                    'skills': skills
                 }
         
         return Response(result)